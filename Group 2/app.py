@@ -368,3 +368,4 @@ class ProductionMonitoringApp(tk.Tk):
 if __name__ == "__main__":
     app = ProductionMonitoringApp()
     app.mainloop()
+    app.production_data.close()
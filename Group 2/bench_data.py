@@ -0,0 +1,180 @@
+"""Time loading and importing generated production data.
+
+Compares the old one-Product-query-per-row load with the JOIN load, then
+times ProductionData.import_csv on the same rows written as a CSV file and
+a burst of single-row edits, committed one by one and through the
+write-behind queue.
+
+Usage: python bench_data.py --rows 2000000
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import tempfile
+import time
+
+import data
+
+data.MACHINE_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data_set", "machine_data.json"
+)
+PRODUCTS = [("prod_001", "speaker"), ("prod_002", "headphones"), ("prod_003", "tv")]
+MACHINES = [
+    (f"mch_{short}_{number:03d}", f"{product_type} assembly machine")
+    for short, product_type in (("spk", "speaker"), ("hph", "headphones"), ("tv", "tv"))
+    for number in range(1, 3)
+]
+
+
+def production_rows(rows: int):
+    for index in range(rows):
+        product_id, product_type = PRODUCTS[index % 3]
+        # Each product has two machines, listed next to each other.
+        machine_id, machine_type = MACHINES[index % 3 * 2 + index // 3 % 2]
+        failed = index % 10 == 0
+        yield (
+            f"batch_{index:08d}",
+            machine_id,
+            machine_type,
+            product_id,
+            f"{index % 28 + 1}/{index % 12 + 1}/2024",
+            f"{index % 28 + 1}/{index % 12 + 1}/2025",
+            100 + index % 1000,
+            "fail" if failed else "pass",
+            "missing parts" if failed else "",
+        )
+
+
+def create_database(path: str, rows: int) -> None:
+    data.PRODUCTION_DATA_DB = path
+    # Only for the schema; close() also stops its write-behind thread.
+    data.ProductionData().close()
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT INTO Machine VALUES (?, ?)", MACHINES)
+        conn.executemany("INSERT INTO Product VALUES (?, ?)", PRODUCTS)
+        conn.executemany(
+            "INSERT INTO ProductionData VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            production_rows(rows),
+        )
+    conn.close()
+
+
+def write_csv(path: str, rows: int) -> None:
+    product_types = dict(PRODUCTS)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(data.IMPORT_CSV_COLUMNS)
+        for row in production_rows(rows):
+            writer.writerow((*row[:3], product_types[row[3]], *row[4:]))
+
+
+def load_per_row(path: str) -> list[dict]:
+    """The load as it was: every row asks the Product table for its type."""
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM ProductionData")
+    keys = (
+        "batch_id",
+        "machine_id",
+        "machine_type",
+        "product_id",
+        "start_date",
+        "end_date",
+        "units",
+        "result",
+        "remarks",
+    )
+    table = []
+    for db_row in cursor.fetchall():
+        data_dict = dict(zip(keys, db_row))
+        product_id = data_dict.pop("product_id")
+        cursor.execute(
+            "SELECT DISTINCT * FROM Product WHERE product_id in (?)", (product_id,)
+        )
+        _, product_type = cursor.fetchone()
+        data_dict["product_type"] = product_type
+        table.append(data_dict)
+    conn.close()
+    return table
+
+
+def load_join(path: str) -> list[dict]:
+    data.PRODUCTION_DATA_DB = path
+    prod_data = data.ProductionData()
+    try:
+        return prod_data.production_data
+    finally:
+        prod_data.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, "production_data.db")
+        start = time.perf_counter()
+        create_database(path, args.rows)
+        print(f"{args.rows} rows generated in {time.perf_counter() - start:.1f} s")
+        results = {}
+        for name, load in (("per row", load_per_row), ("join", load_join)):
+            start = time.perf_counter()
+            results[name] = load(path)
+            print(f"{name:<10}{time.perf_counter() - start:>10.2f} s")
+        assert results["per row"] == results["join"]
+        del results
+
+        csv_path = os.path.join(temp, "production_data.csv")
+        write_csv(csv_path, args.rows)
+        create_database(os.path.join(temp, "import.db"), 0)
+        prod_data = data.ProductionData()
+        try:
+            report = prod_data.import_csv(csv_path)
+        finally:
+            prod_data.close()
+        print(
+            f"{'import':<10}{report['seconds']:>10.2f} s"
+            f"   {report['rows_per_second']} rows/s, {report['rejected']} rejected"
+        )
+
+        edits = min(args.rows, 2_000)
+        prod_data = data.ProductionData()
+        try:
+            # Loaded before the timing, edits are checked against the table.
+            prod_data.production_data
+            conn = sqlite3.connect(prod_data.writer.path)
+            batch_ids = [f"batch_{index:08d}" for index in range(edits)]
+            start = time.perf_counter()
+            for batch_id in batch_ids:
+                conn.execute(
+                    "UPDATE ProductionData SET result = ?, remarks = ?"
+                    " WHERE batch_id = ?",
+                    ("fail", "per commit", batch_id),
+                )
+                conn.commit()
+            seconds = time.perf_counter() - start
+            print(f"{'commits':<10}{seconds:>10.2f} s   {edits} edits")
+            conn.close()
+            commits = prod_data.writer.commits
+            start = time.perf_counter()
+            for batch_id in batch_ids:
+                prod_data.update_result(
+                    {"batch_id": batch_id, "result": "fail", "remarks": "write-behind"}
+                )
+            queued = time.perf_counter() - start
+            prod_data.flush()
+            print(
+                f"{'queued':<10}{time.perf_counter() - start:>10.2f} s"
+                f"   {queued:.2f} s before flush,"
+                f" {prod_data.writer.commits - commits} commits"
+            )
+        finally:
+            prod_data.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,258 @@
+import argparse
+import atexit
 import json
 import csv
+import queue
+import re
 import sqlite3
+import threading
+import time
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 
 PRODUCTION_DATA_PATH = r"training\data_set\production_data.csv"
 PRODUCTION_DATA_DB = r"training\data_set\production_data.db"
 MACHINE_DATA_PATH = r"training\data_set\machine_data.json"
+DATA_TABLE_KEYS = (
+    "batch_id",
+    "machine_id",
+    "machine_type",
+    "start_date",
+    "end_date",
+    "units",
+    "result",
+    "remarks",
+    "product_type",
+)
+# Where each column of a data row comes from, also the columns that can be
+# filtered on.
+COLUMN_EXPRESSIONS = {
+    "batch_id": "data.batch_id",
+    "machine_id": "data.machine_id",
+    "machine_type": "data.machine_type",
+    "start_date": "data.start_date",
+    "end_date": "data.end_date",
+    "units": "data.units",
+    "result": "data.result",
+    "remarks": "data.remarks",
+    "product_type": "product.product_type",
+}
+SELECT_DATA_ROWS = f"""
+    SELECT {", ".join(COLUMN_EXPRESSIONS[key] for key in DATA_TABLE_KEYS)}
+    FROM ProductionData AS data
+    JOIN Product AS product ON product.product_id = data.product_id
+"""
+INDEXED_COLUMNS = (
+    "machine_id",
+    "machine_type",
+    "product_id",
+    "result",
+    "start_date",
+    "end_date",
+)
+# Number of columns whose distinct values are kept.
+DISTINCT_CACHE_SIZE = 16
+# import_csv validates and inserts this many rows per transaction.
+IMPORT_BATCH_SIZE = 50_000
+# import_csv keeps at most this many rejected rows for its report.
+IMPORT_REJECTED_SAMPLE = 100
+IMPORT_CSV_COLUMNS = (
+    "batch_id",
+    "machine_id",
+    "machine_type",
+    "product_type",
+    "start_date",
+    "end_date",
+    "units",
+    "result",
+    "remarks",
+)
+# The writer commits queued changes this often, or sooner once this many
+# are waiting, see WriteBehindQueue.
+WRITE_BEHIND_INTERVAL_MS = 200
+WRITE_BEHIND_MAX_OPERATIONS = 500
+DATE_PATTERN = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+DAYS_IN_MONTH = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+@lru_cache(maxsize=4096)
+def is_valid_date(date_input: str) -> bool:
+    """Check a d/m/yyyy date without raising, for validating rows in bulk."""
+    match = DATE_PATTERN.fullmatch(date_input)
+    if match is None:
+        return False
+    day, month, year = map(int, match.groups())
+    if not 1 <= month <= 12 or not 1 <= day <= DAYS_IN_MONTH[month - 1]:
+        return False
+    leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    return month != 2 or day < 29 or leap
+
+
+class WriteBehindQueue:
+    """Run SQL statements on a background thread, many per transaction.
+
+    ``submit`` only queues a statement. The writer opens a transaction at
+    the first queued statement and commits it after
+    ``WRITE_BEHIND_INTERVAL_MS`` or ``WRITE_BEHIND_MAX_OPERATIONS``
+    statements, so a burst of edits costs one sync instead of one each.
+
+    Durability: ``flush`` returns once every statement submitted before it
+    is committed. Each group is one transaction, a crash never leaves part
+    of a group in the database, but it loses the statements still queued,
+    at most one interval of edits. ``close`` commits what is queued before
+    it returns and runs at a normal interpreter exit, not on a kill.
+
+    Failed statements are kept in ``errors`` until ``flush`` hands them
+    out, ``wait`` leaves them there; ``failures`` counts all of them. If
+    the writer itself dies, everything still queued is recorded as failed
+    and ``wait`` / ``flush`` return instead of waiting forever.
+    """
+
+    FLUSH = object()
+    STOP = object()
+
+    def __init__(
+        self,
+        path: str,
+        interval_ms: int = WRITE_BEHIND_INTERVAL_MS,
+        max_operations: int = WRITE_BEHIND_MAX_OPERATIONS,
+    ):
+        self.path = path
+        self.interval = interval_ms / 1000
+        self.max_operations = max_operations
+        self.queue = queue.Queue()
+        # (statement, parameters, error) of statements that failed.
+        self.errors = []
+        self.failures = 0
+        self.commits = 0
+        self.thread = threading.Thread(
+            target=self.__run, name="write-behind", daemon=True
+        )
+        self.thread.start()
+        atexit.register(self.close)
+
+    def submit(self, statement: str, parameters: tuple = ()) -> None:
+        if not self.thread.is_alive():
+            raise RuntimeError("The write-behind queue is closed.")
+        self.queue.put((statement, parameters))
+
+    def wait(self) -> None:
+        """Wait until everything queued so far is committed or has failed."""
+        if self.thread.is_alive():
+            self.queue.put(self.FLUSH)
+        with self.queue.all_tasks_done:
+            # Not queue.join(): nothing marks the items done once the
+            # writer is gone.
+            while self.queue.unfinished_tasks and self.thread.is_alive():
+                self.queue.all_tasks_done.wait(self.interval)
+        if not self.thread.is_alive():
+            self.__drain("The write-behind queue is closed.")
+
+    def flush(self) -> list[tuple[str, tuple, str]]:
+        """Wait like ``wait``, then return the statements that failed since
+        the previous flush.
+        """
+        self.wait()
+        errors, self.errors = self.errors, []
+        return errors
+
+    def close(self) -> None:
+        """Commit everything queued and stop the writer; safe to call twice."""
+        # Otherwise atexit keeps this queue alive until the interpreter exits.
+        atexit.unregister(self.close)
+        if self.thread.is_alive():
+            self.queue.put(self.STOP)
+            self.thread.join()
+        for statement, parameters, error in self.flush():
+            print(f"Write failed: {statement} {parameters}: {error}")
+
+    def __run(self):
+        try:
+            conn = sqlite3.connect(self.path)
+        except sqlite3.Error as e:
+            self.__drain(str(e))
+            return
+        stop = False
+        try:
+            while not stop:
+                group = [self.queue.get()]
+                deadline = time.monotonic() + self.interval
+                while len(group) < self.max_operations:
+                    if group[-1] is self.FLUSH or group[-1] is self.STOP:
+                        break
+                    try:
+                        group.append(
+                            self.queue.get(timeout=deadline - time.monotonic())
+                        )
+                    except (queue.Empty, ValueError):
+                        # ValueError: the deadline has already passed.
+                        break
+                stop = group[-1] is self.STOP
+                try:
+                    self.__commit(conn, group)
+                finally:
+                    for _ in group:
+                        self.queue.task_done()
+        except Exception as e:
+            self.__drain(str(e))
+        finally:
+            conn.close()
+
+    def __drain(self, error: str) -> None:
+        """Record every statement still queued as failed and mark it done."""
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, tuple):
+                self.__fail(*item, error)
+            self.queue.task_done()
+
+    def __fail(self, statement: str, parameters: tuple, error: str) -> None:
+        self.errors.append((statement, parameters, error))
+        self.failures += 1
+
+    def __commit(self, conn: sqlite3.Connection, group: list) -> None:
+        statements = [item for item in group if isinstance(item, tuple)]
+        if not statements:
+            return
+        for statement, parameters in statements:
+            try:
+                conn.execute(statement, parameters)
+            except sqlite3.Error as e:
+                # Only this statement is undone, the rest of the group stays.
+                self.__fail(statement, parameters, str(e))
+        try:
+            conn.commit()
+            self.commits += 1
+        except sqlite3.Error as e:
+            conn.rollback()
+            for statement, parameters in statements:
+                self.__fail(statement, parameters, str(e))
 
 
 class ProductionData:
     def __init__(self):
         self.__machine_data = {}
         self.__data_table = []
+        # batch_id -> row of __data_table, the same dict objects.
+        self.__data_index = {}
+        self.__product_ids = {}
+        self.__product_version = None
+        # Cleared by every write, see get_column_values.
+        self.__distinct_values = lru_cache(maxsize=DISTINCT_CACHE_SIZE)(
+            self.__select_distinct
+        )
+        self.__distinct_version = None
+        # writer.failures when the in-memory table was last known to match.
+        self.__failures_seen = 0
         self.init_db()
+        # add_data, update_result and delete_data_row change the in-memory
+        # table at once and leave the database to this writer.
+        self.writer = WriteBehindQueue(PRODUCTION_DATA_DB)
 
     @property
     def machine_data(self) -> dict[str, str]:
@@ -30,32 +270,33 @@ class ProductionData:
 
     @property
     def production_data(self) -> list[dict[str, str]]:
+        self.__reload_if_failed()
         if not self.__data_table:
-            self.cursor.execute("SELECT * FROM ProductionData")
-            db_data: list[tuple] = self.cursor.fetchall()
-            keys = (
-                "batch_id",
-                "machine_id",
-                "machine_type",
-                "product_id",
-                "start_date",
-                "end_date",
-                "units",
-                "result",
-                "remarks",
-            )
-            for db_row in db_data:
-                data_dict = dict(zip(keys, db_row))
-                product_id = data_dict.pop("product_id")
-                self.cursor.execute(
-                    f"SELECT DISTINCT * FROM Product WHERE product_id in (?)",
-                    (product_id,),
-                )
-                _, product_type = self.cursor.fetchone()
-                data_dict["product_type"] = product_type
-                self.__data_table.append(data_dict)
+            # One JOIN instead of a Product query per row; the cursor is
+            # iterated so rows are turned into dicts as SQLite yields them.
+            self.__data_table.extend(self.__select_rows(SELECT_DATA_ROWS))
+            self.__data_index = {
+                data_row["batch_id"]: data_row for data_row in self.__data_table
+            }
         return self.__data_table
 
+    @property
+    def product_ids(self) -> dict[str, str]:
+        """product_type -> product_id, read again only after Product changed."""
+        # Bumped by the Product triggers, whichever connection writes it.
+        self.cursor.execute("SELECT version FROM ProductVersion")
+        version = self.cursor.fetchone()[0]
+        if version != self.__product_version:
+            self.cursor.execute("SELECT product_type, product_id FROM Product")
+            self.__product_ids = dict(self.cursor.fetchall())
+            self.__product_version = version
+        return self.__product_ids
+
+    def data_version(self) -> int:
+        """Changes whenever another connection committed to the database."""
+        self.cursor.execute("PRAGMA data_version")
+        return self.cursor.fetchone()[0]
+
     def init_db(self):
         self.conn = sqlite3.connect(PRODUCTION_DATA_DB)
         self.cursor = self.conn.cursor()
@@ -99,7 +340,66 @@ class ProductionData:
             """
         )
 
+        # One row counting the writes to Product, see product_ids.
+        self.cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ProductVersion (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+            """
+        )
+        self.cursor.execute("INSERT OR IGNORE INTO ProductVersion VALUES (1, 0)")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            self.cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS Product_{event.lower()}
+                AFTER {event} ON Product
+                BEGIN
+                    UPDATE ProductVersion SET version = version + 1;
+                END
+                """
+            )
+
+        self.create_indexes()
+
         self.conn.commit()
+        # Readers and the background writer do not block each other.
+        self.cursor.execute("PRAGMA journal_mode = WAL").fetchone()
+
+    def flush(self) -> list[tuple[str, tuple, str]]:
+        """Write every pending change to the database, see WriteBehindQueue.
+
+        Returns the changes that failed since the previous flush.
+        """
+        errors = self.writer.flush()
+        self.__reload_if_failed()
+        return errors
+
+    def __wait(self) -> None:
+        """Like flush, but the failed changes stay for the next flush."""
+        self.writer.wait()
+        self.__reload_if_failed()
+
+    def __reload_if_failed(self) -> None:
+        # A change that failed in the database was already applied to the
+        # in-memory table, which is read again from the database instead.
+        if self.writer.failures != self.__failures_seen:
+            self.__failures_seen = self.writer.failures
+            self.__data_table.clear()
+            self.__data_index.clear()
+            self.__distinct_values.cache_clear()
+
+    def close(self):
+        self.writer.close()
+        self.conn.close()
+
+    def create_indexes(self):
+        for column in INDEXED_COLUMNS:
+            self.cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS ProductionData_{column} "
+                f"ON ProductionData ({column})"
+            )
 
     def add_data(self, payload_dict: dict) -> tuple[bool, str]:
         batch_id = payload_dict.get("batch_id", "")
@@ -134,19 +434,17 @@ class ProductionData:
             "remarks": remarks,
         }
         self.__data_table.append(new_data_row)
-        self.cursor.execute(
-            f"SELECT DISTINCT * FROM Product WHERE product_type in (?)", (product_type,)
-        )
-        product_id, _ = self.cursor.fetchone()
+        self.__data_index[batch_id] = new_data_row
+        new_data_row = dict(new_data_row)
         new_data_row.pop("product_type")
-        new_data_row["product_id"] = product_id
+        new_data_row["product_id"] = self.product_ids[product_type]
         placeholders = ", ".join(["?" for _ in new_data_row])
         column_names = ", ".join([key for key in new_data_row.keys()])
-        self.cursor.execute(
+        self.writer.submit(
             f"INSERT INTO ProductionData ({column_names}) VALUES ({placeholders})",
             tuple(new_data_row.values()),
         )
-        self.conn.commit()
+        self.__distinct_values.cache_clear()
         return True, f"New data, batch ID: {batch_id}, has been added"
 
     def update_result(self, payload_dict: dict) -> tuple[bool, str]:
@@ -159,17 +457,14 @@ class ProductionData:
             return False, "Result field must not be empty!"
         if result == "fail" and not remarks:
             return False, f"Please add remarks of why Batch ID: {batch_id} failed"
-        for data_row in self.__data_table:
-            if batch_id != data_row["batch_id"]:
-                continue
-            data_row["result"] = result
-            data_row["remarks"] = remarks
-            break
-        self.cursor.execute(
+        data_row = self.__data_index[batch_id]
+        data_row["result"] = result
+        data_row["remarks"] = remarks
+        self.writer.submit(
             "UPDATE ProductionData SET result = ?, remarks = ?  WHERE batch_id = ?",
             (result, remarks, batch_id),
         )
-        self.conn.commit()
+        self.__distinct_values.cache_clear()
         return True, f"Inspection result for Batch ID: {batch_id} has been updated"
 
     def delete_data_row(self, payload_dict: dict) -> tuple[bool, str]:
@@ -178,10 +473,16 @@ class ProductionData:
             return False, "Please provide batch_id to be deleted"
         if not self.check_data_exists(batch_id=batch_id):
             return False, f"Batch ID: {batch_id} does not exists!"
-        self.cursor.execute(
+        data_row = self.__data_index.pop(batch_id)
+        # Rows keep their display order, so this one is a list scan.
+        for position, table_row in enumerate(self.__data_table):
+            if table_row is data_row:
+                del self.__data_table[position]
+                break
+        self.writer.submit(
             "DELETE FROM ProductionData WHERE batch_id = ?", (batch_id,)
         )
-        self.conn.commit()
+        self.__distinct_values.cache_clear()
         return True, f"Batch ID: {batch_id} data has been deleted"
 
     @staticmethod
@@ -197,32 +498,190 @@ class ProductionData:
 
         return is_valid
 
+    def import_csv(
+        self, path: str = PRODUCTION_DATA_PATH, batch_size: int = IMPORT_BATCH_SIZE
+    ) -> dict:
+        """Bulk load a production_data.csv export into the database.
+
+        The file is streamed ``batch_size`` rows at a time: each batch is
+        validated, its product ids come from ``product_ids`` and it is written
+        with one ``executemany`` in one transaction. Rows whose batch_id is
+        already stored are skipped. Syncing is relaxed during the load, a crash in
+        the middle may need the import to be run again.
+
+        Returns the imported / skipped / rejected counts, a sample of the
+        rejected rows as (line, reason) and the rows per second.
+        """
+        start = time.perf_counter()
+        self.__wait()
+        report = {"imported": 0, "skipped": 0, "rejected": 0, "rejected_rows": []}
+        self.cursor.execute("SELECT 1 FROM ProductionData LIMIT 1")
+        rebuild_indexes = self.cursor.fetchone() is None
+        self.cursor.execute("PRAGMA synchronous")
+        synchronous = self.cursor.fetchone()[0]
+        self.cursor.execute("PRAGMA synchronous = OFF")
+        self.cursor.execute("PRAGMA cache_size = -262144")
+        self.cursor.execute("PRAGMA temp_store = MEMORY")
+        if rebuild_indexes:
+            # Building the indexes once at the end beats updating them per row.
+            for column in INDEXED_COLUMNS:
+                self.cursor.execute(f"DROP INDEX IF EXISTS ProductionData_{column}")
+        try:
+            with open(path, "r", newline="") as file:
+                reader = csv.reader(file)
+                header = next(reader)
+                positions = [header.index(key) for key in IMPORT_CSV_COLUMNS]
+                line = 1
+                while batch := list(islice(reader, batch_size)):
+                    rows = self.__validate_batch(batch, positions, line, report)
+                    line += len(batch)
+                    self.cursor.executemany(
+                        """
+                        INSERT OR IGNORE INTO ProductionData (batch_id, machine_id,
+                            machine_type, product_id, start_date, end_date, units,
+                            result, remarks)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        rows,
+                    )
+                    report["imported"] += self.cursor.rowcount
+                    report["skipped"] += len(rows) - self.cursor.rowcount
+                    self.conn.commit()
+        finally:
+            self.conn.rollback()
+            self.cursor.execute(f"PRAGMA synchronous = {synchronous}")
+            self.create_indexes()
+        # Read again from the database on next use.
+        self.__data_table.clear()
+        self.__data_index.clear()
+        self.__distinct_values.cache_clear()
+        seconds = time.perf_counter() - start
+        rows = report["imported"] + report["skipped"] + report["rejected"]
+        report["seconds"] = round(seconds, 3)
+        report["rows_per_second"] = round(rows / seconds)
+        return report
+
+    def __validate_batch(
+        self, batch: list[list[str]], positions: list[int], line: int, report: dict
+    ) -> list[tuple]:
+        """Return the valid rows of ``batch``, product_type replaced by its id.
+
+        Invalid rows are counted in ``report``; no exception is raised per row.
+        """
+        machine_data = self.machine_data
+        product_ids = self.product_ids
+        width = max(positions) + 1
+        pick = itemgetter(*positions)
+        valid = []
+        for line_number, csv_row in enumerate(batch, start=line + 1):
+            if len(csv_row) < width:
+                reason = "missing columns"
+            else:
+                row = list(pick(csv_row))
+                machine_type, product_type = row[2], row[3]
+                start_date, end_date, units = row[4], row[5], row[6]
+                if not row[0]:
+                    reason = "empty batch_id"
+                elif product_type not in product_ids:
+                    reason = f"unknown product type {product_type}"
+                elif machine_data.get(product_type) != machine_type:
+                    reason = f"{machine_type} does not make {product_type}"
+                elif not is_valid_date(start_date) or not is_valid_date(end_date):
+                    reason = f"invalid date {start_date} - {end_date}"
+                elif not units.isdigit():
+                    reason = f"invalid units {units}"
+                else:
+                    row[3] = product_ids[product_type]
+                    row[6] = int(units)
+                    valid.append(tuple(row))
+                    continue
+            report["rejected"] += 1
+            if len(report["rejected_rows"]) < IMPORT_REJECTED_SAMPLE:
+                report["rejected_rows"].append((line_number, reason))
+        return valid
+
     def get_column_values(self, column_name: str) -> list[str]:
-        return list({data_row[column_name] for data_row in self.production_data})
+        # Queued changes first, then a commit from another connection makes
+        # the cached values stale too.
+        self.__wait()
+        version = self.data_version()
+        if version != self.__distinct_version:
+            self.__distinct_values.cache_clear()
+            self.__distinct_version = version
+        return list(self.__distinct_values(column_name))
 
     def filter_data(
         self, column_name: str = "", value: str = ""
     ) -> list[dict[str, str]]:
         if not column_name and not value:
             return self.production_data
-        return [
-            data_row
-            for data_row in self.production_data
-            if data_row[column_name] == value
-        ]
+        # Only the matching rows are read, through the column's index.
+        return list(
+            self.__select_rows(
+                f"{SELECT_DATA_ROWS} WHERE {self.__column(column_name)} = ?", (value,)
+            )
+        )
+
+    def __select_rows(self, query: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        """Run ``query`` on a cursor that yields data rows as dicts."""
+        # Queued changes first, the query must see them.
+        self.__wait()
+        cursor = self.conn.cursor()
+        cursor.row_factory = lambda _, db_row: dict(zip(DATA_TABLE_KEYS, db_row))
+        return cursor.execute(query, parameters)
+
+    def __select_distinct(self, column_name: str) -> tuple:
+        expression = self.__column(column_name)
+        if column_name == "product_type":
+            # Product types in use, found through the product_id index.
+            query = """
+                SELECT product_type FROM Product AS product
+                WHERE EXISTS (
+                    SELECT 1 FROM ProductionData AS data
+                    WHERE data.product_id = product.product_id
+                )
+                ORDER BY product_type
+            """
+        else:
+            # Answered from the column's index alone where it has one.
+            query = f"""
+                SELECT DISTINCT {expression} FROM ProductionData AS data
+                ORDER BY {expression}
+            """
+        self.cursor.execute(query)
+        return tuple(value for value, in self.cursor.fetchall())
+
+    @staticmethod
+    def __column(column_name: str) -> str:
+        # Column names go into the SQL text, only known ones are accepted.
+        if column_name not in COLUMN_EXPRESSIONS:
+            raise ValueError(f"Unknown column: {column_name}")
+        return COLUMN_EXPRESSIONS[column_name]
 
     def is_machine_n_product_match(self, machine: str, product: str) -> bool:
         return self.machine_data[product] == machine
 
     def check_data_exists(self, batch_id: str) -> bool:
-        return any(
-            [batch_id == data_dict["batch_id"] for data_dict in self.__data_table]
-        )
+        # Loads the table first, a batch in the database but not yet in
+        # memory exists too.
+        self.production_data
+        return batch_id in self.__data_index
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Production data.")
+    parser.add_argument(
+        "--import-csv",
+        nargs="?",
+        const=PRODUCTION_DATA_PATH,
+        help="bulk load a production data CSV into the database",
+    )
+    args = parser.parse_args()
     prod_data = ProductionData()
-    print(prod_data.production_data)
+    if args.import_csv:
+        print(prod_data.import_csv(args.import_csv))
+    else:
+        print(prod_data.production_data)
     # machines = [
     #     ("mch_spk_001", "speaker assembly machine"),
     #     ("mch_hph_001", "headphones assembly machine"),
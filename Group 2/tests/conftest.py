@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The modules of this folder are run as scripts, not installed.
+sys.path.insert(0, str(Path(__file__).parents[1]))
@@ -0,0 +1,246 @@
+import os
+import sqlite3
+import threading
+from operator import itemgetter
+
+import pytest
+
+import bench_data
+import data
+
+MACHINE_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data_set",
+    "machine_data.json",
+)
+
+ROW = ("batch_1", "M1", "cutter", "P1", "01/03/2025", "02/03/2025", 10, "pass", "")
+
+
+@pytest.fixture
+def prod_data(tmp_path, monkeypatch):
+    path = str(tmp_path / "production_data.db")
+    monkeypatch.setattr(data, "PRODUCTION_DATA_DB", path)
+    prod_data = data.ProductionData()
+    with prod_data.conn:
+        prod_data.conn.execute("INSERT INTO Product VALUES ('P1', 'blade')")
+        prod_data.conn.execute(
+            "INSERT INTO ProductionData VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", ROW
+        )
+    yield prod_data
+    prod_data.close()
+
+
+@pytest.fixture
+def sample(tmp_path, monkeypatch):
+    """ProductionData over the generated rows of bench_data."""
+    path = str(tmp_path / "sample.db")
+    monkeypatch.setattr(data, "PRODUCTION_DATA_DB", path)
+    monkeypatch.setattr(data, "MACHINE_DATA_PATH", MACHINE_DATA_PATH)
+    bench_data.create_database(path, 60)
+    prod_data = data.ProductionData()
+    yield prod_data
+    prod_data.close()
+
+
+def test_flush_hands_out_errors_left_by_reads(tmp_path):
+    writer = data.WriteBehindQueue(str(tmp_path / "queue.db"))
+    writer.submit("CREATE TABLE item (name TEXT PRIMARY KEY)")
+    writer.submit("INSERT INTO item VALUES ('a')")
+    writer.submit("INSERT INTO item VALUES ('a')")
+
+    writer.wait()
+    assert writer.failures == 1
+    [(statement, parameters, error)] = writer.flush()
+    assert statement == "INSERT INTO item VALUES ('a')"
+    assert "UNIQUE" in error
+    assert writer.flush() == []
+    writer.close()
+
+
+def test_failed_write_reloads_the_table(prod_data):
+    with prod_data.conn:
+        prod_data.conn.execute(
+            """
+            CREATE TRIGGER no_fail BEFORE UPDATE ON ProductionData
+            WHEN NEW.result = 'fail'
+            BEGIN SELECT RAISE(ABORT, 'locked'); END
+            """
+        )
+    assert prod_data.production_data[0]["result"] == "pass"
+
+    ok, _ = prod_data.update_result(
+        {"batch_id": "batch_1", "result": "fail", "remarks": "scratched"}
+    )
+    assert ok
+    # The read waits for the writer and takes the database's word for it.
+    assert prod_data.get_column_values("result") == ["pass"]
+    assert prod_data.production_data[0]["result"] == "pass"
+    [(_, parameters, error)] = prod_data.flush()
+    assert parameters == ("fail", "scratched", "batch_1")
+    assert "locked" in error
+
+
+def test_flush_returns_when_the_writer_dies(tmp_path, monkeypatch):
+    connecting = threading.Event()
+
+    def connect(path):
+        connecting.wait()
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(data.sqlite3, "connect", connect)
+    writer = data.WriteBehindQueue(str(tmp_path / "queue.db"))
+    writer.submit("INSERT INTO item VALUES (1)")
+    connecting.set()
+
+    [(_, _, error)] = writer.flush()
+    assert error == "unable to open database file"
+    with pytest.raises(RuntimeError):
+        writer.submit("INSERT INTO item VALUES (2)")
+    writer.close()
+
+
+def test_join_load_matches_the_per_row_load(sample):
+    expected = bench_data.load_per_row(data.PRODUCTION_DATA_DB)
+
+    assert sample.production_data == expected
+
+
+def test_product_ids_are_read_again_only_after_product_changes(sample):
+    statements = []
+    sample.conn.set_trace_callback(statements.append)
+    assert sample.product_ids["tv"] == "prod_003"
+    sample.update_result({"batch_id": "batch_00000001", "result": "pass"})
+    sample.flush()
+    statements.clear()
+
+    # The writer committed, Product did not change.
+    assert sample.product_ids["tv"] == "prod_003"
+    assert "SELECT product_type, product_id FROM Product" not in statements
+
+    other = sqlite3.connect(data.PRODUCTION_DATA_DB)
+    with other:
+        other.execute("INSERT INTO Product VALUES ('prod_004', 'radio')")
+    other.close()
+    assert sample.product_ids["radio"] == "prod_004"
+
+
+def test_batch_index_follows_add_update_and_delete(sample):
+    row = {
+        "batch_id": "new_1",
+        "machine_id": "mch_tv_001",
+        "machine_type": "tv assembly machine",
+        "product_type": "tv",
+        "start_date": "1/5/2025",
+        "end_date": "2/5/2025",
+        "units": 5,
+        "result": "pass",
+        "remarks": "",
+    }
+    assert sample.add_data(row)[0]
+    assert sample.check_data_exists("new_1")
+    assert not sample.add_data(row)[0]
+
+    update = {"batch_id": "new_1", "result": "fail", "remarks": "dented"}
+    assert sample.update_result(update)[0]
+    (stored,) = [item for item in sample.production_data if item["batch_id"] == "new_1"]
+    assert (stored["result"], stored["remarks"]) == ("fail", "dented")
+
+    assert sample.delete_data_row({"batch_id": "new_1"})[0]
+    assert not sample.check_data_exists("new_1")
+    assert not sample.update_result(update)[0]
+    assert "new_1" not in [item["batch_id"] for item in sample.production_data]
+    assert sample.add_data(row)[0]
+    assert sample.filter_data("batch_id", "new_1")[0]["result"] == "pass"
+
+
+@pytest.mark.parametrize(
+    "column, value",
+    [
+        ("machine_id", "mch_tv_002"),
+        ("result", "fail"),
+        ("product_type", "speaker"),
+        ("start_date", "3/3/2024"),
+        ("units", "105"),
+    ],
+)
+def test_filter_data_matches_a_python_filter(sample, column, value):
+    expected = [row for row in sample.production_data if str(row[column]) == value]
+
+    rows = sample.filter_data(column, value)
+
+    assert expected
+    key = itemgetter("batch_id")
+    assert sorted(rows, key=key) == sorted(expected, key=key)
+
+
+def test_distinct_values_are_cached_until_an_edit(sample):
+    statements = []
+    sample.conn.set_trace_callback(statements.append)
+    assert sample.get_column_values("result") == ["fail", "pass"]
+    assert sample.get_column_values("product_type") == ["headphones", "speaker", "tv"]
+    statements.clear()
+
+    sample.get_column_values("result")
+    assert not any("DISTINCT" in statement for statement in statements)
+
+    sample.update_result(
+        {"batch_id": "batch_00000001", "result": "rework", "remarks": ""}
+    )
+    assert sample.get_column_values("result") == ["fail", "pass", "rework"]
+    with pytest.raises(ValueError):
+        sample.get_column_values("result; DROP TABLE Product")
+
+
+def test_import_csv_rebuilds_indexes_and_resets_pragmas(tmp_path, monkeypatch):
+    path = str(tmp_path / "import.db")
+    monkeypatch.setattr(data, "PRODUCTION_DATA_DB", path)
+    monkeypatch.setattr(data, "MACHINE_DATA_PATH", MACHINE_DATA_PATH)
+    bench_data.create_database(path, 0)
+    csv_path = tmp_path / "production_data.csv"
+    bench_data.write_csv(str(csv_path), 30)
+    with open(csv_path, "a") as file:
+        # An impossible date, then a product type that does not exist.
+        file.write("bad_1,mch_tv_001,tv assembly machine,tv,31/2/2024,1/3/2024,5,,\n")
+        file.write("bad_2,mch_tv_001,tv assembly machine,radio,1/2/2024,1/3/2024,5,,\n")
+    prod_data = data.ProductionData()
+    try:
+        prod_data.cursor.execute("PRAGMA synchronous")
+        synchronous = prod_data.cursor.fetchone()[0]
+
+        report = prod_data.import_csv(str(csv_path), batch_size=7)
+
+        assert (report["imported"], report["skipped"], report["rejected"]) == (30, 0, 2)
+        assert [line for line, _ in report["rejected_rows"]] == [32, 33]
+        prod_data.cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'ProductionData' AND name LIKE 'ProductionData_%'"
+        )
+        indexes = {name for name, in prod_data.cursor.fetchall()}
+        expected = {f"ProductionData_{column}" for column in data.INDEXED_COLUMNS}
+        assert indexes == expected
+        prod_data.cursor.execute("PRAGMA synchronous")
+        assert prod_data.cursor.fetchone()[0] == synchronous
+        assert len(prod_data.production_data) == 30
+        assert prod_data.import_csv(str(csv_path))["skipped"] == 30
+    finally:
+        prod_data.close()
+
+
+def test_close_commits_the_queue_and_leaves_atexit(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(data.atexit, "register", registered.append)
+    monkeypatch.setattr(data.atexit, "unregister", registered.remove)
+    path = str(tmp_path / "queue.db")
+    writer = data.WriteBehindQueue(path, interval_ms=60_000)
+    writer.submit("CREATE TABLE item (name TEXT)")
+    writer.submit("INSERT INTO item VALUES ('a')")
+    assert registered == [writer.close]
+
+    writer.close()
+
+    assert registered == []
+    assert not writer.thread.is_alive()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT name FROM item").fetchall() == [("a",)]
+    conn.close()
@@ -0,0 +1,77 @@
+"""Compare the list-building car/customer loaders with the streaming ones.
+
+Usage: python benchmarks/bench_loaders.py --rows 100000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1].joinpath("src")))
+
+from pcpp1_car_rental import car, customer  # noqa: E402
+from synthetic import write_files  # noqa: E402
+
+
+def measure(function) -> tuple[float, float]:
+    """Return (seconds, peak MiB) of ``function``.
+
+    Memory is traced in a second run, tracemalloc would skew the timing.
+    """
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def consume(iterator) -> None:
+    for _ in iterator:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        directory = Path(temp)
+        write_files(directory, args.rows)
+        car.CAR_DATA_CSV_PATH = str(directory.joinpath("car.csv"))
+        car.CAR_DATA_PATH = str(directory.joinpath("car.json"))
+        customer.CUSTOMER_DATA_CSV_PATH = str(directory.joinpath("customer.csv"))
+        customer.CUSTOMER_DATA_PATH = str(directory.joinpath("customer.json"))
+        car_data = car.CarData()
+        customer_data = customer.CustomerData()
+
+        cases = [
+            ("car csv list", car_data.load_car_data_csv),
+            ("car csv stream", lambda: consume(car_data.iter_car_data_csv())),
+            ("car json list", car_data.load_car_data_json),
+            ("car json stream", lambda: consume(car_data.iter_car_data_json())),
+            ("customer csv list", customer_data.load_customer_data_csv),
+            (
+                "customer csv stream",
+                lambda: consume(customer_data.iter_customer_data_csv()),
+            ),
+            ("customer json list", customer_data.load_customer_data_json),
+            (
+                "customer json stream",
+                lambda: consume(customer_data.iter_customer_data_json()),
+            ),
+        ]
+        print(f"{'loader':<22}{'seconds':>10}{'peak MiB':>12}   ({args.rows} rows)")
+        for name, function in cases:
+            elapsed, peak = measure(function)
+            print(f"{name:<22}{elapsed:>10.3f}{peak:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Time a log call on the caller side: direct handlers against the queue pipeline.
+
+Usage: python benchmarks/bench_logging.py [--calls N]
+"""
+
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1].joinpath("src")))
+
+from pcpp1_car_rental import logger as log  # noqa: E402
+
+MESSAGE = "\x1b[38;5;1mcar %s returned late\x1b[0m"
+
+
+def make_handlers(folder: str, file_handler, stream) -> list[logging.Handler]:
+    """Build the stdout / all / error handlers of ``logger.py`` on ``folder``."""
+    stream_format = logging.Formatter(fmt=log.LOG_FORMAT_2, datefmt=log.DATE_FORMAT)
+    stdout_handler = logging.StreamHandler(stream)
+    stdout_handler.setFormatter(stream_format)
+    file_all = file_handler(Path(folder).joinpath("all.log"))
+    file_all.setFormatter(log.file_handler_format)
+    file_error = file_handler(Path(folder).joinpath("error.log"))
+    file_error.setLevel(logging.WARNING)
+    file_error.setFormatter(log.file_handler_format)
+    return [stdout_handler, file_all, file_error]
+
+
+def measure(logger: logging.Logger, calls: int) -> list[float]:
+    """Return the microseconds spent in each ``logger.warning`` call."""
+    latencies = []
+    for index in range(calls):
+        start = time.perf_counter()
+        logger.warning(MESSAGE, index)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return latencies
+
+
+def report(name: str, latencies: list[float], total: float) -> None:
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"{name:<10}{statistics.median(latencies):>10.1f}{p99:>10.1f}"
+        f"{latencies[-1]:>11.1f}{total:>11.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print("pipeline    p50 us    p99 us     max us   drain ms")
+    with tempfile.TemporaryDirectory() as temp, open(os.devnull, "w") as devnull:
+        direct = logging.getLogger("bench_direct")
+        direct.propagate = False
+        for handler in make_handlers(temp, logging.FileHandler, devnull):
+            direct.addHandler(handler)
+        start = time.perf_counter()
+        latencies = measure(direct, args.calls)
+        report("direct", latencies, (time.perf_counter() - start) * 1000)
+        for handler in direct.handlers:
+            handler.close()
+
+        queued = logging.getLogger("bench_queue")
+        queued.propagate = False
+        log_queue = queue.SimpleQueue()
+        queued.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = log.BatchingQueueListener(
+            log_queue,
+            *make_handlers(temp, log.BatchingFileHandler, devnull),
+            respect_handler_level=True,
+        )
+        listener.start()
+        start = time.perf_counter()
+        latencies = measure(queued, args.calls)
+        # Stopping waits until the listener wrote every queued record, so the
+        # last column is the time until everything is on disk.
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        report("queue", latencies, (time.perf_counter() - start) * 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Time staff logins: PBKDF2 cost per work factor and lookup cost per staff count.
+
+Usage: python benchmarks/bench_staff.py
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1].joinpath("src")))
+
+from pcpp1_car_rental import staff  # noqa: E402
+
+REPEAT = 5
+
+
+def timed(function) -> float:
+    """Return the mean milliseconds of ``REPEAT`` calls of ``function``."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main() -> None:
+    print("work factor   verify ms")
+    for iterations in (10_000, 100_000, 200_000, 600_000):
+        stored = staff.hash_password("secret", iterations=iterations)
+        elapsed = timed(lambda: staff.verify_password("secret", stored))
+        print(f"{iterations:>11}{elapsed:>12.2f}")
+
+    # A low work factor keeps the file quick to build; it only shifts every
+    # row by the same constant, the lookup itself is what is measured.
+    print("\nstaff count   is_staff ms   (1000 iterations per hash)")
+    with tempfile.TemporaryDirectory() as temp:
+        staff.STAFF_DATA_PATH = str(Path(temp).joinpath("staff.json"))
+        for count in (10, 1_000, 100_000):
+            stored = staff.hash_password("secret", iterations=1000)
+            data = [
+                {"name": f"user{index}", "password": stored} for index in range(count)
+            ]
+            with open(staff.STAFF_DATA_PATH, "w") as file:
+                json.dump({"data": data}, file)
+            staff_data = staff.StaffData()
+            staff_data.refresh()
+            elapsed = timed(lambda: staff_data.is_staff(f"user{count - 1}", "secret"))
+            print(f"{count:>11}{elapsed:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
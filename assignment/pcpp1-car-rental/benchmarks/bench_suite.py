@@ -0,0 +1,297 @@
+"""Time the data layer and the car filter path on synthetic data of several sizes.
+
+Every case runs against freshly generated files in a temporary directory, the
+results are written as JSON so two versions can be compared.
+
+Usage:
+    python benchmarks/bench_suite.py --sizes 1000 100000 --output new.json
+    python benchmarks/bench_suite.py --compare old.json new.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parents[1].joinpath("src")))
+
+from pcpp1_car_rental import (  # noqa: E402
+    __about__,
+    booking,
+    car,
+    customer,
+    database,
+    history,
+    staff,
+)
+from pcpp1_car_rental.main import RentalCarApp  # noqa: E402
+from pcpp1_car_rental.service import RentalService  # noqa: E402
+from pcpp1_car_rental.singleton import reset  # noqa: E402
+from synthetic import STAFF_PASSWORD, write_files  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# Writes append to the journal with an fsync each, a few are enough.
+WRITES = 50
+REPEAT = 5
+FILTER_FIELDS = ["brand", "model", "engine_type", "seat_capacity", "status"]
+FILTER_CRITERIA = {"brand": "byd", "seat_capacity": 4}
+
+
+def timed(function, repeat: int = 1) -> float:
+    """Return the mean seconds of ``repeat`` calls of ``function``."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def use_directory(directory: Path) -> None:
+    """Point every data path at ``directory`` and drop the loaded data."""
+    car.CAR_DATA_PATH = str(directory.joinpath("car.json"))
+    car.CAR_DATA_CSV_PATH = str(directory.joinpath("car.csv"))
+    customer.CUSTOMER_DATA_PATH = str(directory.joinpath("customer.json"))
+    customer.CUSTOMER_DATA_CSV_PATH = str(directory.joinpath("customer.csv"))
+    staff.STAFF_DATA_PATH = str(directory.joinpath("staff.json"))
+    staff.STAFF_DATA_CSV_PATH = str(directory.joinpath("staff.csv"))
+    booking.BOOKING_DATA_PATH = str(directory.joinpath("booking.json"))
+    history.RENTAL_EVENTS_PATH = str(directory.joinpath("rental_events.jsonl"))
+    history.RENTAL_STATS_PATH = str(directory.joinpath("rental_stats.json"))
+    fresh_instances()
+    # Every format starts from an empty database.
+    database.DB_FILE = str(directory.joinpath("car_rental.db"))
+    for suffix in ("", "-wal", "-shm"):
+        Path(database.DB_FILE + suffix).unlink(missing_ok=True)
+
+
+def fresh_instances() -> None:
+    """Forget the singletons so the next call loads from disk again."""
+    database.Database().close()
+    reset(
+        car.CarData,
+        customer.CustomerData,
+        booking.BookingData,
+        staff.StaffData,
+        history.RentalHistory,
+        database.Database,
+    )
+
+
+def json_cases(rows: int) -> list[tuple[str, float, int]]:
+    """(case, seconds per operation, operations) with the JSON backend."""
+    results = []
+
+    def add(name: str, function, repeat: int = 1) -> None:
+        results.append((name, timed(function, repeat), repeat))
+
+    # Cold load: the journal is parsed and the indexes are built.
+    add("load_car_data", lambda: car.CarData().load_car_data())
+    add("load_car_data (warm)", lambda: car.CarData().load_car_data(), REPEAT)
+
+    cars = iter(range(1, rows, 4))
+
+    def update_car():
+        index = next(cars)
+        car.CarData().update_car_data(
+            {
+                "ID": f"CAR{index:07d}",
+                "start_date": "01/01/2025",
+                "end_date": "05/01/2025",
+            }
+        )
+
+    add("update_car_data", update_car, min(WRITES, rows // 4))
+
+    customers = iter(range(rows))
+
+    def update_customer():
+        # Alternate between an existing customer and a new one.
+        index = next(customers)
+        contact = f"01{index:08d}" if index % 2 else f"02{index:08d}"
+        customer.CustomerData().update_customer_data(
+            {
+                "full_name": f"Customer {index}",
+                "contact": contact,
+                "address": f"{index} Jalan Example",
+                "email": f"customer{index}@example.com",
+                "car": "CAR0000001",
+                "start_date": "01/01/2025",
+                "end_date": "05/01/2025",
+            }
+        )
+
+    customer.CustomerData().customer_count()
+    add("update_customer_data", update_customer, min(WRITES, rows))
+
+    # is_staff verifies a PBKDF2 hash of synthetic.STAFF_HASH_ITERATIONS.
+    staff.StaffData().refresh()
+    add(
+        "is_staff",
+        lambda: staff.StaffData().is_staff(f"user{rows - 1}", STAFF_PASSWORD),
+        REPEAT,
+    )
+
+    # The filter path of the car selection tab, minus the Tk widgets.
+    app = SimpleNamespace(backend=RentalService())
+    add(
+        "count_car_facets",
+        lambda: RentalCarApp.count_car_facets(app, FILTER_CRITERIA, FILTER_FIELDS),
+        REPEAT,
+    )
+    add(
+        "find_available_car_ids",
+        lambda: RentalCarApp.find_available_car_ids(
+            app, FILTER_CRITERIA, "20/12/2024", "27/12/2024"
+        ),
+        REPEAT,
+    )
+
+    # First sync inserts every row, the second one only compares hashes.
+    db = database.Database()
+    add("populate_table cars", lambda: db.populate_table("cars"))
+    add("populate_table cars (unchanged)", lambda: db.populate_table("cars"))
+    add("populate_table customer", lambda: db.populate_table("customer"))
+    return results
+
+
+def csv_cases(rows: int) -> list[tuple[str, float, int]]:
+    """(case, seconds per operation, operations) of the CSV readers."""
+    customers = customer.CustomerData()
+    return [
+        ("load_car_data", timed(car.CarData().load_car_data_csv), 1),
+        ("load_customer_data", timed(customers.load_customer_data_csv), 1),
+        ("load_staff_data", timed(staff.StaffData().load_staff_data_csv), 1),
+        ("import_data", timed(lambda: database.Database().import_data("csv")), 1),
+    ]
+
+
+def tree_cases(rows: int) -> list[tuple[str, float, int]]:
+    """First paint of the car monitoring tree, when a display is available."""
+    import tkinter as tk
+
+    from pcpp1_car_rental.widgets import VirtualTreeview
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return []
+    root.withdraw()
+    try:
+        columns = list(car.CAR_KEYS)
+        tree = VirtualTreeview(root, columns=columns, show="headings")
+        tree.pack()
+        service = RentalService()
+
+        def fetch(offset, limit):
+            return [
+                tuple(info[column] for column in columns)
+                for info in service.car_page(offset, limit)
+            ]
+
+        def paint():
+            tree.set_source(service.car_count(), fetch)
+            root.update()
+
+        return [("car tree first paint", timed(paint, REPEAT), REPEAT)]
+    finally:
+        root.destroy()
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: list[int], formats: list[str]) -> dict:
+    results = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as temp:
+            directory = Path(temp)
+            start = time.perf_counter()
+            write_files(directory, rows, tuple(formats))
+            print(f"{rows} rows generated in {time.perf_counter() - start:.1f} s")
+            for data_format in formats:
+                use_directory(directory)
+                cases = json_cases(rows) if data_format == "json" else csv_cases(rows)
+                if data_format == "json":
+                    cases += tree_cases(rows)
+                for name, seconds, operations in cases:
+                    print(f"  {data_format:<5}{name:<34}{seconds * 1000:>12.3f} ms")
+                    results.append(
+                        {
+                            "case": name,
+                            "format": data_format,
+                            "rows": rows,
+                            "operations": operations,
+                            "ms_per_operation": round(seconds * 1000, 4),
+                        }
+                    )
+            fresh_instances()
+    return {
+        "version": __about__.__version__,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """Print the ratio new / old of every case found in both files."""
+    with open(old_path, "r") as file:
+        old = json.load(file)
+    with open(new_path, "r") as file:
+        new = json.load(file)
+    baseline = {
+        (item["case"], item["format"], item["rows"]): item["ms_per_operation"]
+        for item in old["results"]
+    }
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    print(f"{'case':<40}{'rows':>9}{'old ms':>12}{'new ms':>12}{'ratio':>8}")
+    for item in new["results"]:
+        key = (item["case"], item["format"], item["rows"])
+        if key not in baseline:
+            continue
+        before, after = baseline[key], item["ms_per_operation"]
+        ratio = after / before if before else float("inf")
+        name = f"{item['format']} {item['case']}"
+        print(f"{name:<40}{item['rows']:>9}{before:>12.3f}{after:>12.3f}{ratio:>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--formats", nargs="+", choices=["csv", "json"], default=["csv", "json"]
+    )
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    report = run(args.sizes, args.formats)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=4)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
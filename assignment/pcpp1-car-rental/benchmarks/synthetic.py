@@ -0,0 +1,96 @@
+"""Synthetic data/*.csv and data/*.json files of any size for the benchmarks.
+
+Every fourth car is rented by the customer with the same index, who also has
+the matching booking, so the generated files are consistent with each other.
+"""
+
+import csv
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1].joinpath("src")))
+
+from pcpp1_car_rental import car, customer, staff  # noqa: E402
+
+CAR_HEADER = list(car.CAR_KEYS)
+CUSTOMER_HEADER = list(customer.CUSTOMER_KEYS)
+STAFF_HEADER = ["name", "password"]
+BOOKING_HEADER = ["id", "car", "contact", "start_date", "end_date"]
+STAFF_PASSWORD = "secret"
+# A low work factor keeps big staff files quick to build, every row shares
+# the hash so only the lookup scales with the row count.
+STAFF_HASH_ITERATIONS = 1000
+
+
+def car_row(index: int) -> list:
+    rented = index % 4 == 0
+    return [
+        f"CAR{index:07d}",
+        ("proton", "byd", "toyota")[index % 3],
+        f"model{index % 50}",
+        ("gasoline", "ev", "hybrid")[index % 3],
+        (2, 4, 5, 7)[index % 4],
+        "rented" if rented else "available",
+        f"{index % 28 + 1:02d}/12/2024" if rented else "",
+        "28/12/2024" if rented else "",
+    ]
+
+
+def customer_row(index: int) -> list:
+    renting = index % 4 == 0
+    return [
+        f"Customer {index}",
+        f"01{index:08d}",
+        f"{index} Jalan Example",
+        f"customer{index}@example.com",
+        f"CAR{index:07d}" if renting else "",
+        f"{index % 28 + 1:02d}/12/2024" if renting else "",
+        "28/12/2024" if renting else "",
+    ]
+
+
+def staff_rows(rows: int):
+    stored = staff.hash_password(STAFF_PASSWORD, iterations=STAFF_HASH_ITERATIONS)
+    return ([f"user{index}", stored] for index in range(rows))
+
+
+def booking_rows(rows: int):
+    for index in range(0, rows, 4):
+        yield [
+            str(index // 4 + 1),
+            f"CAR{index:07d}",
+            f"01{index:08d}",
+            f"{index % 28 + 1:02d}/12/2024",
+            "28/12/2024",
+        ]
+
+
+def write_csv(path: Path, header: list[str], rows) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_json(path: Path, header: list[str], rows) -> None:
+    with open(path, "w") as file:
+        json.dump({"data": [dict(zip(header, row)) for row in rows]}, file)
+
+
+def write_files(
+    directory: Path, rows: int, formats: tuple[str, ...] = ("csv", "json")
+) -> None:
+    """Write car, customer and staff files of ``rows`` rows, plus booking.json."""
+    tables = (
+        ("car", CAR_HEADER, lambda: map(car_row, range(rows))),
+        ("customer", CUSTOMER_HEADER, lambda: map(customer_row, range(rows))),
+        ("staff", STAFF_HEADER, lambda: staff_rows(rows)),
+    )
+    for name, header, make_rows in tables:
+        if "csv" in formats:
+            write_csv(directory.joinpath(f"{name}.csv"), header, make_rows())
+        if "json" in formats:
+            write_json(directory.joinpath(f"{name}.json"), header, make_rows())
+    # The app keeps bookings in JSON only.
+    write_json(directory.joinpath("booking.json"), BOOKING_HEADER, booking_rows(rows))
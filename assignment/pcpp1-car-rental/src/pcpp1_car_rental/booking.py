@@ -0,0 +1,315 @@
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+from .config import STORAGE_BACKEND
+from .database import DATE_FORMAT, Database
+from .journal import Journal
+from .logger import logger
+from .records import day_ordinal, format_record_date
+from .singleton import Singleton
+
+BOOKING_DATA_PATH = str(Path(__file__).parents[2].joinpath("data", "booking.json"))
+
+
+class BookingConflictError(Exception):
+    pass
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+@lru_cache(maxsize=None)
+def year_start(year: int) -> int:
+    return date(year, 1, 1).toordinal()
+
+
+def year_spans(first: int, last: int) -> Iterator[tuple[int, int]]:
+    """Split the day ordinals ``first..last`` into (year, bit mask) pieces."""
+    year = date.fromordinal(first).year
+    while first <= last:
+        end = min(last, year_start(year + 1) - 1)
+        offset = first - year_start(year)
+        yield year, ((1 << (end - first + 1)) - 1) << offset
+        first = end + 1
+        year += 1
+
+
+class Occupancy:
+    """Booked days of one car, one int bitset per year.
+
+    Bit ``n`` of a year is set when the car is booked on day ``n`` of that
+    year, counted from 0. A range check or insert is one AND / OR per year
+    it touches, whatever the number of bookings.
+    """
+
+    def __init__(self):
+        self.years: dict[int, int] = {}
+
+    def is_free(self, first: int, last: int) -> bool:
+        return all(
+            not self.years.get(year, 0) & mask for year, mask in year_spans(first, last)
+        )
+
+    def add(self, first: int, last: int) -> None:
+        if not self.is_free(first, last):
+            raise BookingConflictError(
+                f"{date.fromordinal(first)} - {date.fromordinal(last)} is taken."
+            )
+        for year, mask in year_spans(first, last):
+            self.years[year] = self.years.get(year, 0) | mask
+
+    def remove(self, first: int, last: int) -> None:
+        """Free the days ``first..last`` again, bookings never overlap."""
+        for year, mask in year_spans(first, last):
+            self.years[year] = self.years.get(year, 0) & ~mask
+
+    def booked_days(self, first: int, last: int) -> list[int]:
+        """Day ordinals between ``first`` and ``last`` on which the car is booked."""
+        days = []
+        for year, mask in year_spans(first, last):
+            bits = self.years.get(year, 0) & mask
+            base = year_start(year)
+            while bits:
+                low = bits & -bits
+                days.append(base + low.bit_length() - 1)
+                bits ^= low
+        return days
+
+
+class StartIndex:
+    """Every active booking as (first day, last day, car, id), by first day.
+
+    A booking overlapping ``first..last`` starts at most ``longest`` days
+    before ``first``, so the booked cars of a range are one bisect plus the
+    bookings that start in that window: O(log n + k), whatever the number of
+    cars. ``longest`` only grows, a return does not shrink it.
+    """
+
+    def __init__(self):
+        self.entries: list[tuple[int, int, str, str]] = []
+        self.longest = 0
+
+    def add(self, first: int, last: int, car: str, booking_id: str) -> None:
+        insort(self.entries, (first, last, car, booking_id))
+        self.longest = max(self.longest, last - first)
+
+    def remove(self, first: int, last: int, car: str, booking_id: str) -> None:
+        entry = (first, last, car, booking_id)
+        index = bisect_left(self.entries, entry)
+        if index < len(self.entries) and self.entries[index] == entry:
+            del self.entries[index]
+
+    def booked_cars(self, first: int, last: int) -> set[str]:
+        """Cars with a booking touching ``first..last``."""
+        entries = self.entries
+        booked = set()
+        index = bisect_left(entries, (first - self.longest,))
+        while index < len(entries) and entries[index][0] <= last:
+            _, end, car, _ = entries[index]
+            if end >= first:
+                booked.add(car)
+            index += 1
+        return booked
+
+
+def is_active(info: dict) -> bool:
+    # Only returned bookings carry a status in booking.json.
+    return info.get("status", "active") == "active"
+
+
+class BookingData(metaclass=Singleton):
+    def __init__(self):
+        self._bookings: dict[str, dict] = {}
+        # car -> its active bookings, by booking id
+        self._car_bookings: dict[str, dict[str, dict]] = {}
+        self._occupancy: dict[str, Occupancy] = {}
+        self._starts = StartIndex()
+        # (booking id, reason) of the stored bookings refresh left out
+        self.rejected: list[tuple[str, str]] = []
+        self._next_id = 1
+        self._journal = Journal(BOOKING_DATA_PATH, key="id")
+        self._database = Database() if STORAGE_BACKEND == "sqlite" else None
+
+    def load_booking_data(self) -> list[dict]:
+        if self._database is not None:
+            return self._database.load_bookings()
+        self.refresh()
+        return [dict(info) for info in self._bookings.values()]
+
+    def refresh(self) -> None:
+        with self._journal.lock:
+            if not self._journal.is_stale():
+                return
+            # Built aside and swapped in whole, so a reader never sees half
+            # an index. A booking that cannot be indexed is reported and kept
+            # out of the occupancy instead of stopping the load; it stays in
+            # _bookings so that a compaction does not drop it from the file.
+            bookings, car_bookings, occupancy = {}, {}, {}
+            starts = StartIndex()
+            rejected = []
+            for info in self._journal.load():
+                bookings[info["id"]] = info
+                if not is_active(info):
+                    continue
+                try:
+                    self._index(info, car_bookings, occupancy, starts)
+                except (BookingConflictError, KeyError, ValueError) as error:
+                    rejected.append((info["id"], str(error)))
+                    logger.warning(f"Booking {info['id']} not indexed: {error}")
+            self._bookings, self._car_bookings = bookings, car_bookings
+            self._occupancy, self.rejected = occupancy, rejected
+            self._starts = starts
+            self._next_id = 1 + max(
+                (int(key) for key in map(str, bookings) if key.isdigit()),
+                default=0,
+            )
+
+    def is_available(self, car_id: str, start_date: str, end_date: str) -> bool:
+        start, end = self._parse_range(start_date, end_date)
+        if self._database is not None:
+            return not self._database.has_booking_conflict(
+                car_id, start.isoformat(), end.isoformat()
+            )
+        self.refresh()
+        occupancy = self._occupancy.get(car_id)
+        return occupancy is None or occupancy.is_free(
+            start.toordinal(), end.toordinal()
+        )
+
+    def is_free_on(self, car_id: str, day: str) -> bool:
+        return self.is_available(car_id, day, day)
+
+    def booked_days(self, car_id: str, start_date: str, end_date: str) -> list[str]:
+        """The dd/mm/yyyy days in the range on which ``car_id`` is booked."""
+        start, end = self._parse_range(start_date, end_date)
+        if self._database is not None:
+            days = []
+            for first, last in self._database.find_car_bookings(
+                car_id, start.isoformat(), end.isoformat()
+            ):
+                low = max(date.fromisoformat(first), start).toordinal()
+                high = min(date.fromisoformat(last), end).toordinal()
+                days.extend(range(low, high + 1))
+        else:
+            self.refresh()
+            occupancy = self._occupancy.get(car_id)
+            if occupancy is None:
+                return []
+            days = occupancy.booked_days(start.toordinal(), end.toordinal())
+        return [format_record_date(date.fromordinal(day)) for day in sorted(days)]
+
+    def available_car_ids(
+        self, car_ids: list[str], start_date: str, end_date: str
+    ) -> list[str]:
+        """Keep the cars in ``car_ids`` that have no booking touching the range."""
+        start, end = self._parse_range(start_date, end_date)
+        if self._database is not None:
+            booked = set(
+                self._database.find_booked_car_ids(start.isoformat(), end.isoformat())
+            )
+            return [car_id for car_id in car_ids if car_id not in booked]
+        self.refresh()
+        booked = self._starts.booked_cars(start.toordinal(), end.toordinal())
+        return [car_id for car_id in car_ids if car_id not in booked]
+
+    def add_booking(
+        self, car_id: str, contact: str, start_date: str, end_date: str
+    ) -> dict:
+        """Reserve ``car_id`` for the range, raising BookingConflictError on overlap."""
+        start, end = self._parse_range(start_date, end_date)
+        if self._database is not None:
+            info = self._database.add_booking(
+                car_id, contact, start.isoformat(), end.isoformat()
+            )
+            if info is None:
+                raise BookingConflictError(f"{car_id} is already booked.")
+            return info
+        self.refresh()
+        with self._journal.lock:
+            info = {
+                "id": str(self._next_id),
+                "car": car_id,
+                "contact": contact,
+                "start_date": start_date,
+                "end_date": end_date,
+            }
+            # Index first so that a conflict never reaches the journal.
+            self._index(info, self._car_bookings, self._occupancy, self._starts)
+            self._journal.append(info["id"], info)
+            self._bookings[info["id"]] = info
+            self._next_id += 1
+        if self._journal.needs_compaction():
+            self._journal.compact_in_background(self._bookings.values)
+        return dict(info)
+
+    def has_bookings_from(self, car_id: str, day: str) -> bool:
+        """Whether ``car_id`` has an active booking ending on ``day`` or later."""
+        first = parse_date(day)
+        if self._database is not None:
+            return self._database.has_booking_conflict(
+                car_id, first.isoformat(), date.max.isoformat()
+            )
+        self.refresh()
+        return any(
+            day_ordinal(info["end_date"]) >= first.toordinal()
+            for info in self._car_bookings.get(car_id, {}).values()
+        )
+
+    def return_car(self, car_id: str, day: str) -> dict | None:
+        """Close the booking ``car_id`` is out on at ``day`` and free its days.
+
+        That is the active booking of the car which started last by ``day``.
+        It is marked returned with ``returned_date``; None when there is none.
+        """
+        returned = parse_date(day)
+        if self._database is not None:
+            return self._database.return_booking(car_id, returned.isoformat())
+        self.refresh()
+        with self._journal.lock:
+            started = [
+                info
+                for info in self._car_bookings.get(car_id, {}).values()
+                if day_ordinal(info["start_date"]) <= returned.toordinal()
+            ]
+            if not started:
+                return None
+            info = max(started, key=lambda info: day_ordinal(info["start_date"]))
+            fields = {"status": "returned", "returned_date": day}
+            self._journal.append(info["id"], fields)
+            info.update(fields)
+            del self._car_bookings[car_id][info["id"]]
+            first = day_ordinal(info["start_date"])
+            last = day_ordinal(info["end_date"])
+            self._occupancy[car_id].remove(first, last)
+            self._starts.remove(first, last, car_id, info["id"])
+        if self._journal.needs_compaction():
+            self._journal.compact_in_background(self._bookings.values)
+        return dict(info)
+
+    @staticmethod
+    def _index(
+        info: dict,
+        car_bookings: dict[str, dict[str, dict]],
+        occupancy: dict[str, Occupancy],
+        starts: StartIndex,
+    ) -> None:
+        # Stored dates become day ordinals once, when they are loaded.
+        first, last = day_ordinal(info["start_date"]), day_ordinal(info["end_date"])
+        if last < first:
+            raise ValueError(f"Booking {info['id']} ends before it starts.")
+        # Raises on a conflict before the booking reaches the start index.
+        occupancy.setdefault(info["car"], Occupancy()).add(first, last)
+        starts.add(first, last, info["car"], info["id"])
+        car_bookings.setdefault(info["car"], {})[info["id"]] = info
+
+    @staticmethod
+    def _parse_range(start_date: str, end_date: str) -> tuple[date, date]:
+        start = parse_date(start_date)
+        end = parse_date(end_date)
+        if end < start:
+            raise ValueError(f"End date {end_date} is before start date {start_date}.")
+        return start, end
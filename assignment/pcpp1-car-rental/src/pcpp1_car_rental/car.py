@@ -1,22 +1,55 @@
 import csv
 import json
+from dataclasses import dataclass
+from datetime import date
 from pathlib import Path
+from typing import Iterator
 
+from .config import STORAGE_BACKEND
+from .database import CAR_KEYS, Database
+from .journal import Journal
+from .records import iter_csv_rows, iter_json_records, parse_record_date
 from .singleton import Singleton
 
-# CAR_DATA_PATH = str(Path(__file__).parents[2].joinpath("data", "car.csv"))
+CAR_DATA_CSV_PATH = str(Path(__file__).parents[2].joinpath("data", "car.csv"))
 CAR_DATA_PATH = str(Path(__file__).parents[2].joinpath("data", "car.json"))
+CAR_INDEX_FIELDS = ("brand", "model", "engine_type", "seat_capacity", "status")
+
+
+@dataclass(slots=True)
+class Car:
+    ID: str
+    brand: str
+    model: str
+    engine_type: str
+    seat_capacity: int
+    status: str
+    start_date: date | None
+    end_date: date | None
 
 
 class CarData(metaclass=Singleton):
-    def __init__(self):
-        pass
+    def __init__(self, directory: str | None = None):
+        # CarData(directory) is a separate instance reading that directory's
+        # car.json / car.csv instead of data/.
+        if directory is None:
+            self.path, self.csv_path = CAR_DATA_PATH, CAR_DATA_CSV_PATH
+        else:
+            self.path = str(Path(directory).joinpath("car.json"))
+            self.csv_path = str(Path(directory).joinpath("car.csv"))
+        # In-memory fleet, keyed by car ID, plus value -> IDs lookup per field.
+        self._cars: dict[str, dict] = {}
+        self._indexes: dict[str, dict[object, set[str]]] = {}
+        self._positions: dict[str, int] = {}
+        self._order: list[str] = []
+        self._journal = Journal(self.path, key="ID")
+        # With the sqlite backend every query below is answered by the database.
+        self._database = Database() if STORAGE_BACKEND == "sqlite" else None
 
     def load_car_data_csv(self) -> list[dict]:
-        CAR_DATA_PATH = str(Path(__file__).parents[2].joinpath("data", "car.csv"))
         data = []
         header = []
-        with open(CAR_DATA_PATH, "r") as file:
+        with open(self.csv_path, "r") as file:
             reader = csv.reader(file)
             for index, row in enumerate(reader):
                 if index == 0:
@@ -26,26 +59,202 @@ class CarData(metaclass=Singleton):
         return data
 
     def load_car_data_json(self) -> list[dict]:
-        CAR_DATA_PATH = str(Path(__file__).parents[2].joinpath("data", "car.json"))
         data = []
-        with open(CAR_DATA_PATH, "r") as file:
+        with open(self.path, "r") as file:
             read = json.load(file)
             data = read["data"]
         return data
 
+    def iter_car_data_csv(self, path: str | None = None) -> Iterator[Car]:
+        """Stream car.csv as typed Car records without holding the file in memory."""
+        for (
+            car_id,
+            brand,
+            model,
+            engine_type,
+            seat_capacity,
+            status,
+            start_date,
+            end_date,
+        ) in iter_csv_rows(path or self.csv_path, CAR_KEYS):
+            yield Car(
+                car_id,
+                brand,
+                model,
+                engine_type,
+                int(seat_capacity),
+                status,
+                parse_record_date(start_date),
+                parse_record_date(end_date),
+            )
+
+    def iter_car_data_json(self, path: str | None = None) -> Iterator[Car]:
+        for info in iter_json_records(path or self.path):
+            yield Car(
+                info["ID"],
+                info["brand"],
+                info["model"],
+                info["engine_type"],
+                int(info["seat_capacity"]),
+                info["status"],
+                parse_record_date(info["start_date"]),
+                parse_record_date(info["end_date"]),
+            )
+
     def load_car_data(self) -> list[dict]:
-        return self.load_car_data_json()
+        if self._database is not None:
+            return self._database.load_cars()
+        self.refresh()
+        return [dict(info) for info in self._cars.values()]
+
+    def refresh(self) -> None:
+        """Reload the fleet only when car.json or its journal changed on disk."""
+        # Locked so a warm-up thread and the first caller load it only once.
+        with self._journal.lock:
+            if not self._journal.is_stale():
+                return
+            self._build_indexes(self._journal.load())
+
+    def get_car(self, car_id: str) -> dict | None:
+        if self._database is not None:
+            return self._database.get_car(car_id)
+        self.refresh()
+        info = self._cars.get(car_id)
+        return dict(info) if info is not None else None
+
+    def car_count(self) -> int:
+        if self._database is not None:
+            return self._database.car_count()
+        self.refresh()
+        return len(self._order)
+
+    def load_car_page(self, offset: int, limit: int) -> list[dict]:
+        """Return at most ``limit`` cars starting at row ``offset`` of car.json."""
+        if self._database is not None:
+            return self._database.load_car_page(offset, limit)
+        self.refresh()
+        return [
+            dict(self._cars[car_id]) for car_id in self._order[offset : offset + limit]
+        ]
+
+    def get_header(self) -> list[str]:
+        if self._database is not None:
+            return list(CAR_KEYS)
+        self.refresh()
+        for info in self._cars.values():
+            return list(info.keys())
+        return []
+
+    def find_car_ids(self, **criteria) -> list[str]:
+        """Return IDs of cars matching every ``field=value`` pair in ``criteria``.
+
+        Only fields listed in ``CAR_INDEX_FIELDS`` can be used as criteria.
+        """
+        if self._database is not None:
+            return self._database.find_car_ids(**criteria)
+        self.refresh()
+        if not criteria:
+            return list(self._order)
+        # Keep the order of car.json so the tree views stay stable.
+        return sorted(self._match_ids(criteria), key=self._positions.__getitem__)
+
+    def find_cars(self, **criteria) -> list[dict]:
+        if self._database is not None:
+            return self._database.find_cars(**criteria)
+        return [dict(self._cars[car_id]) for car_id in self.find_car_ids(**criteria)]
+
+    def facet_counts(self, field: str, **criteria) -> dict:
+        """Count cars per value of ``field`` among the cars matching ``criteria``."""
+        if self._database is not None:
+            return self._database.car_facet_counts(field, **criteria)
+        self.refresh()
+        if field not in self._indexes:
+            raise KeyError(f"{field} is not an indexed car field.")
+        values = self._indexes[field]
+        if not criteria:
+            return {value: len(ids) for value, ids in values.items() if ids}
+        selected = self._match_ids(criteria)
+        counts = {}
+        for value, ids in values.items():
+            # Set intersection walks the smaller of the two sets.
+            count = len(ids & selected)
+            if count:
+                counts[value] = count
+        return counts
+
+    def get_column_values(self, field: str) -> list:
+        if self._database is not None:
+            return self._database.get_car_column_values(field)
+        self.refresh()
+        return [value for value, ids in self._indexes[field].items() if ids]
 
     def update_car_data(self, data) -> None:
-        current_data = self.load_car_data_json()
-        for info in current_data:
-            if info["ID"] == data["ID"]:
-                info["start_date"] = data["start_date"]
-                info["end_date"] = data["end_date"]
-                info["status"] = "rented"
-                break
-        with open(CAR_DATA_PATH, "w") as file:
-            json.dump({"data": current_data}, file, indent=4)
+        if self._database is not None:
+            # The booking itself is stored by BookingData.
+            self._database.set_car_status(data["ID"], "rented")
+            return
+        self._set_fields(
+            data["ID"],
+            {
+                "start_date": data["start_date"],
+                "end_date": data["end_date"],
+                "status": "rented",
+            },
+        )
+
+    def return_car(self, car_id: str) -> None:
+        if self._database is not None:
+            self._database.set_car_status(car_id, "available")
+            return
+        self._set_fields(
+            car_id, {"start_date": "", "end_date": "", "status": "available"}
+        )
+
+    def _set_fields(self, car_id: str, fields: dict) -> None:
+        self.refresh()
+        with self._journal.lock:
+            info = self._cars.get(car_id)
+            if info is None:
+                return
+            self._journal.append(car_id, fields)
+            self._unindex(info)
+            info.update(fields)
+            self._index(info)
+        if self._journal.needs_compaction():
+            self._journal.compact_in_background(self._cars.values)
+
+    def _match_ids(self, criteria: dict) -> set[str]:
+        matches = []
+        for field, value in criteria.items():
+            if field not in self._indexes:
+                raise KeyError(f"{field} is not an indexed car field.")
+            matches.append(self._indexes[field].get(value, set()))
+        # Start from the smallest set so the work is bounded by the result size.
+        matches.sort(key=len)
+        result = set(matches[0])
+        for ids in matches[1:]:
+            result.intersection_update(ids)
+        return result
+
+    def _build_indexes(self, data: list[dict]) -> None:
+        self._cars = {}
+        self._indexes = {field: {} for field in CAR_INDEX_FIELDS}
+        self._positions = {}
+        self._order = []
+        for position, info in enumerate(data):
+            self._cars[info["ID"]] = info
+            self._positions[info["ID"]] = position
+            self._order.append(info["ID"])
+            self._index(info)
+
+    def _index(self, info: dict) -> None:
+        for field in CAR_INDEX_FIELDS:
+            self._indexes[field].setdefault(info[field], set()).add(info["ID"])
+
+    def _unindex(self, info: dict) -> None:
+        for field in CAR_INDEX_FIELDS:
+            self._indexes[field][info[field]].discard(info["ID"])
+
 
 if __name__ == "__main__":
     car_data = CarData()
@@ -0,0 +1,152 @@
+import http.client
+import json
+import threading
+from urllib.parse import quote, urlencode, urlsplit
+
+from .booking import BookingConflictError
+from .config import SERVICE_URL
+from .service import VersionConflictError
+
+
+class ServiceError(Exception):
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class RentalClient:
+    """``RentalService`` over HTTP, talking to ``service.RentalServer``.
+
+    Offers the same methods as RentalService so the app does not care which
+    one it uses. Each thread keeps one persistent connection to the service.
+    """
+
+    def __init__(self, url: str = SERVICE_URL, timeout: float = 10):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def car_count(self) -> int:
+        return self._get("/cars", offset=0, limit=0)["count"]
+
+    def car_page(self, offset: int, limit: int) -> list[dict]:
+        return self._get("/cars", offset=offset, limit=limit)["cars"]
+
+    def get_car(self, car_id: str) -> dict | None:
+        return self._get(f"/cars/{quote(car_id, safe='')}", missing_ok=True)
+
+    def get_cars(self, car_ids: list[str]) -> list[dict]:
+        if not car_ids:
+            return []
+        return self._get("/cars", ids=",".join(car_ids))["cars"]
+
+    def facet_counts(self, field: str, **criteria) -> dict:
+        counts = self._get(f"/cars/facets/{quote(field, safe='')}", **criteria)
+        return dict(counts["counts"])
+
+    def available_car_ids(
+        self, criteria: dict, start_date: str, end_date: str
+    ) -> list[str]:
+        return self._get(
+            "/cars/available", start_date=start_date, end_date=end_date, **criteria
+        )["ids"]
+
+    def booked_days(self, car_id: str, start_date: str, end_date: str) -> list[str]:
+        return self._get(
+            f"/cars/{quote(car_id, safe='')}/booked",
+            start_date=start_date,
+            end_date=end_date,
+        )["days"]
+
+    def customer_count(self) -> int:
+        return self._get("/customers", offset=0, limit=0)["count"]
+
+    def customer_page(self, offset: int, limit: int) -> list[dict]:
+        return self._get("/customers", offset=offset, limit=limit)["customers"]
+
+    def find_customer(self, contact: str) -> dict | None:
+        return self._get(f"/customers/{quote(contact, safe='')}", missing_ok=True)
+
+    def search_customers(self, prefix: str, limit: int = 10) -> list[dict]:
+        return self._get("/customers/search", prefix=prefix, limit=limit)["customers"]
+
+    def is_staff(self, username: str, password: str) -> bool:
+        return self._post("/login", {"username": username, "password": password})[
+            "staff"
+        ]
+
+    def book(
+        self,
+        customer: dict,
+        car: dict,
+        car_version: str | None = None,
+        customer_version: str | None = None,
+    ) -> dict:
+        return self._post(
+            "/bookings",
+            {
+                "customer": customer,
+                "car": car,
+                "car_version": car_version,
+                "customer_version": customer_version,
+            },
+        )
+
+    def return_car(self, car_id: str, version: str | None = None) -> dict | None:
+        return self._post(
+            f"/cars/{quote(car_id, safe='')}/return", {"version": version}
+        )
+
+    def rental_summary(self, start_date: str, end_date: str) -> dict:
+        return self._get("/stats", start_date=start_date, end_date=end_date)
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _get(self, path: str, missing_ok: bool = False, **query) -> dict | None:
+        if query:
+            path += "?" + urlencode(query)
+        try:
+            return self._request("GET", path)
+        except ServiceError as error:
+            if missing_ok and error.status == 404:
+                return None
+            raise
+
+    def _post(self, path: str, body: dict) -> dict:
+        return self._request("POST", path, json.dumps(body).encode())
+
+    def _request(self, method: str, path: str, body: bytes | None = None) -> dict:
+        headers = {"Content-Type": "application/json"}
+        for attempt in range(2):
+            connection = getattr(self._local, "connection", None)
+            if connection is None:
+                connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout
+                )
+                self._local.connection = connection
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                data = json.loads(response.read() or b"{}")
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # The service closed the kept-alive connection, retry once on
+                # a new one. A POST that may have been applied is not resent.
+                self.close()
+                if attempt or method != "GET":
+                    raise
+        if response.status < 300:
+            return data
+        if response.status == 409 and data.get("error") == "version":
+            raise VersionConflictError(data["message"], data.get("current"))
+        if response.status == 409:
+            raise BookingConflictError(data["message"])
+        if response.status == 400:
+            raise ValueError(data["message"])
+        raise ServiceError(f"{method} {path}: {data}", response.status)
@@ -0,0 +1,23 @@
+import configparser
+from pathlib import Path
+
+CONFIG_PATH = str(Path(__file__).parents[2].joinpath("config.ini"))
+
+config = configparser.ConfigParser()
+config.read(CONFIG_PATH)
+
+# "json" or "sqlite"
+STORAGE_BACKEND = config.get("storage", "backend", fallback="json")
+DB_FILE = str(
+    Path(CONFIG_PATH).parent.joinpath(
+        config.get("storage", "db_file", fallback="car_rental.db")
+    )
+)
+DB_BUSY_TIMEOUT_MS = config.getint("storage", "busy_timeout_ms", fallback=5000)
+DB_STATEMENT_CACHE_SIZE = config.getint(
+    "storage", "statement_cache_size", fallback=128
+)
+PBKDF2_ITERATIONS = config.getint("security", "pbkdf2_iterations", fallback=200_000)
+SERVICE_HOST = config.get("service", "host", fallback="127.0.0.1")
+SERVICE_PORT = config.getint("service", "port", fallback=8765)
+SERVICE_URL = config.get("service", "url", fallback="")
@@ -1,36 +1,53 @@
 import csv
 import json
+from bisect import bisect_left, insort
 from dataclasses import dataclass
+from datetime import date
 from pathlib import Path
+from typing import Iterator
 
+from .config import STORAGE_BACKEND
+from .database import CUSTOMER_KEYS, Database
+from .journal import Journal
+from .records import (
+    iter_csv_rows,
+    iter_json_records,
+    normalize_contact,
+    parse_record_date,
+)
 from .singleton import Singleton
 
-# CUSTOMER_DATA_PATH = str(Path(__file__).parents[2].joinpath("data", "customer.csv"))
+CUSTOMER_DATA_CSV_PATH = str(Path(__file__).parents[2].joinpath("data", "customer.csv"))
 CUSTOMER_DATA_PATH = str(Path(__file__).parents[2].joinpath("data", "customer.json"))
 
 
-@dataclass
+@dataclass(slots=True)
 class Customer:
     full_name: str
     contact: str
     address: str
     email: str
     car: str
-    start_date: str
-    end_date: str
+    start_date: date | None
+    end_date: date | None
 
 
 class CustomerData(metaclass=Singleton):
     def __init__(self):
-        pass
+        self._customers: dict[str, dict] = {}
+        self._order: list[str] = []
+        # normalized contact -> contact as stored, for O(1) upserts
+        self._contacts: dict[str, str] = {}
+        # sorted (lowercase name / name word / email, contact) pairs for
+        # prefix search with bisect
+        self._search_terms: list[tuple[str, str]] = []
+        self._journal = Journal(CUSTOMER_DATA_PATH, key="contact")
+        self._database = Database() if STORAGE_BACKEND == "sqlite" else None
 
     def load_customer_data_csv(self) -> list[dict]:
-        CUSTOMER_DATA_PATH = str(
-            Path(__file__).parents[2].joinpath("data", "customer.csv")
-        )
         data = []
         header = []
-        with open(CUSTOMER_DATA_PATH, "r") as file:
+        with open(CUSTOMER_DATA_CSV_PATH, "r") as file:
             reader = csv.reader(file)
             for index, row in enumerate(reader):
                 if index == 0:
@@ -40,30 +57,143 @@ class CustomerData(metaclass=Singleton):
         return data
 
     def load_customer_data_json(self) -> list[dict]:
-        CUSTOMER_DATA_PATH = str(
-            Path(__file__).parents[2].joinpath("data", "customer.json")
-        )
         data = []
         with open(CUSTOMER_DATA_PATH, "r") as file:
             read = json.load(file)
             data = read["data"]
         return data
 
+    def iter_customer_data_csv(self, path: str | None = None) -> Iterator[Customer]:
+        """Stream customer.csv as typed Customer records."""
+        for (
+            full_name,
+            contact,
+            address,
+            email,
+            car,
+            start_date,
+            end_date,
+        ) in iter_csv_rows(path or CUSTOMER_DATA_CSV_PATH, CUSTOMER_KEYS):
+            yield Customer(
+                full_name,
+                contact,
+                address,
+                email,
+                car,
+                parse_record_date(start_date),
+                parse_record_date(end_date),
+            )
+
+    def iter_customer_data_json(self, path: str | None = None) -> Iterator[Customer]:
+        for info in iter_json_records(path or CUSTOMER_DATA_PATH):
+            yield Customer(
+                info["full_name"],
+                info["contact"],
+                info["address"],
+                info["email"],
+                info["car"],
+                parse_record_date(info["start_date"]),
+                parse_record_date(info["end_date"]),
+            )
+
     def load_customer_data(self) -> list[dict]:
-        return self.load_customer_data_json()
+        if self._database is not None:
+            return self._database.load_customers()
+        self.refresh()
+        return [dict(info) for info in self._customers.values()]
 
-    def update_customer_data(self, data) -> None:
-        current_data = self.load_customer_data()
-        for info in current_data:
-            if info["contact"] == data["contact"]:
-                info["start_date"] = data["start_date"]
-                info["end_date"] = data["end_date"]
-                info["car"] = data["car"]
+    def refresh(self) -> None:
+        with self._journal.lock:
+            if not self._journal.is_stale():
+                return
+            self._customers = {info["contact"]: info for info in self._journal.load()}
+            self._order = list(self._customers)
+            self._contacts = {
+                normalize_contact(contact): contact for contact in self._customers
+            }
+            self._search_terms = sorted(
+                (term, info["contact"])
+                for info in self._customers.values()
+                for term in self._terms(info)
+            )
+
+    def find_customer(self, contact: str) -> dict | None:
+        if self._database is not None:
+            return self._database.get_customer(contact)
+        self.refresh()
+        key = self._contacts.get(normalize_contact(contact))
+        return dict(self._customers[key]) if key is not None else None
+
+    def search_customers(self, prefix: str, limit: int = 10) -> list[dict]:
+        """Customers whose full name, any word of it or email starts with ``prefix``."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        if self._database is not None:
+            return self._database.search_customers(prefix, limit)
+        self.refresh()
+        results = []
+        seen = set()
+        position = bisect_left(self._search_terms, (prefix,))
+        while position < len(self._search_terms) and len(results) < limit:
+            term, contact = self._search_terms[position]
+            if not term.startswith(prefix):
                 break
-        else:
-            current_data.append(data)
-        with open(CUSTOMER_DATA_PATH, "w") as file:
-            json.dump({"data": current_data}, file, indent=4)
+            if contact not in seen:
+                seen.add(contact)
+                results.append(dict(self._customers[contact]))
+            position += 1
+        return results
+
+    def customer_count(self) -> int:
+        if self._database is not None:
+            return self._database.customer_count()
+        self.refresh()
+        return len(self._order)
+
+    def load_customer_page(self, offset: int, limit: int) -> list[dict]:
+        if self._database is not None:
+            return self._database.load_customer_page(offset, limit)
+        self.refresh()
+        return [
+            dict(self._customers[contact])
+            for contact in self._order[offset : offset + limit]
+        ]
+
+    def update_customer_data(self, data) -> None:
+        if self._database is not None:
+            self._database.upsert_customer(data)
+            return
+        self.refresh()
+        with self._journal.lock:
+            contact = self._contacts.get(normalize_contact(data["contact"]))
+            if contact is None:
+                contact = data["contact"]
+                fields = dict(data)
+                info = self._customers[contact] = {}
+                self._order.append(contact)
+                self._contacts[normalize_contact(contact)] = contact
+                for term in self._terms(data):
+                    insort(self._search_terms, (term, contact))
+            else:
+                info = self._customers[contact]
+                fields = {
+                    "start_date": data["start_date"],
+                    "end_date": data["end_date"],
+                    "car": data["car"],
+                }
+            self._journal.append(contact, fields)
+            info.update(fields)
+        if self._journal.needs_compaction():
+            self._journal.compact_in_background(self._customers.values)
+
+    @staticmethod
+    def _terms(info: dict) -> set[str]:
+        full_name = info["full_name"].lower()
+        terms = {full_name, info["email"].lower()}
+        terms.update(full_name.split()[1:])
+        terms.discard("")
+        return terms
 
 
 if __name__ == "__main__":
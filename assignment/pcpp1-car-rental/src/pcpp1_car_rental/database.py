@@ -1,31 +1,231 @@
+import argparse
+import hashlib
 import sqlite3
-from typing import Literal
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, Literal
 
-from .car import CarData
+from .config import DB_BUSY_TIMEOUT_MS, DB_FILE, DB_STATEMENT_CACHE_SIZE
+from .records import iter_csv_rows, iter_json_records, normalize_contact
 from .singleton import Singleton
+from .validator import VALIDATION_CHUNK_SIZE, iso_date, validate_records
 
-DB_FILE = "car_rental.db"
-car_data = CarData()
+DATE_FORMAT = "%d/%m/%Y"
+CAR_FILTER_COLUMNS = {
+    "brand": "brand",
+    "model": "model",
+    "engine_type": "engine_type",
+    "seat_capacity": "seat_capacity",
+    "status": "status",
+}
+
+# Latest active booking of a car / customer, used to fill start_date and end_date.
+# A returned car shows no dates, like in car.json.
+SELECT_CARS = """
+    SELECT cars.id, cars.brand, cars.model, cars.engine_type, cars.seat_capacity,
+        cars.status, COALESCE(booking.start_date, ''), COALESCE(booking.end_date, '')
+    FROM cars
+    LEFT JOIN rental_booking AS booking ON cars.status = 'rented' AND booking.id = (
+        SELECT MAX(id) FROM rental_booking
+        WHERE car_id = cars.id AND rent_status = 'active'
+    )
+"""
+SELECT_CUSTOMERS = """
+    SELECT customer.full_name, customer.Contact, customer.address, customer.email,
+        COALESCE(booking.car_id, ''), COALESCE(booking.start_date, ''),
+        COALESCE(booking.end_date, '')
+    FROM customer
+    LEFT JOIN rental_booking AS booking ON booking.id = (
+        SELECT MAX(id) FROM rental_booking
+        WHERE contact = customer.Contact AND rent_status = 'active'
+    )
+"""
+# Columns populate_table keeps in line with data/*.json, the key comes first.
+SYNC_COLUMNS = {
+    "cars": ("id", "brand", "model", "engine_type", "seat_capacity"),
+    "customer": ("contact_key", "Contact", "full_name", "address", "email"),
+    "rental_booking": (
+        "id",
+        "car_id",
+        "contact",
+        "start_date",
+        "end_date",
+        "rent_status",
+        "returned_date",
+    ),
+}
+# Bookings refer to the contact as first stored, a sync never rewrites it.
+SYNC_INSERT_ONLY = {"Contact"}
+SYNC_CHUNK_SIZE = 5000
+# (checked fields, fields that may be empty) of the rows import_data loads.
+IMPORT_CHECKS = {
+    "cars": (("seat_capacity", "start_date", "end_date"), ("start_date", "end_date")),
+    "customer": (
+        ("contact", "email", "start_date", "end_date"),
+        ("start_date", "end_date"),
+    ),
+    "rental_booking": (("contact", "start_date", "end_date"), ()),
+}
+# import_data keeps at most this many rejected rows for its report.
+IMPORT_REJECTED_SAMPLE = 100
+CAR_KEYS = (
+    "ID",
+    "brand",
+    "model",
+    "engine_type",
+    "seat_capacity",
+    "status",
+    "start_date",
+    "end_date",
+)
+CUSTOMER_KEYS = (
+    "full_name",
+    "contact",
+    "address",
+    "email",
+    "car",
+    "start_date",
+    "end_date",
+)
+
+
+def content_hash(values: tuple) -> str:
+    return hashlib.blake2b(
+        "\x1f".join(map(str, values)).encode(), digest_size=16
+    ).hexdigest()
+
+
+def from_iso_date(value: str) -> str:
+    """Booking dates are stored as YYYY-MM-DD so the date index sorts correctly."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime(DATE_FORMAT)
+    except ValueError:
+        return value
+
+
+class ConnectionPool:
+    """One sqlite3 connection and cursor per thread, opened on first use.
+
+    With WAL, readers on their own connection are not blocked by a writer,
+    and ``busy_timeout`` makes a writer wait for the lock instead of failing
+    with "database is locked". ``cached_statements`` bounds the prepared
+    statement cache sqlite3 keeps per connection.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS,
+        cached_statements: int = DB_STATEMENT_CACHE_SIZE,
+    ):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_ms / 1000,
+                cached_statements=self.cached_statements,
+                # Only close() touches the connection of another thread.
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            self._local.cursor = connection.cursor()
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def cursor(self) -> sqlite3.Cursor:
+        if getattr(self._local, "cursor", None) is None:
+            self.connection()
+        return self._local.cursor
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator[sqlite3.Cursor]:
+        """Commit on success, roll back on error.
+
+        ``immediate`` takes the write lock up front, for read-then-write
+        checks. A transaction opened inside another one joins it.
+        """
+        connection = self.connection()
+        if connection.in_transaction:
+            yield self.cursor()
+            return
+        connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield self.cursor()
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
 
 
 class Database(metaclass=Singleton):
     def __init__(self):
-        self.connection = sqlite3.connect(DB_FILE)
-        self.cursor = self.connection.cursor()
+        self.pool = ConnectionPool(DB_FILE)
+        self._tables_ready = False
+        self._tables_lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The calling thread's connection, the tables are created on first use."""
+        connection = self.pool.connection()
+        if not self._tables_ready:
+            with self._tables_lock:
+                if not self._tables_ready:
+                    self.create_tables()
+                    self._tables_ready = True
+        return connection
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        self.connection
+        return self.pool.cursor()
+
+    def transaction(self, immediate: bool = False):
+        self.connection
+        return self.pool.transaction(immediate)
+
+    def close(self):
+        self.pool.close()
 
     def create_tables(self):
-        self.cursor.execute(
+        cursor = self.pool.cursor()
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS cars (
                 id TEXT PRIMARY KEY,
                 brand TEXT NOT NULL,
                 model TEXT NOT NULL,
                 engine_type TEXT NOT NULL,
-                seat_capacity INTEGER NOT NULL
+                seat_capacity INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'available'
             )
             """
         )
-        self.cursor.execute(
+        # car_rental.db files created before the status column existed.
+        self.add_missing_column("cars", "status", "TEXT NOT NULL DEFAULT 'available'")
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS customer (
                 Contact TEXT PRIMARY KEY,
@@ -35,38 +235,662 @@ class Database(metaclass=Singleton):
             )
             """
         )
-        # self.cursor.execute(
-        #     """
-        #     CREATE TABLE IF NOT EXISTS rental_booking (
-        #         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        #         start_date TEXT NOT NULL,
-        #         end_date TEXT NOT NULL,
-        #         rent_status TEXT NOT NULL,
-        #         FOREIGN KEY (contact) REFERENCES customer (contact),
-        #         FOREIGN KEY (id) REFERENCES cars (id)
-        #     )
-        #     """
-        # )
-        self.connection.commit()
-
-    def populate_table(self, table: Literal["cars", "customer", "rental_booking"]):
-        placeholder = []
+        # Digits of Contact, see normalize_contact; customers are looked up
+        # and upserted by it so 824-384-7067 and 8243847067 are one customer.
+        self.add_missing_column("customer", "contact_key", "TEXT")
+        self.fill_contact_keys()
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_customer_contact_key "
+            "ON customer (contact_key)"
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS staff (
+                name TEXT PRIMARY KEY,
+                password TEXT NOT NULL
+            )
+            """
+        )
+        # One row counting the writes to staff, see staff_version.
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS staff_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+            """
+        )
+        cursor.execute("INSERT OR IGNORE INTO staff_version VALUES (1, 0)")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS staff_{event.lower()}
+                AFTER {event} ON staff
+                BEGIN
+                    UPDATE staff_version SET version = version + 1;
+                END
+                """
+            )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rental_booking (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                car_id TEXT NOT NULL,
+                contact TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                rent_status TEXT NOT NULL DEFAULT 'active',
+                FOREIGN KEY (contact) REFERENCES customer (Contact),
+                FOREIGN KEY (car_id) REFERENCES cars (id)
+            )
+            """
+        )
+        # ISO date the car came back, set together with rent_status 'returned'.
+        self.add_missing_column("rental_booking", "returned_date", "TEXT")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cars_status ON cars (status)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cars_brand ON cars (brand, model)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_customer_name "
+            "ON customer (full_name COLLATE NOCASE)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_customer_email "
+            "ON customer (email COLLATE NOCASE)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_booking_car "
+            "ON rental_booking (car_id, rent_status)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_booking_contact "
+            "ON rental_booking (contact, rent_status)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_booking_dates "
+            "ON rental_booking (start_date, end_date)"
+        )
+        # Hash of the synced columns of each row, see populate_table.
+        for table in SYNC_COLUMNS:
+            self.add_missing_column(table, "content_hash", "TEXT")
+        self.pool.connection().commit()
+
+    def add_missing_column(self, table: str, column: str, definition: str):
+        cursor = self.pool.cursor()
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def fill_contact_keys(self):
+        """Set contact_key on rows stored before the column existed.
+
+        Of customers whose contacts only differ in formatting, the oldest row
+        gets the key, the others keep NULL and are no longer found.
+        """
+        cursor = self.pool.cursor()
+        cursor.execute("SELECT contact_key FROM customer WHERE contact_key IS NOT NULL")
+        keys = {key for key, in cursor.fetchall()}
+        cursor.execute(
+            "SELECT rowid, Contact FROM customer WHERE contact_key IS NULL "
+            "ORDER BY rowid"
+        )
+        updates = []
+        for rowid, contact in cursor.fetchall():
+            key = normalize_contact(contact)
+            if key not in keys:
+                keys.add(key)
+                updates.append((key, rowid))
+        cursor.executemany(
+            "UPDATE customer SET contact_key = ? WHERE rowid = ?", updates
+        )
+
+    def populate_table(
+        self,
+        table: Literal["cars", "customer", "rental_booking"],
+        chunk_size: int = SYNC_CHUNK_SIZE,
+    ) -> dict[str, float]:
+        """Bring ``table`` in line with data/*.json, writing only what changed.
+
+        Rows whose content hash matches the stored one are skipped, new and
+        changed rows are upserted ``chunk_size`` rows per transaction. Rows
+        are checked like import_data checks them and invalid ones are left
+        out. Returns the inserted / updated / unchanged / rejected counts, a
+        sample of the rejected rows and the rows per second.
+        """
+        start = time.perf_counter()
+        columns = SYNC_COLUMNS[table]
+        key = columns[0]
+        self.cursor.execute(f"SELECT {key}, content_hash FROM {table}")
+        stored = dict(self.cursor.fetchall())
+        assignments = ", ".join(
+            f"{column} = excluded.{column}"
+            for column in (*columns[1:], "content_hash")
+            if column not in SYNC_INSERT_ONLY
+        )
+        query = f"""
+            INSERT INTO {table} ({", ".join(columns)}, content_hash)
+            VALUES ({", ".join("?" * (len(columns) + 1))})
+            ON CONFLICT ({key}) DO UPDATE SET {assignments}
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        report = {"rejected": {table: 0}, "rejected_rows": []}
+        chunk = []
+        for row in self._sync_rows(table, report):
+            digest = content_hash(row)
+            if row[0] not in stored:
+                counts["inserted"] += 1
+            elif stored[row[0]] != digest:
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+                continue
+            chunk.append((*row, digest))
+            if len(chunk) >= chunk_size:
+                with self.transaction() as cursor:
+                    cursor.executemany(query, chunk)
+                chunk = []
+        if chunk:
+            with self.transaction() as cursor:
+                cursor.executemany(query, chunk)
+        seconds = time.perf_counter() - start
+        rows = counts["inserted"] + counts["updated"] + counts["unchanged"]
+        counts["rejected"] = report["rejected"][table]
+        counts["rejected_rows"] = report["rejected_rows"]
+        counts["seconds"] = round(seconds, 3)
+        counts["rows_per_second"] = round(rows / seconds)
+        return counts
+
+    def _sync_rows(self, table: str, report: dict) -> Iterator[tuple]:
+        """Yield the valid rows of data/*.json, journal included, as
+        SYNC_COLUMNS tuples; the others are counted in ``report``.
+        """
+        from .booking import BOOKING_DATA_PATH
+        from .car import CAR_DATA_PATH
+        from .customer import CUSTOMER_DATA_PATH
+        from .journal import Journal
+
         if table == "cars":
-            data = car_data.load_car_data()
-            for item in data:
-                item.pop("status")
-                item.pop("start_date")
-                item.pop("end_date")
-                placeholder.append(tuple(item.values()))
-        for item in placeholder:
-            print(item)
-        try:
-            self.cursor.executemany(f"INSERT INTO cars (id, brand, model, engine_type, seat_capacity) VALUES (?, ?, ?, ?, ?)", placeholder)
-            self.connection.commit()
-        except sqlite3.IntegrityError:
-            print("Cars with the same ID already exists.")
+            records = Journal(CAR_DATA_PATH, key="ID").load()
+            sync_row = self._car_sync_row
+        elif table == "customer":
+            records = Journal(CUSTOMER_DATA_PATH, key="contact").load()
+            sync_row = self._customer_sync_row
+        else:
+            records = Journal(BOOKING_DATA_PATH, key="id").load()
+            sync_row = self._booking_sync_row
+        for info in self._validated(table, records, report):
+            yield sync_row(info)
+
+    @staticmethod
+    def _car_sync_row(info: dict) -> tuple:
+        """A car record as SYNC_COLUMNS["cars"]."""
+        return (
+            info["ID"],
+            info["brand"],
+            info["model"],
+            info["engine_type"],
+            int(info["seat_capacity"]),
+        )
+
+    @staticmethod
+    def _customer_sync_row(info: dict) -> tuple:
+        """A customer record as SYNC_COLUMNS["customer"]."""
+        return (
+            normalize_contact(info["contact"]),
+            info["contact"],
+            info["full_name"],
+            info["address"],
+            info["email"],
+        )
+
+    @staticmethod
+    def _booking_sync_row(info: dict) -> tuple:
+        """A booking.json record as SYNC_COLUMNS["rental_booking"], ISO dates."""
+        return (
+            int(info["id"]),
+            info["car"],
+            info["contact"],
+            iso_date(info["start_date"]),
+            iso_date(info["end_date"]),
+            info.get("status", "active"),
+            iso_date(info.get("returned_date") or ""),
+        )
+
+    def load_cars(self) -> list[dict]:
+        self.cursor.execute(SELECT_CARS)
+        return [self._car_row(row) for row in self.cursor.fetchall()]
+
+    def car_count(self) -> int:
+        self.cursor.execute("SELECT COUNT(*) FROM cars")
+        return self.cursor.fetchone()[0]
+
+    def load_car_page(self, offset: int, limit: int) -> list[dict]:
+        self.cursor.execute(
+            SELECT_CARS + " ORDER BY cars.rowid LIMIT ? OFFSET ?", (limit, offset)
+        )
+        return [self._car_row(row) for row in self.cursor.fetchall()]
+
+    def get_car(self, car_id: str) -> dict | None:
+        self.cursor.execute(SELECT_CARS + " WHERE cars.id = ?", (car_id,))
+        row = self.cursor.fetchone()
+        return self._car_row(row) if row is not None else None
+
+    def find_car_ids(self, **criteria) -> list[str]:
+        conditions = []
+        for field in criteria:
+            if field not in CAR_FILTER_COLUMNS:
+                raise KeyError(f"{field} is not an indexed car field.")
+            conditions.append(f"{CAR_FILTER_COLUMNS[field]} = ?")
+        query = "SELECT id FROM cars"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        self.cursor.execute(query + " ORDER BY rowid", tuple(criteria.values()))
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def find_cars(self, **criteria) -> list[dict]:
+        conditions = []
+        for field in criteria:
+            if field not in CAR_FILTER_COLUMNS:
+                raise KeyError(f"{field} is not an indexed car field.")
+            conditions.append(f"cars.{CAR_FILTER_COLUMNS[field]} = ?")
+        query = SELECT_CARS
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        self.cursor.execute(query + " ORDER BY cars.rowid", tuple(criteria.values()))
+        return [self._car_row(row) for row in self.cursor.fetchall()]
+
+    def car_facet_counts(self, field: str, **criteria) -> dict:
+        conditions = []
+        for key in (field, *criteria):
+            if key not in CAR_FILTER_COLUMNS:
+                raise KeyError(f"{key} is not an indexed car field.")
+        for key in criteria:
+            conditions.append(f"{CAR_FILTER_COLUMNS[key]} = ?")
+        column = CAR_FILTER_COLUMNS[field]
+        query = f"SELECT {column}, COUNT(*) FROM cars"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        self.cursor.execute(query + f" GROUP BY {column}", tuple(criteria.values()))
+        return dict(self.cursor.fetchall())
+
+    def get_car_column_values(self, field: str) -> list:
+        if field not in CAR_FILTER_COLUMNS:
+            raise KeyError(f"{field} is not an indexed car field.")
+        self.cursor.execute(f"SELECT DISTINCT {CAR_FILTER_COLUMNS[field]} FROM cars")
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def set_car_status(self, car_id: str, status: str):
+        with self.transaction():
+            self.cursor.execute(
+                "UPDATE cars SET status = ? WHERE id = ?", (status, car_id)
+            )
+
+    def load_customers(self) -> list[dict]:
+        self.cursor.execute(SELECT_CUSTOMERS)
+        return [self._customer_row(row) for row in self.cursor.fetchall()]
+
+    def customer_count(self) -> int:
+        self.cursor.execute("SELECT COUNT(*) FROM customer")
+        return self.cursor.fetchone()[0]
+
+    def load_customer_page(self, offset: int, limit: int) -> list[dict]:
+        self.cursor.execute(
+            SELECT_CUSTOMERS + " ORDER BY customer.rowid LIMIT ? OFFSET ?",
+            (limit, offset),
+        )
+        return [self._customer_row(row) for row in self.cursor.fetchall()]
+
+    def get_customer(self, contact: str) -> dict | None:
+        self.cursor.execute(
+            SELECT_CUSTOMERS + " WHERE customer.contact_key = ?",
+            (normalize_contact(contact),),
+        )
+        row = self.cursor.fetchone()
+        return self._customer_row(row) if row is not None else None
+
+    def search_customers(self, prefix: str, limit: int = 10) -> list[dict]:
+        # LIKE is case-insensitive, so it can use the NOCASE indexes for a prefix.
+        pattern = prefix.replace("%", "").replace("_", "") + "%"
+        self.cursor.execute(
+            SELECT_CUSTOMERS
+            + " WHERE customer.full_name LIKE ? OR customer.email LIKE ? LIMIT ?",
+            (pattern, pattern, limit),
+        )
+        return [self._customer_row(row) for row in self.cursor.fetchall()]
+
+    def upsert_customer(self, data: dict):
+        with self.transaction():
+            self.cursor.execute(
+                """
+                INSERT INTO customer (Contact, contact_key, full_name, address, email)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (contact_key) DO UPDATE SET
+                    full_name = excluded.full_name,
+                    address = excluded.address,
+                    email = excluded.email
+                """,
+                (
+                    data["contact"],
+                    normalize_contact(data["contact"]),
+                    data["full_name"],
+                    data["address"],
+                    data["email"],
+                ),
+            )
+
+    def load_bookings(self) -> list[dict]:
+        """Every booking, the returned ones too, like booking.json."""
+        self.cursor.execute(
+            """
+            SELECT id, car_id, contact, start_date, end_date, rent_status,
+                returned_date
+            FROM rental_booking ORDER BY id
+            """
+        )
+        bookings = []
+        for *row, rent_status, returned_date in self.cursor.fetchall():
+            info = self._booking_row(row)
+            if rent_status != "active":
+                info["status"] = rent_status
+                info["returned_date"] = from_iso_date(returned_date or "")
+            bookings.append(info)
+        return bookings
+
+    def has_booking_conflict(self, car_id: str, start_date: str, end_date: str) -> bool:
+        """Dates are ISO strings, a booking conflicts when the ranges overlap."""
+        self.cursor.execute(
+            """
+            SELECT 1 FROM rental_booking
+            WHERE car_id = ? AND rent_status = 'active'
+                AND start_date <= ? AND end_date >= ?
+            LIMIT 1
+            """,
+            (car_id, end_date, start_date),
+        )
+        return self.cursor.fetchone() is not None
+
+    def find_car_bookings(
+        self, car_id: str, start_date: str, end_date: str
+    ) -> list[tuple[str, str]]:
+        """(start, end) ISO dates of the bookings of ``car_id`` touching the range."""
+        self.cursor.execute(
+            """
+            SELECT start_date, end_date FROM rental_booking
+            WHERE car_id = ? AND rent_status = 'active'
+                AND start_date <= ? AND end_date >= ?
+            ORDER BY start_date
+            """,
+            (car_id, end_date, start_date),
+        )
+        return self.cursor.fetchall()
+
+    def find_booked_car_ids(self, start_date: str, end_date: str) -> list[str]:
+        self.cursor.execute(
+            """
+            SELECT DISTINCT car_id FROM rental_booking
+            WHERE rent_status = 'active' AND start_date <= ? AND end_date >= ?
+            """,
+            (end_date, start_date),
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def add_booking(
+        self, car_id: str, contact: str, start_date: str, end_date: str
+    ) -> dict | None:
+        """Insert the booking unless it overlaps another one, then return None."""
+        # Take the write lock before checking so two terminals cannot both pass.
+        with self.transaction(immediate=True):
+            if self.has_booking_conflict(car_id, start_date, end_date):
+                return None
+            self.cursor.execute(
+                """
+                INSERT INTO rental_booking (car_id, contact, start_date, end_date)
+                VALUES (?, ?, ?, ?)
+                """,
+                (car_id, contact, start_date, end_date),
+            )
+            booking_id = self.cursor.lastrowid
+        return self._booking_row((booking_id, car_id, contact, start_date, end_date))
+
+    def return_booking(self, car_id: str, returned_date: str) -> dict | None:
+        """Mark the booking ``car_id`` is out on at ``returned_date`` as returned.
+
+        That is its active booking which started last by then; a returned
+        booking no longer blocks its days. Dates are ISO, None when there is none.
+        """
+        with self.transaction(immediate=True):
+            self.cursor.execute(
+                """
+                SELECT id, car_id, contact, start_date, end_date FROM rental_booking
+                WHERE car_id = ? AND rent_status = 'active' AND start_date <= ?
+                ORDER BY start_date DESC LIMIT 1
+                """,
+                (car_id, returned_date),
+            )
+            row = self.cursor.fetchone()
+            if row is None:
+                return None
+            self.cursor.execute(
+                """
+                UPDATE rental_booking SET rent_status = 'returned', returned_date = ?
+                WHERE id = ?
+                """,
+                (returned_date, row[0]),
+            )
+        info = self._booking_row(row)
+        info["status"] = "returned"
+        info["returned_date"] = from_iso_date(returned_date)
+        return info
+
+    def load_staff(self) -> list[dict]:
+        self.cursor.execute("SELECT name, password FROM staff")
+        return [{"name": name, "password": password} for name, password in self.cursor]
+
+    def staff_version(self) -> int:
+        """Changes with every write to staff, from any connection."""
+        self.cursor.execute("SELECT version FROM staff_version")
+        return self.cursor.fetchone()[0]
+
+    def load_staff_passwords(self) -> list[tuple[str, str]]:
+        self.cursor.execute("SELECT name, password FROM staff")
+        return self.cursor.fetchall()
+
+    def set_staff_password(self, name: str, password: str):
+        with self.transaction():
+            self.cursor.execute(
+                "UPDATE staff SET password = ? WHERE name = ?", (password, name)
+            )
+
+    def import_data(self, source: Literal["json", "csv"] = "json") -> dict:
+        """Bulk load data/*.json or data/*.csv, skipping rows that already exist.
+
+        Cars and customers are streamed from the files into ``executemany``,
+        so the import runs in constant memory. Bookings always come from
+        booking.json with their ids, the same rows populate_table syncs, so an
+        import and a sync can never store a booking twice.
+
+        Rows are checked with ``validate_records`` ``VALIDATION_CHUNK_SIZE`` at
+        a time, see IMPORT_CHECKS; bookings of unknown cars or customers are
+        rejected too. Rejected rows are left out instead of failing the
+        import. Every row is stored with its content hash, so a sync right
+        after finds it unchanged. Returns the rows inserted and rejected per
+        table, plus a sample of the rejected ones as [table, row number,
+        failed fields].
+        """
+        from .booking import BOOKING_DATA_PATH
+        from .car import CarData
+        from .customer import CUSTOMER_DATA_CSV_PATH, CUSTOMER_DATA_PATH
+        from .journal import Journal
+        from .staff import StaffData
+
+        if source == "csv":
+            cars = self._csv_records(CarData().csv_path, CAR_KEYS)
+            customers = self._csv_records(CUSTOMER_DATA_CSV_PATH, CUSTOMER_KEYS)
+            staff = StaffData().load_staff_data_csv()
+        else:
+            cars = self._json_records(CarData().path, CAR_KEYS)
+            customers = self._json_records(CUSTOMER_DATA_PATH, CUSTOMER_KEYS)
+            staff = StaffData().load_staff_data_json()
+        report = {
+            "cars": 0,
+            "customer": 0,
+            "staff": 0,
+            "rental_booking": 0,
+            "rejected": {"cars": 0, "customer": 0, "rental_booking": 0},
+            "rejected_rows": [],
+        }
+
+        def car_rows():
+            for info in self._validated("cars", cars, report):
+                row = self._car_sync_row(info)
+                yield (*row, content_hash(row), info["status"])
+
+        def customer_rows():
+            for info in self._validated("customer", customers, report):
+                row = self._customer_sync_row(info)
+                yield (*row, content_hash(row))
+
+        def booking_rows():
+            bookings = Journal(BOOKING_DATA_PATH, key="id").load()
+            for info in self._validated("rental_booking", bookings, report):
+                row = self._booking_sync_row(info)
+                yield (*row, content_hash(row))
+
+        staff_rows = [(info["name"], info["password"]) for info in staff]
+        inserts = (
+            ("cars", (*SYNC_COLUMNS["cars"], "content_hash", "status"), car_rows()),
+            ("customer", (*SYNC_COLUMNS["customer"], "content_hash"), customer_rows()),
+            ("staff", ("name", "password"), staff_rows),
+            (
+                "rental_booking",
+                (*SYNC_COLUMNS["rental_booking"], "content_hash"),
+                booking_rows(),
+            ),
+        )
+        with self.transaction():
+            for table, columns, rows in inserts:
+                self.cursor.executemany(
+                    f"""
+                    INSERT OR IGNORE INTO {table} ({", ".join(columns)})
+                    VALUES ({", ".join("?" * len(columns))})
+                    """,
+                    rows,
+                )
+                # Rows already stored are ignored and not counted.
+                report[table] = self.cursor.rowcount
+        return report
+
+    def _validated(
+        self, table: str, records: Iterable[dict], report: dict
+    ) -> Iterator[dict]:
+        """Yield the records of ``table`` that pass its IMPORT_CHECKS.
+
+        The others are counted in ``report``; no exception is raised per row.
+        A booking's contact is replaced by the customer's stored Contact,
+        which its foreign key refers to.
+        """
+        fields, optional = IMPORT_CHECKS[table]
+        if table == "rental_booking":
+            # A booking must point at rows already stored, or its insert
+            # would fail on the foreign keys. This runs inside executemany,
+            # so it reads through the connection rather than self.cursor.
+            connection = self.connection
+            car_ids = {
+                car_id for car_id, in connection.execute("SELECT id FROM cars")
+            }
+            contacts = dict(
+                connection.execute("SELECT contact_key, Contact FROM customer")
+            )
+        records = iter(records)
+        row_number = 0
+        while chunk := list(islice(records, VALIDATION_CHUNK_SIZE)):
+            failed: dict[int, list[str]] = {}
+            # Missing fields and JSON numbers are checked as text.
+            columns = [
+                {
+                    name: "" if info.get(name) is None else str(info[name])
+                    for name in fields
+                }
+                for info in chunk
+            ]
+            result = validate_records(columns, fields, optional, len(chunk))
+            for name, indexes in result.errors.items():
+                for index in indexes:
+                    failed.setdefault(index, []).append(name)
+            for index, info in enumerate(chunk):
+                if table == "rental_booking" and index not in failed:
+                    contact = contacts.get(normalize_contact(info["contact"]))
+                    if not str(info.get("id", "")).isdigit():
+                        failed[index] = ["id"]
+                    elif info.get("car") not in car_ids:
+                        failed[index] = ["car"]
+                    elif contact is None:
+                        failed[index] = ["contact"]
+                    else:
+                        info = {**info, "contact": contact}
+                if index not in failed:
+                    yield info
+                    continue
+                report["rejected"][table] += 1
+                if len(report["rejected_rows"]) < IMPORT_REJECTED_SAMPLE:
+                    report["rejected_rows"].append(
+                        [table, row_number + index, failed[index]]
+                    )
+            row_number += len(chunk)
+
+    @staticmethod
+    def _csv_records(path: str, keys: tuple[str, ...]) -> Iterator[dict]:
+        for row in iter_csv_rows(path, keys):
+            yield dict(zip(keys, row))
+
+    @staticmethod
+    def _json_records(path: str, keys: tuple[str, ...]) -> Iterator[dict]:
+        # Every checked field is there, as text like in the CSV files.
+        for info in iter_json_records(path):
+            yield {key: str(info.get(key, "")) for key in keys}
+
+    @staticmethod
+    def _car_row(row: tuple) -> dict:
+        info = dict(zip(CAR_KEYS, row))
+        info["start_date"] = from_iso_date(info["start_date"])
+        info["end_date"] = from_iso_date(info["end_date"])
+        return info
+
+    @staticmethod
+    def _booking_row(row: tuple) -> dict:
+        booking_id, car_id, contact, start_date, end_date = row
+        return {
+            "id": str(booking_id),
+            "car": car_id,
+            "contact": contact,
+            "start_date": from_iso_date(start_date),
+            "end_date": from_iso_date(end_date),
+        }
+
+    @staticmethod
+    def _customer_row(row: tuple) -> dict:
+        info = dict(zip(CUSTOMER_KEYS, row))
+        info["start_date"] = from_iso_date(info["start_date"])
+        info["end_date"] = from_iso_date(info["end_date"])
+        return info
+
 
 if __name__ == "__main__":
-    db = Database(DB_FILE)
+    parser = argparse.ArgumentParser(description="Load data/* into the database.")
+    parser.add_argument("--source", choices=["json", "csv"], default="json")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="upsert new and changed rows of data/*.json instead of importing",
+    )
+    args = parser.parse_args()
+    db = Database()
     db.create_tables()
-    db.populate_table("cars")
\ No newline at end of file
+    if args.sync:
+        for table in SYNC_COLUMNS:
+            print(table, db.populate_table(table))
+    else:
+        print(db.import_data(args.source))
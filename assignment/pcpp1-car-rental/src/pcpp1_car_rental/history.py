@@ -0,0 +1,371 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from datetime import date, datetime
+from itertools import accumulate
+from pathlib import Path
+
+from .records import parse_record_date
+from .singleton import Singleton
+
+RENTAL_EVENTS_PATH = str(
+    Path(__file__).parents[2].joinpath("data", "rental_events.jsonl")
+)
+RENTAL_STATS_PATH = str(Path(__file__).parents[2].joinpath("data", "rental_stats.json"))
+# The aggregates are written to RENTAL_STATS_PATH every this many events.
+STATS_SNAPSHOT_EVERY = 100
+
+
+class DaySums:
+    """Numbers added to day ordinals, summed over the days before any day.
+
+    ``add`` is O(1). The sorted days and their running totals are rebuilt by
+    the first query after an add, then each query is one bisect.
+    """
+
+    def __init__(self, values: dict[int, int] | None = None):
+        self.values: dict[int, int] = values if values is not None else {}
+        self._days: list[int] | None = None
+        self._totals: list[int] = []
+
+    def add(self, day: int, value: int) -> None:
+        self.values[day] = self.values.get(day, 0) + value
+        self._days = None
+
+    def sum_before(self, day: int) -> int:
+        """The sum of the values of the days before ``day``."""
+        if self._days is None:
+            self._days = sorted(self.values)
+            self._totals = list(accumulate(self.values[key] for key in self._days))
+        index = bisect_left(self._days, day)
+        return self._totals[index - 1] if index else 0
+
+    def sum_between(self, first: int, last: int) -> int:
+        return self.sum_before(last + 1) - self.sum_before(first)
+
+
+class BookedDays:
+    """Difference array of one car's bookings over day ordinals.
+
+    A booking adds +1 on its first day and -1 after its last. The number of
+    bookings on day d is the sum of the changes up to d, so the booked days
+    before x are the sum over the changes c at p < x of c * (x - p), that is
+    x * sum(c) - sum(c * p): two prefix sums.
+    """
+
+    def __init__(self, changes: dict[int, int] | None = None):
+        self.changes = DaySums(changes)
+        self.weighted = DaySums(
+            {day: day * change for day, change in self.changes.values.items()}
+        )
+
+    def change(self, day: int, change: int) -> None:
+        self.changes.add(day, change)
+        self.weighted.add(day, day * change)
+
+    def between(self, first: int, last: int) -> int:
+        """Days from ``first`` to ``last`` included that are booked."""
+        return self._before(last + 1) - self._before(first)
+
+    def _before(self, day: int) -> int:
+        return day * self.changes.sum_before(day) - self.weighted.sum_before(day)
+
+
+class RentalStats:
+    """Aggregates of the rental events, every event is folded in O(1).
+
+    Utilization is kept per car as a difference array over day ordinals, see
+    BookedDays; an early return moves the -1 to the day after the return.
+    Rentals and their days are also kept per start day, so the count and
+    average length of the rentals starting in a range are prefix sums too.
+    Nothing is ever walked event by event.
+    """
+
+    # Saved aggregates of another version are rebuilt from the log.
+    VERSION = 2
+
+    def __init__(self):
+        self.rentals = 0
+        self.rental_days = 0
+        self.car_days: dict[str, int] = {}
+        self.day_changes: dict[str, BookedDays] = {}
+        # Rentals, and their days, per start day ordinal
+        self.starts = DaySums()
+        self.start_days = DaySums()
+        # (YYYY-MM, brand, model) -> rentals starting in that month
+        self.model_months: dict[tuple[str, str, str], int] = {}
+
+    def apply(self, event: dict) -> None:
+        if event["type"] == "booked":
+            self._apply_booking(event)
+        elif event["type"] == "returned" and "booking_id" in event:
+            self._apply_return(event)
+
+    def _apply_booking(self, event: dict) -> None:
+        start = parse_record_date(event["start_date"])
+        end = parse_record_date(event["end_date"])
+        days = (end - start).days + 1
+        car = event["car"]
+        self.rentals += 1
+        self.rental_days += days
+        self.car_days[car] = self.car_days.get(car, 0) + days
+        self.starts.add(start.toordinal(), 1)
+        self.start_days.add(start.toordinal(), days)
+        booked = self.day_changes.setdefault(car, BookedDays())
+        booked.change(start.toordinal(), 1)
+        booked.change(end.toordinal() + 1, -1)
+        key = (f"{start.year}-{start.month:02d}", event["brand"], event["model"])
+        self.model_months[key] = self.model_months.get(key, 0) + 1
+
+    def _apply_return(self, event: dict) -> None:
+        """Drop the booked days after the return day, if it came back early."""
+        returned = parse_record_date(event["returned_date"]).toordinal()
+        end = parse_record_date(event["end_date"]).toordinal()
+        unused = end - returned
+        if unused <= 0:
+            return
+        car = event["car"]
+        self.rental_days -= unused
+        self.car_days[car] = self.car_days.get(car, 0) - unused
+        start = parse_record_date(event["start_date"]).toordinal()
+        self.start_days.add(start, -unused)
+        booked = self.day_changes.setdefault(car, BookedDays())
+        booked.change(returned + 1, -1)
+        booked.change(end + 1, 1)
+
+    def rentals_started(self, first: date, last: date) -> int:
+        return self.starts.sum_between(first.toordinal(), last.toordinal())
+
+    def average_days(
+        self, first: date | None = None, last: date | None = None
+    ) -> float:
+        """Average length of all rentals, or of those starting in the range."""
+        if first is None or last is None:
+            return self.rental_days / self.rentals if self.rentals else 0.0
+        low, high = first.toordinal(), last.toordinal()
+        rentals = self.starts.sum_between(low, high)
+        return self.start_days.sum_between(low, high) / rentals if rentals else 0.0
+
+    def booked_days(self, car: str, first: date, last: date) -> int:
+        """Days from ``first`` to ``last`` included on which ``car`` is booked."""
+        booked = self.day_changes.get(car)
+        if booked is None:
+            return 0
+        return booked.between(first.toordinal(), last.toordinal())
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.VERSION,
+            "rentals": self.rentals,
+            "rental_days": self.rental_days,
+            "car_days": self.car_days,
+            "day_changes": {
+                car: booked.changes.values for car, booked in self.day_changes.items()
+            },
+            "starts": self.starts.values,
+            "start_days": self.start_days.values,
+            "model_months": [[*key, count] for key, count in self.model_months.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RentalStats":
+        stats = cls()
+        stats.rentals = data["rentals"]
+        stats.rental_days = data["rental_days"]
+        stats.car_days = data["car_days"]
+        # JSON object keys are strings, the day ordinals are not.
+        stats.day_changes = {
+            car: BookedDays(day_values(changes))
+            for car, changes in data["day_changes"].items()
+        }
+        stats.starts = DaySums(day_values(data["starts"]))
+        stats.start_days = DaySums(day_values(data["start_days"]))
+        stats.model_months = {
+            (month, brand, model): count
+            for month, brand, model, count in data["model_months"]
+        }
+        return stats
+
+
+def day_values(values: dict[str, int]) -> dict[int, int]:
+    return {int(day): value for day, value in values.items()}
+
+
+class RentalHistory(metaclass=Singleton):
+    """Append-only rental event log plus the aggregates folded from it.
+
+    Events go to ``rental_events.jsonl``, one line each. The aggregates are
+    saved with the byte offset of the log they cover, so loading them only
+    replays the events appended since, including those of other processes.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._stats: RentalStats | None = None
+        self._offset = 0
+        self._unsaved = 0
+
+    def record_booking(self, booking: dict, car: dict) -> dict:
+        return self.record(
+            "booked",
+            booking_id=booking["id"],
+            car=booking["car"],
+            brand=car["brand"],
+            model=car["model"],
+            contact=booking["contact"],
+            start_date=booking["start_date"],
+            end_date=booking["end_date"],
+        )
+
+    def record_return(self, car_id: str, booking: dict | None = None) -> dict:
+        """``booking`` is the one the return closed, if there was one."""
+        if booking is None:
+            return self.record("returned", car=car_id)
+        return self.record(
+            "returned",
+            booking_id=booking["id"],
+            car=car_id,
+            start_date=booking["start_date"],
+            end_date=booking["end_date"],
+            returned_date=booking["returned_date"],
+        )
+
+    def record(self, event_type: str, **fields) -> dict:
+        event = {
+            "type": event_type,
+            "at": datetime.now().isoformat(timespec="seconds"),
+            **fields,
+        }
+        line = (json.dumps(event) + "\n").encode()
+        with self.lock:
+            if self._stats is None:
+                # The booking or return is already stored when it gets
+                # recorded, keep it out of the backfill of a brand new log.
+                self._load(skip=(event_type, fields.get("booking_id")))
+            # Fold in what other processes appended, the offset must match.
+            self.stats()
+            with open(RENTAL_EVENTS_PATH, "ab") as file:
+                file.write(line)
+                file.flush()
+                os.fsync(file.fileno())
+            self._offset += len(line)
+            self._apply(event)
+        return event
+
+    def stats(self) -> RentalStats:
+        with self.lock:
+            if self._stats is None:
+                self._load()
+            elif os.path.exists(RENTAL_EVENTS_PATH):
+                if os.path.getsize(RENTAL_EVENTS_PATH) != self._offset:
+                    self._catch_up()
+            return self._stats
+
+    def summary(self, first: date, last: date) -> dict:
+        """What the history screen shows, read from the aggregates only."""
+        stats = self.stats()
+        days = (last - first).days + 1
+        months = (f"{first.year}-{first.month:02d}", f"{last.year}-{last.month:02d}")
+        utilization = []
+        for car in stats.car_days:
+            booked = stats.booked_days(car, first, last)
+            utilization.append([car, booked, round(booked / days * 100, 1)])
+        utilization.sort(key=lambda row: (-row[1], row[0]))
+        # Rentals are counted in the range they start in.
+        return {
+            "rentals": stats.rentals_started(first, last),
+            "average_days": round(stats.average_days(first, last), 2),
+            "by_model_month": sorted(
+                [
+                    [*key, count]
+                    for key, count in stats.model_months.items()
+                    if months[0] <= key[0] <= months[1]
+                ],
+                reverse=True,
+            ),
+            "utilization": utilization,
+        }
+
+    def _load(self, skip: tuple[str, str | None] | None = None) -> None:
+        self._stats = RentalStats()
+        self._offset = 0
+        if os.path.exists(RENTAL_STATS_PATH):
+            with open(RENTAL_STATS_PATH, "r") as file:
+                data = json.load(file)
+            if data["stats"].get("version") == RentalStats.VERSION:
+                self._stats = RentalStats.from_dict(data["stats"])
+                self._offset = data["offset"]
+        if not os.path.exists(RENTAL_EVENTS_PATH):
+            self._backfill(skip)
+        self._catch_up()
+
+    def _backfill(self, skip: tuple[str, str | None] | None = None) -> None:
+        """Start the log with the bookings and returns made before it existed.
+
+        ``skip`` is the (event type, booking id) about to be recorded.
+        """
+        from .booking import BookingData
+        from .car import CarData
+
+        with open(RENTAL_EVENTS_PATH, "a") as file:
+            for booking in BookingData().load_booking_data():
+                booking_id = booking["id"]
+                events = []
+                if skip != ("booked", booking_id):
+                    car = CarData().get_car(booking["car"]) or {
+                        "brand": "",
+                        "model": "",
+                    }
+                    events.append(
+                        {
+                            "type": "booked",
+                            "at": "",
+                            "booking_id": booking_id,
+                            "car": booking["car"],
+                            "brand": car["brand"],
+                            "model": car["model"],
+                            "contact": booking["contact"],
+                            "start_date": booking["start_date"],
+                            "end_date": booking["end_date"],
+                        }
+                    )
+                if "returned_date" in booking and skip != ("returned", booking_id):
+                    events.append(
+                        {
+                            "type": "returned",
+                            "at": "",
+                            "booking_id": booking_id,
+                            "car": booking["car"],
+                            "start_date": booking["start_date"],
+                            "end_date": booking["end_date"],
+                            "returned_date": booking["returned_date"],
+                        }
+                    )
+                for event in events:
+                    file.write(json.dumps(event) + "\n")
+
+    def _catch_up(self) -> None:
+        if not os.path.exists(RENTAL_EVENTS_PATH):
+            return
+        with open(RENTAL_EVENTS_PATH, "rb") as file:
+            file.seek(self._offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # Still being written by another process.
+                    break
+                self._offset += len(line)
+                self._apply(json.loads(line))
+
+    def _apply(self, event: dict) -> None:
+        self._stats.apply(event)
+        self._unsaved += 1
+        if self._unsaved >= STATS_SNAPSHOT_EVERY:
+            self._save()
+
+    def _save(self) -> None:
+        temp_path = RENTAL_STATS_PATH + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"offset": self._offset, "stats": self._stats.to_dict()}, file)
+        os.replace(temp_path, RENTAL_STATS_PATH)
+        self._unsaved = 0
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+JOURNAL_MAX_ENTRIES = 1000
+JOURNAL_MAX_BYTES = 1024 * 1024
+
+
+class Journal:
+    """Write-ahead JSONL journal in front of a ``{"data": [...]}`` JSON snapshot.
+
+    Every mutation is appended to ``<snapshot>.journal.jsonl`` as one line, so a
+    booking costs one small append instead of rewriting the whole file. Readers
+    replay the journal over the snapshot. Once the journal grows past
+    ``max_entries`` lines or ``max_bytes`` bytes, a background thread folds it
+    into a new snapshot that replaces the old one through an atomic rename.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        key: str,
+        max_entries: int = JOURNAL_MAX_ENTRIES,
+        max_bytes: int = JOURNAL_MAX_BYTES,
+    ):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_suffix(".journal.jsonl")
+        # Journal being folded into the snapshot by the background compaction.
+        self.compacting_path = self.snapshot_path.with_suffix(".compacting.jsonl")
+        self.key = key
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self._entries = 0
+        self._signature = None
+        self._compaction = None
+
+    def load(self) -> list[dict]:
+        with self.lock:
+            with open(self.snapshot_path, "r") as file:
+                data = json.load(file)["data"]
+            records = {record[self.key]: record for record in data}
+            self._replay(self.compacting_path, records)
+            self._entries = self._replay(self.journal_path, records)
+            self._signature = self.signature()
+            return list(records.values())
+
+    def append(self, record_key: str, fields: dict) -> None:
+        """Durably record that ``fields`` were set on the record ``record_key``.
+
+        A key that is not in the snapshot yet is created by the entry.
+        """
+        line = json.dumps({"key": record_key, "fields": fields}) + "\n"
+        with self.lock:
+            with open(self.journal_path, "a") as file:
+                file.write(line)
+                file.flush()
+                os.fsync(file.fileno())
+            self._entries += 1
+            self._signature = self.signature()
+
+    def is_stale(self) -> bool:
+        """Tell whether the files changed behind our back since the last read."""
+        return self._signature is None or self._signature != self.signature()
+
+    def signature(self) -> tuple:
+        stats = []
+        for path in (self.snapshot_path, self.compacting_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return tuple(stats)
+
+    def needs_compaction(self) -> bool:
+        if self._entries >= self.max_entries:
+            return True
+        try:
+            return os.path.getsize(self.journal_path) >= self.max_bytes
+        except FileNotFoundError:
+            return False
+
+    def compact_in_background(self, snapshot) -> None:
+        """Start a compaction unless one is already running.
+
+        ``snapshot`` is called under the journal lock and must return the
+        current records; the caller's own mutations take the same lock.
+        """
+        with self.lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            self._compaction = threading.Thread(
+                target=self.compact, args=(snapshot,), daemon=True
+            )
+            self._compaction.start()
+
+    def compact(self, snapshot) -> None:
+        with self.lock:
+            if os.path.exists(self.compacting_path):
+                # A previous compaction died midway; its entries are already
+                # part of memory, so the snapshot below supersedes them.
+                os.remove(self.compacting_path)
+            if os.path.exists(self.journal_path):
+                os.replace(self.journal_path, self.compacting_path)
+            data = [dict(record) for record in snapshot()]
+            self._entries = 0
+            self._signature = self.signature()
+        temp_path = self.snapshot_path.with_suffix(".tmp")
+        with open(temp_path, "w") as file:
+            json.dump({"data": data}, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        with self.lock:
+            os.replace(temp_path, self.snapshot_path)
+            if os.path.exists(self.compacting_path):
+                os.remove(self.compacting_path)
+            self._signature = self.signature()
+
+    def wait(self) -> None:
+        """Block until a running compaction, if any, has finished."""
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+    def _replay(self, path: Path, records: dict) -> int:
+        count = 0
+        try:
+            file = open(path, "r")
+        except FileNotFoundError:
+            return count
+        with file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from a crash during append, skip it.
+                    continue
+                record = records.setdefault(entry["key"], {})
+                record.update(entry["fields"])
+                count += 1
+        return count
@@ -1,6 +1,10 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import re
 import sys
+import time
 from pathlib import Path
 
 from colored import Fore, Style
@@ -12,20 +16,98 @@ LOG_FILE_ERROR = Path(__file__).parent.joinpath("logger_error.log")
 LOG_FORMAT_1 = "%(asctime)s | %(levelname)s | %(name)s - %(filename)s - %(lineno)s - %(funcName)s | %(process)d >>> %(message)s"
 LOG_FORMAT_2 = "%(asctime)s | %(levelname)s | %(filename)s >>> %(message)s"
 DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# File handlers write once this many records are waiting...
+LOG_BATCH_SIZE = 64
+# ...or once this many seconds passed since their last write.
+LOG_FLUSH_INTERVAL = 1.0
+
+ESCAPE_CODE_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
 
 
 # https://stackoverflow.com/questions/48782529/exclude-ansi-escape-sequences-from-output-log-file
 # Custom Logging Formatter To Remove ANSI Escape Characters
 class TermEscapeCodeFormatter(logging.Formatter, metaclass=Singleton):
-    """A class to strip the escape codes from the"""
+    """A class to strip the escape codes from the formatted log line.
+
+    The record itself is left untouched, the stdout handler formats the same
+    record and keeps its colours.
+    """
 
     def __init__(self, fmt=None, datefmt=None, style="%", validate=True):
         super().__init__(fmt, datefmt, style, validate)
 
     def format(self, record):
-        escape_re = re.compile(r"\x1b\[[0-9;]*m")
-        record.msg = re.sub(escape_re, "", str(record.msg))
-        return super().format(record)
+        return ESCAPE_CODE_PATTERN.sub("", super().format(record))
+
+
+class BatchingFileHandler(logging.FileHandler):
+    """FileHandler that buffers formatted records and writes them in batches.
+
+    A batch is written when ``batch_size`` records are waiting, when
+    ``flush_interval`` seconds passed since the last write, or right away for
+    errors. ``flush()`` writes whatever is buffered.
+    """
+
+    def __init__(
+        self,
+        filename,
+        mode="a",
+        encoding=None,
+        delay=False,
+        errors=None,
+        batch_size=LOG_BATCH_SIZE,
+        flush_interval=LOG_FLUSH_INTERVAL,
+    ):
+        super().__init__(filename, mode, encoding, delay, errors)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        try:
+            self._buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if (
+            len(self._buffer) >= self.batch_size
+            or record.levelno >= logging.ERROR
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._buffer:
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write(self.terminator.join(self._buffer) + self.terminator)
+                self._buffer.clear()
+            super().flush()
+            self._last_flush = time.monotonic()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that also flushes its handlers when the queue goes idle."""
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush()
+
 
 # Define Logger Format
 stream_handler_format = logging.Formatter(fmt=LOG_FORMAT_2, datefmt=DATE_FORMAT)
@@ -37,20 +119,32 @@ stdout_handler_all.setLevel(logging.DEBUG)
 stdout_handler_all.setFormatter(stream_handler_format)
 
 # Setting up handler which logs to a file even debug level messages
-file_handler_all = logging.FileHandler(LOG_FILE)
+file_handler_all = BatchingFileHandler(LOG_FILE)
 file_handler_all.setLevel(logging.DEBUG)
 file_handler_all.setFormatter(file_handler_format)
 
 # Setting up handler which logs to a file from error level messages
-file_handler_error = logging.FileHandler(LOG_FILE_ERROR)
+file_handler_error = BatchingFileHandler(LOG_FILE_ERROR)
 file_handler_error.setLevel(logging.WARNING)
 file_handler_error.setFormatter(file_handler_format)
 
+# The logging call only puts the record on a queue, a background thread
+# runs the three handlers above so no disk I/O happens on the Tk thread.
+log_queue = queue.SimpleQueue()
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_listener = BatchingQueueListener(
+    log_queue,
+    stdout_handler_all,
+    file_handler_all,
+    file_handler_error,
+    respect_handler_level=True,
+)
+queue_listener.start()
+atexit.register(queue_listener.stop)
+
 # Create Logger
 logger = logging.getLogger("logger_learn")
 logger.setLevel(level=logging.WARNING)
 
 # Adding Handler To Logger
-logger.addHandler(stdout_handler_all)
-logger.addHandler(file_handler_all)
-logger.addHandler(file_handler_error)
\ No newline at end of file
+logger.addHandler(queue_handler)
@@ -1,36 +1,104 @@
+import time
+
+# Taken before the other imports so that --profile-startup can report them.
+IMPORT_START = time.perf_counter()
+
+import argparse
 import tkinter as tk
+from datetime import date, timedelta
 from tkinter import filedialog, messagebox, ttk
 
 from colored import Fore, Style
 from tkcalendar import Calendar
 
+from .booking import BookingConflictError, BookingData
 from .car import CarData
-from .customer import CustomerData
-from .database import Database
+from .client import RentalClient
+from .config import SERVICE_URL, STORAGE_BACKEND
+from .customer import CustomerData, normalize_contact
+from .database import CAR_KEYS, CUSTOMER_KEYS, DATE_FORMAT
 from .logger import logger
+from .profiling import StartupProfiler
+from .records import parse_record_date
+from .service import RentalService, VersionConflictError
+from .singleton import warm_up
 from .staff import StaffData
+from .validator import iso_date, validate
+from .widgets import VirtualTreeview
+from .worker import BackgroundWorker
+
+IMPORT_TIME = time.perf_counter() - IMPORT_START
 
-car_data = CarData()
-customer_data = CustomerData()
-staff_data = StaffData()
-database = Database()
+# The busy indicator only shows up for work that takes longer than this.
+BUSY_DELAY_MS = 200
+# Rental form fields checked before a booking is sent.
+VALIDATED_FIELDS = ("contact", "email", "start_date", "end_date")
 
 
 class RentalCarApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, preload: bool = True):
         super().__init__()
-        database.create_tables()
-        database.populate_table("cars")
         self.title("Car Rental App")
         self.resizable(True, True)
-
+        # Every backend / data layer call goes through the worker,
+        # Tk callbacks only collect widget values and draw results.
+        self.worker = BackgroundWorker(self, on_busy=self.show_busy)
+        # With a service URL every terminal shares the data held by the
+        # service, otherwise this process works on data/* itself.
+        self.backend = RentalClient(SERVICE_URL) if SERVICE_URL else RentalService()
+        # Record versions last seen, sent back with writes, see RentalService.
+        self.car_versions: dict[str, str] = {}
+        self.rental_customer_version: tuple[str, str] | None = None
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.create_status_bar()
         self.create_login_screen()
+        # Nothing is read from disk here. Local JSON data is loaded on a
+        # background thread while the login screen waits for input.
+        if preload and not SERVICE_URL and STORAGE_BACKEND == "json":
+            warm_up(StaffData, CarData, CustomerData, BookingData)
         self.car_selection_hide_column = ["ID", "start_date", "end_date"]
-        self.car_selection_header = list(car_data.load_car_data()[0].keys())
-        self.car_monitor_header = list(car_data.load_car_data()[0].keys())
-        self.customer_header = list(customer_data.load_customer_data()[0].keys())
+        self.car_selection_header = list(CAR_KEYS)
+        self.car_monitor_header = list(CAR_KEYS)
+        self.customer_header = list(CUSTOMER_KEYS)
+
+    def create_status_bar(self):
+        self.status_frame = ttk.Frame(self)
+        self.busy_bar = ttk.Progressbar(
+            self.status_frame, mode="indeterminate", length=100
+        )
+        self.busy_stop = ttk.Button(
+            self.status_frame, text="Stop", command=self.worker.cancel_all
+        )
+        self.busy_after_id = None
+        self.status_frame.pack(side="bottom", fill="x")
+
+    def show_busy(self, busy: bool):
+        if busy:
+            self.busy_after_id = self.after(BUSY_DELAY_MS, self.show_busy_bar)
+            return
+        if self.busy_after_id is not None:
+            self.after_cancel(self.busy_after_id)
+            self.busy_after_id = None
+        self.busy_bar.stop()
+        self.busy_bar.pack_forget()
+        self.busy_stop.pack_forget()
+        self.configure(cursor="")
+
+    def show_busy_bar(self):
+        self.busy_after_id = None
+        self.busy_stop.pack(side="right", padx=5, pady=2)
+        self.busy_bar.pack(side="right", pady=2)
+        self.busy_bar.start()
+        self.configure(cursor="watch")
+
+    def close(self):
+        self.worker.shutdown()
+        self.destroy()
 
     def destroy_screens(self):
+        # Pending reads would draw into the widgets about to be destroyed.
+        self.worker.cancel_all()
         try:
             self.login_frame.destroy()
         except AttributeError:
@@ -56,7 +124,7 @@ class RentalCarApp(tk.Tk):
         )
 
         # login_button = ttk.Button(self.login_frame, text="Login", command=self.perform_login)
-        login_button = ttk.Button(
+        self.login_button = ttk.Button(
             self.login_frame, text="Login", command=self.validate_login
         )
 
@@ -68,7 +136,7 @@ class RentalCarApp(tk.Tk):
         password_label.grid(row=2, column=0, padx=5, pady=5)
         password_entry.grid(row=2, column=1, padx=5, pady=5)
 
-        login_button.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
+        self.login_button.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
 
         self.login_frame.pack(pady=20)
 
@@ -78,7 +146,15 @@ class RentalCarApp(tk.Tk):
     def validate_login(self):
         self.create_page_selection_screen()
         return
-        status = staff_data.is_staff(self.current_user.get(), self.current_password.get())
+        self.worker.submit(
+            self.backend.is_staff,
+            self.current_user.get(),
+            self.current_password.get(),
+            on_done=self.on_login_checked,
+            key="login",
+        )
+
+    def on_login_checked(self, status: bool):
         if status:
             self.create_page_selection_screen()
         else:
@@ -92,10 +168,12 @@ class RentalCarApp(tk.Tk):
         self.car_selection_tab = ttk.Frame(self.tab_control)
         self.car_monitor_tab = ttk.Frame(self.tab_control)
         self.customer_profile_tab = ttk.Frame(self.tab_control)
+        self.rental_history_tab = ttk.Frame(self.tab_control)
 
         self.tab_control.add(self.car_selection_tab, text="Car Selection")
         self.tab_control.add(self.car_monitor_tab, text="Car Monitoring")
         self.tab_control.add(self.customer_profile_tab, text="Customer Profile")
+        self.tab_control.add(self.rental_history_tab, text="Rental History")
         self.tab_control.pack(expand=1, fill="both")
 
         # for i, tab in enumerate(self.tab_control.winfo_children()):
@@ -105,7 +183,7 @@ class RentalCarApp(tk.Tk):
         self.create_car_selection_screen()
         self.create_car_monitoring_screen()
         self.create_customer_profile_screen()
-
+        self.create_rental_history_screen()
 
     def perform_login(self):
         pass
@@ -138,8 +216,36 @@ class RentalCarApp(tk.Tk):
             command=self.reset_select_filter,
         ).grid(row=12, column=filter_column)
 
-        self.car_selection_tree = ttk.Treeview(
+        today = date.today().strftime(DATE_FORMAT)
+        self.car_selection_start_date = tk.StringVar(self, value=today)
+        self.car_selection_end_date = tk.StringVar(self, value=today)
+        ttk.Label(self.car_selection_tab, text="From (dd/mm/yyyy)").grid(
+            row=13, column=filter_column
+        )
+        ttk.Entry(
+            self.car_selection_tab,
+            textvariable=self.car_selection_start_date,
+            justify="center",
+        ).grid(row=14, column=filter_column)
+        ttk.Label(self.car_selection_tab, text="To (dd/mm/yyyy)").grid(
+            row=15, column=filter_column
+        )
+        ttk.Entry(
+            self.car_selection_tab,
+            textvariable=self.car_selection_end_date,
+            justify="center",
+        ).grid(row=16, column=filter_column)
+        ttk.Button(
+            self.car_selection_tab,
+            text="Check Availability",
+            command=lambda: self.populate_car_selection_tree(
+                data=self.car_selection_header
+            ),
+        ).grid(row=17, column=filter_column, pady=5)
+
+        self.car_selection_tree = VirtualTreeview(
             self.car_selection_tab,
+            worker=self.worker,
             columns=list(self.car_selection_header),
             show="headings",
         )
@@ -169,7 +275,7 @@ class RentalCarApp(tk.Tk):
             ),
         ).grid(row=12, column=0, columnspan=1, padx=5, pady=5)
 
-        self.geometry("699x322+340+288")
+        self.geometry("699x450+340+288")
 
     def reset_select_filter(self):
         filter_column = 2
@@ -204,39 +310,96 @@ class RentalCarApp(tk.Tk):
         self.car_selection_filter_seat.grid(row=8, column=filter_column)
         self.car_selection_filter_status.grid(row=10, column=filter_column)
 
-        self.populate_car_selection_filter(data=car_data.load_car_data())
-
-    def populate_car_selection_filter(self, data: list[str]):
-        info = {}
-        for items in data[0]:
-            if items != "ID":
-                info[items] = set("")
-        for items in data:
-            for key, value in items.items():
-                for temp in info.keys():
-                    if key == temp:
-                        info[key].add(value)
-                        break
-        # print(info)
-        self.car_selection_filter_brand["values"] = list(info["brand"])
-        self.car_selection_filter_model["values"] = list(info["model"])
-        self.car_selection_filter_engine["values"] = list(info["engine_type"])
-        self.car_selection_filter_seat["values"] = list(info["seat_capacity"])
-        self.car_selection_filter_status["values"] = list(info["status"])
-
-        self.car_selection_filter_brand.configure(justify="center")
-        self.car_selection_filter_model.configure(justify="center")
-        self.car_selection_filter_engine.configure(justify="center")
-        self.car_selection_filter_seat.configure(justify="center")
-        self.car_selection_filter_status.configure(justify="center")
+        self.car_selection_filters = {
+            "brand": self.car_selection_filter_brand,
+            "model": self.car_selection_filter_model,
+            "engine_type": self.car_selection_filter_engine,
+            "seat_capacity": self.car_selection_filter_seat,
+            "status": self.car_selection_filter_status,
+        }
+        self.car_selection_criteria = {}
+        self.car_selection_filter_labels = {}
+        for field, combobox in self.car_selection_filters.items():
+            combobox.configure(state="readonly")
+            combobox.bind(
+                "<<ComboboxSelected>>",
+                lambda event, field=field: self.apply_select_filter(field),
+            )
+
+        self.populate_car_selection_filter()
+        try:
+            self.populate_car_selection_tree(data=self.car_selection_header)
+        except AttributeError:
+            print("Widget yet to exist.")
+
+    def populate_car_selection_filter(self):
+        self.worker.submit(
+            self.count_car_facets,
+            dict(self.car_selection_criteria),
+            list(self.car_selection_filters),
+            on_done=self.show_car_selection_filter,
+            key="car_selection_filter",
+        )
+
+    def count_car_facets(self, criteria: dict, fields: list[str]) -> dict[str, dict]:
+        """Runs on the worker thread, must not touch Tk."""
+        # Dropdown entries read "value (count)", counted among the cars that
+        # match the other selected filters.
+        facets = {}
+        for field in fields:
+            others = {key: value for key, value in criteria.items() if key != field}
+            facets[field] = self.backend.facet_counts(field, **others)
+        return facets
+
+    def show_car_selection_filter(self, facets: dict[str, dict]):
+        self.car_selection_filter_labels = {}
+        for field, combobox in self.car_selection_filters.items():
+            counts = facets[field]
+            labels = {f"{value} ({count})": value for value, count in counts.items()}
+            self.car_selection_filter_labels[field] = labels
+            combobox["values"] = list(labels)
+            if field in self.car_selection_criteria:
+                value = self.car_selection_criteria[field]
+                combobox.set(f"{value} ({counts.get(value, 0)})")
+
+    def apply_select_filter(self, field: str):
+        label = self.car_selection_filters[field].get()
+        self.car_selection_criteria[field] = self.car_selection_filter_labels[field][
+            label
+        ]
+        self.populate_car_selection_filter()
+        self.populate_car_selection_tree(data=self.car_selection_header)
 
     def populate_car_selection_tree(self, data: list[str]):
-        self.car_selection_tree.delete(*self.car_selection_tree.get_children())
-        for item in car_data.load_car_data():
-            if item["status"] == "available":
-                self.car_selection_tree.insert(
-                    "", "end", values=(tuple(item[info] for info in data))
-                )
+        self.worker.submit(
+            self.find_available_car_ids,
+            dict(self.car_selection_criteria),
+            self.car_selection_start_date.get(),
+            self.car_selection_end_date.get(),
+            on_done=lambda car_ids: self.show_car_selection_tree(car_ids, data),
+            on_error=self.warn_invalid_date_range,
+            key="car_selection_tree",
+        )
+
+    def find_available_car_ids(self, criteria: dict, start_date: str, end_date: str):
+        """Runs on the worker thread, must not touch Tk."""
+        return self.backend.available_car_ids(criteria, start_date, end_date)
+
+    def warn_invalid_date_range(self, error: Exception):
+        if not isinstance(error, ValueError):
+            raise error
+        messagebox.showwarning(
+            "Warning!!!", "Please enter a valid date range as dd/mm/yyyy."
+        )
+
+    def show_car_selection_tree(self, car_ids: list[str], data: list[str]):
+        # fetch is called by the tree on the worker thread.
+        def fetch(offset, limit):
+            cars = self.backend.get_cars(car_ids[offset : offset + limit])
+            self.remember_car_versions(cars)
+            return [tuple(item[info] for info in data) for item in cars]
+
+        self.car_selection_tree.set_source(len(car_ids), fetch)
         for col in self.car_selection_tree["columns"]:
             self.car_selection_tree.column(col, anchor="center", width=100)
 
@@ -245,8 +408,9 @@ class RentalCarApp(tk.Tk):
         ttk.Label(self.car_monitor_tab, text="Car Monitoring").grid(
             row=0, column=0, padx=10, pady=10
         )
-        self.car_monitoring_tree = ttk.Treeview(
+        self.car_monitoring_tree = VirtualTreeview(
             self.car_monitor_tab,
+            worker=self.worker,
             columns=list(self.car_monitor_header),
             show="headings",
         )
@@ -262,14 +426,59 @@ class RentalCarApp(tk.Tk):
         car_tree_vert_scrollbar.grid(row=1, column=1, rowspan=10, padx=5, pady=5, sticky="W")
         self.car_monitoring_tree.configure(yscrollcommand=car_tree_vert_scrollbar.set)
 
+        ttk.Button(
+            self.car_monitor_tab,
+            text="Return",
+            command=lambda: self.return_car(
+                self.car_monitoring_tree.item(self.car_monitoring_tree.focus())
+            ),
+        ).grid(row=12, column=0, columnspan=1, padx=5, pady=5)
+
         print(self.geometry())
 
+    def return_car(self, data):
+        if data["values"] == "":
+            messagebox.showwarning("Warning!!!", "Please select a car first.")
+            return
+        car_id = data["values"][0]
+        self.worker.submit(
+            self.backend.return_car,
+            car_id,
+            self.car_versions.get(car_id),
+            on_done=self.on_car_returned,
+            on_error=self.on_car_return_failed,
+            cancellable=False,
+        )
+
+    def remember_car_versions(self, cars: list[dict]):
+        for item in cars:
+            self.car_versions[item["ID"]] = item["version"]
+
+    def on_car_return_failed(self, error: Exception):
+        if not isinstance(error, VersionConflictError):
+            raise error
+        messagebox.showwarning(
+            "Warning!!!", "The car was changed on another terminal, please retry."
+        )
+        self.car_monitoring_tree.refresh()
+
+    def on_car_returned(self, result):
+        self.car_monitoring_tree.refresh()
+        # Keep the dropdown counts of the car selection tab live.
+        self.populate_car_selection_filter()
+        self.populate_car_selection_tree(data=self.car_selection_header)
+
     def populate_car_monitoring_tree(self, data, filter=None):
-        self.car_monitoring_tree.delete(*self.car_monitoring_tree.get_children())
-        for item in car_data.load_car_data():
-            self.car_monitoring_tree.insert(
-                "", "end", values=(tuple(item[info] for info in data))
-            )
+        def fetch(offset, limit):
+            cars = self.backend.car_page(offset, limit)
+            self.remember_car_versions(cars)
+            return [tuple(item[info] for info in data) for item in cars]
+
+        self.worker.submit(
+            self.backend.car_count,
+            on_done=lambda count: self.car_monitoring_tree.set_source(count, fetch),
+            key="car_monitoring_tree",
+        )
         for col in self.car_monitoring_tree["columns"]:
             self.car_monitoring_tree.column(col, anchor="center", width=100)
 
@@ -279,6 +488,7 @@ class RentalCarApp(tk.Tk):
             messagebox.showwarning("Warning!!!", "Please select a car first.")
             return
         self.temp_rental_info = data
+        self.worker.cancel_all()
         self.tab_control.destroy()
         self.rental_screen = ttk.Frame(self)
         ttk.Label(self.rental_screen, text="Rental Screen", font=("Arial", 25)).grid(
@@ -294,8 +504,12 @@ class RentalCarApp(tk.Tk):
         self.rental_engine = tk.StringVar(self)
         self.rental_seat = tk.StringVar(self)
         self.rental_status = tk.StringVar(self)
-        self.rental_start_date = tk.StringVar(self)
-        self.rental_end_date = tk.StringVar(self)
+        self.rental_start_date = tk.StringVar(
+            self, value=self.car_selection_start_date.get()
+        )
+        self.rental_end_date = tk.StringVar(
+            self, value=self.car_selection_end_date.get()
+        )
 
         ttk.Label(self.rental_screen, text="Brand").grid(
             row=2, column=0, sticky="W", padx=10
@@ -362,6 +576,22 @@ class RentalCarApp(tk.Tk):
         rental_start_date_entry.grid(row=7, column=1, sticky="W", padx=10)
         rental_start_end_entry.grid(row=8, column=1, sticky="W", padx=10)
 
+        # The days the car is already booked are highlighted, fetched for the
+        # month on display.
+        start = iso_date(self.rental_start_date.get()) or date.today().isoformat()
+        self.rental_calendar = Calendar(
+            self.rental_screen,
+            selectmode="none",
+            year=int(start[:4]),
+            month=int(start[5:7]),
+        )
+        self.rental_calendar.tag_config("booked", background="red", foreground="white")
+        self.rental_calendar.grid(row=2, column=2, rowspan=7, padx=10)
+        self.rental_calendar.bind(
+            "<<CalendarMonthChanged>>", lambda event: self.populate_rental_calendar()
+        )
+        self.populate_rental_calendar()
+
         ttk.Separator(self.rental_screen, orient="horizontal").grid(
             row=9, column=0, columnspan=10, sticky="EW"
         )
@@ -384,12 +614,20 @@ class RentalCarApp(tk.Tk):
             row=13, column=0, sticky="W", padx=10
         )
 
-        ttk.Entry(self.rental_screen, textvariable=self.rental_name).grid(
-            row=10, column=1, sticky="W", padx=10
+        # Type-ahead on the name for returning customers.
+        self.rental_suggestions = []
+        self.rental_customer_version = None
+        self.rental_name_entry = ttk.Combobox(
+            self.rental_screen, textvariable=self.rental_name
         )
-        ttk.Entry(self.rental_screen, textvariable=self.rental_contact).grid(
-            row=11, column=1, sticky="W", padx=10
+        self.rental_name_entry.grid(row=10, column=1, sticky="W", padx=10)
+        self.rental_name_entry.bind("<KeyRelease>", self.suggest_customers)
+        self.rental_name_entry.bind("<<ComboboxSelected>>", self.select_suggestion)
+        rental_contact_entry = ttk.Entry(
+            self.rental_screen, textvariable=self.rental_contact
         )
+        rental_contact_entry.grid(row=11, column=1, sticky="W", padx=10)
+        rental_contact_entry.bind("<FocusOut>", self.fill_customer_by_contact)
         ttk.Entry(self.rental_screen, textvariable=self.rental_address).grid(
             row=12, column=1, sticky="W", padx=10
         )
@@ -397,9 +635,10 @@ class RentalCarApp(tk.Tk):
             row=13, column=1, sticky="W", padx=10
         )
 
-        ttk.Button(
+        self.rent_button = ttk.Button(
             self.rental_screen, text="Rent", command=self.rental_confirmation_screen
-        ).grid(row=14, column=0, padx=10)
+        )
+        self.rent_button.grid(row=14, column=0, padx=10)
         ttk.Button(
             self.rental_screen, text="Cancel", command=self.create_page_selection_screen
         ).grid(row=14, column=1, padx=10)
@@ -408,6 +647,73 @@ class RentalCarApp(tk.Tk):
 
         self.geometry("358x309+340+288")
 
+    def suggest_customers(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        # A newer keystroke cancels the search of the previous one.
+        self.worker.submit(
+            self.backend.search_customers,
+            self.rental_name.get(),
+            on_done=self.show_suggestions,
+            key="customer_search",
+        )
+
+    def show_suggestions(self, suggestions: list[dict]):
+        self.rental_suggestions = suggestions
+        self.rental_name_entry["values"] = [
+            f"{info['full_name']} <{info['email']}>"
+            for info in self.rental_suggestions
+        ]
+
+    def select_suggestion(self, event):
+        index = self.rental_name_entry.current()
+        if 0 <= index < len(self.rental_suggestions):
+            self.fill_customer_fields(self.rental_suggestions[index])
+
+    def fill_customer_by_contact(self, event):
+        self.worker.submit(
+            self.backend.find_customer,
+            self.rental_contact.get(),
+            on_done=self.on_customer_found,
+            key="customer_contact",
+        )
+
+    def on_customer_found(self, info: dict | None):
+        if info is not None and not self.rental_name.get():
+            self.fill_customer_fields(info)
+
+    def populate_rental_calendar(self):
+        if not self.temp_rental_info["values"]:
+            return
+        month, year = self.rental_calendar.get_displayed_month()
+        first = date(year, month, 1)
+        last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        self.worker.submit(
+            self.backend.booked_days,
+            self.temp_rental_info["values"][0],
+            first.strftime(DATE_FORMAT),
+            last.strftime(DATE_FORMAT),
+            on_done=self.show_rental_calendar,
+            key="rental_calendar",
+        )
+
+    def show_rental_calendar(self, days: list[str]):
+        self.rental_calendar.calevent_remove("all")
+        for day in days:
+            self.rental_calendar.calevent_create(
+                parse_record_date(day), "Booked", "booked"
+            )
+
+    def fill_customer_fields(self, info: dict):
+        self.rental_customer_version = (
+            normalize_contact(info["contact"]),
+            info["version"],
+        )
+        self.rental_name.set(info["full_name"])
+        self.rental_contact.set(info["contact"])
+        self.rental_address.set(info["address"])
+        self.rental_email.set(info["email"])
+
     def rental_confirmation_screen(self):
         customer_rental_data = {
             "full_name": self.rental_name.get(),
@@ -423,17 +729,73 @@ class RentalCarApp(tk.Tk):
             "start_date": self.rental_start_date.get(),
             "end_date": self.rental_end_date.get(),
         }
-        customer_data.update_customer_data(customer_rental_data)
-        car_data.update_car_data(car_rental_data)
+        report = validate(
+            {name: [customer_rental_data[name]] for name in VALIDATED_FIELDS}
+        )
+        if not report.ok:
+            messagebox.showwarning(
+                "Warning!!!",
+                "Please correct: " + ", ".join(
+                    name.replace("_", " ") for name in report.fields()
+                ),
+            )
+            return
+        # Only vouch for the customer version if it is still the same customer.
+        customer_version = None
+        if self.rental_customer_version is not None:
+            contact, version = self.rental_customer_version
+            if contact == normalize_contact(customer_rental_data["contact"]):
+                customer_version = version
+        # Disabled until the booking is written, a second click would book twice.
+        self.rent_button.state(["disabled"])
+        self.worker.submit(
+            self.backend.book,
+            customer_rental_data,
+            car_rental_data,
+            self.car_versions.get(car_rental_data["ID"]),
+            customer_version,
+            on_done=self.on_rental_booked,
+            on_error=self.on_rental_failed,
+            cancellable=False,
+        )
+
+    def on_rental_booked(self, result):
         self.create_page_selection_screen()
         self.tab_control.select(1)
 
+    def on_rental_failed(self, error: Exception):
+        if self.rent_button.winfo_exists():
+            self.rent_button.state(["!disabled"])
+        if isinstance(error, VersionConflictError):
+            # Take over the current record so the next try compares against it.
+            current = error.current or {}
+            if "ID" in current:
+                self.car_versions[current["ID"]] = current["version"]
+            elif "contact" in current:
+                self.fill_customer_fields(current)
+            messagebox.showwarning(
+                "Warning!!!",
+                "This car or customer was changed on another terminal, "
+                "please check the details and try again.",
+            )
+        elif isinstance(error, BookingConflictError):
+            messagebox.showwarning(
+                "Warning!!!", "The car is already booked within these dates."
+            )
+        elif isinstance(error, ValueError):
+            messagebox.showwarning(
+                "Warning!!!", "Please enter a valid date range as dd/mm/yyyy."
+            )
+        else:
+            raise error
+
     def create_customer_profile_screen(self):
         ttk.Label(self.customer_profile_tab, text="Customer Profile").grid(
             row=0, column=0, padx=10, pady=10
         )
-        self.customer_tree = ttk.Treeview(
+        self.customer_tree = VirtualTreeview(
             self.customer_profile_tab,
+            worker=self.worker,
             columns=list(self.customer_header),
             show="headings",
         )
@@ -442,23 +804,146 @@ class RentalCarApp(tk.Tk):
         self.customer_tree.grid(
             row=1, column=0, rowspan=10, columnspan=1, padx=5, pady=5
         )
+
+        customer_tree_vert_scrollbar = ttk.Scrollbar(self.customer_profile_tab, orient="vertical", command=self.customer_tree.yview)
+        customer_tree_vert_scrollbar.grid(row=1, column=1, rowspan=10, padx=5, pady=5, sticky="W")
+        self.customer_tree.configure(yscrollcommand=customer_tree_vert_scrollbar.set)
+
         self.populate_customer_tree(data=self.customer_header)
 
     def populate_customer_tree(self, data):
-        self.customer_tree.delete(*self.customer_tree.get_children())
-        for item in customer_data.load_customer_data():
-            self.customer_tree.insert(
-                "", "end", values=(tuple(item[info] for info in data))
-            )
+        def fetch(offset, limit):
+            return [
+                tuple(item[info] for info in data)
+                for item in self.backend.customer_page(offset, limit)
+            ]
+
+        self.worker.submit(
+            self.backend.customer_count,
+            on_done=lambda count: self.customer_tree.set_source(count, fetch),
+            key="customer_tree",
+        )
         for col in self.customer_tree["columns"]:
             self.customer_tree.column(col, anchor="center")
         return
 
     def create_rental_history_screen(self):
-        pass
+        ttk.Label(self.rental_history_tab, text="Rental History").grid(
+            row=0, column=0, padx=10, pady=10
+        )
+        today = date.today()
+        first_day = today.replace(day=1)
+        next_month = (first_day + timedelta(days=32)).replace(day=1)
+        self.history_start_date = tk.StringVar(
+            self, value=first_day.strftime(DATE_FORMAT)
+        )
+        self.history_end_date = tk.StringVar(
+            self, value=(next_month - timedelta(days=1)).strftime(DATE_FORMAT)
+        )
+        range_frame = ttk.Frame(self.rental_history_tab)
+        ttk.Label(range_frame, text="From").pack(side="left")
+        ttk.Entry(
+            range_frame, textvariable=self.history_start_date, width=12, justify="center"
+        ).pack(side="left", padx=5)
+        ttk.Label(range_frame, text="To").pack(side="left")
+        ttk.Entry(
+            range_frame, textvariable=self.history_end_date, width=12, justify="center"
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            range_frame, text="Refresh", command=self.populate_rental_history
+        ).pack(side="left", padx=5)
+        range_frame.grid(row=1, column=0, columnspan=2, sticky="W", padx=5)
+
+        self.history_summary = tk.StringVar(self)
+        ttk.Label(self.rental_history_tab, textvariable=self.history_summary).grid(
+            row=2, column=0, columnspan=2, sticky="W", padx=5, pady=5
+        )
+
+        self.history_model_tree = ttk.Treeview(
+            self.rental_history_tab,
+            columns=["month", "brand", "model", "rentals"],
+            show="headings",
+            height=8,
+        )
+        self.history_utilization_tree = ttk.Treeview(
+            self.rental_history_tab,
+            columns=["car", "booked_days", "utilization_%"],
+            show="headings",
+            height=8,
+        )
+        for tree in (self.history_model_tree, self.history_utilization_tree):
+            for col in tree["columns"]:
+                tree.heading(col, text=col, anchor=tk.CENTER)
+                tree.column(col, anchor="center", width=80)
+        self.history_model_tree.grid(row=3, column=0, padx=5, pady=5)
+        self.history_utilization_tree.grid(row=3, column=1, padx=5, pady=5)
+
+        self.populate_rental_history()
+
+    def populate_rental_history(self):
+        # Reads the precomputed aggregates, not the raw events.
+        self.worker.submit(
+            self.backend.rental_summary,
+            self.history_start_date.get(),
+            self.history_end_date.get(),
+            on_done=self.show_rental_history,
+            on_error=self.warn_invalid_date_range,
+            key="rental_history",
+        )
+
+    def show_rental_history(self, summary: dict):
+        self.history_summary.set(
+            f"{summary['rentals']} rental(s), "
+            f"{summary['average_days']} day(s) on average"
+        )
+        for tree, rows in (
+            (self.history_model_tree, summary["by_model_month"]),
+            (self.history_utilization_tree, summary["utilization"]),
+        ):
+            tree.delete(*tree.get_children())
+            for values in rows:
+                tree.insert("", "end", values=values)
+
+
+def profile_startup():
+    """Print how long each startup phase takes, then close the app."""
+    profiler = StartupProfiler()
+    profiler.add("import", IMPORT_TIME)
+    with profiler.phase("login window"):
+        # Without the warm-up, so the loads below are measured one by one.
+        app = RentalCarApp(preload=False)
+    with profiler.phase("first paint"):
+        app.update()
+    profiler.add("total to first paint", time.perf_counter() - IMPORT_START)
+    # Deferred until first use, measured one by one here.
+    with profiler.phase("load cars"):
+        app.backend.car_count()
+    with profiler.phase("load customers"):
+        app.backend.customer_count()
+    with profiler.phase("load bookings"):
+        BookingData().load_booking_data()
+    with profiler.phase("load staff"):
+        StaffData().load_staff_data()
+    with profiler.phase("main screen"):
+        app.create_page_selection_screen()
+        while app.worker.is_busy():
+            app.update()
+            time.sleep(0.001)
+        app.update()
+    app.close()
+    print(profiler.report())
 
 
 if __name__ == "__main__":
-    app = RentalCarApp()
-    app.mainloop()
-    app.mainloop()
+    parser = argparse.ArgumentParser(description="Car rental app.")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print the startup phase timings and exit",
+    )
+    args = parser.parse_args()
+    if args.profile_startup:
+        profile_startup()
+    else:
+        app = RentalCarApp()
+        app.mainloop()
@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StartupProfiler:
+    """Collect named phase timings and print them as a table."""
+
+    def __init__(self):
+        self.phases: list[tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def report(self) -> str:
+        width = max([len(name) for name, _ in self.phases] + [len("phase")])
+        lines = [f"{'phase':<{width}}{'ms':>10}"]
+        for name, seconds in self.phases:
+            lines.append(f"{name:<{width}}{seconds * 1000:>10.1f}")
+        return "\n".join(lines)
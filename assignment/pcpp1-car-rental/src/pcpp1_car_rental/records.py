@@ -0,0 +1,102 @@
+import csv
+import json
+import re
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+from typing import Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_skip_separators = re.compile(r"[\s,]*").match
+_non_digit = re.compile(r"\D")
+
+
+def normalize_contact(contact: str) -> str:
+    """Reduce a phone number to its digits, so 824-384-7067 == 8243847067."""
+    return _non_digit.sub("", contact)
+
+
+@lru_cache(maxsize=4096)
+def parse_record_date(value: str) -> date | None:
+    """Parse a dd/mm/yyyy date, empty means no date.
+
+    Splitting by hand is several times faster than ``strptime`` and the
+    cache makes the many repeated booking dates of an import almost free.
+    """
+    if not value:
+        return None
+    day, month, year = value.split("/")
+    return date(int(year), int(month), int(day))
+
+
+@lru_cache(maxsize=4096)
+def day_ordinal(value: str) -> int:
+    """The dd/mm/yyyy date as its proleptic Gregorian ordinal.
+
+    Unlike ``parse_record_date`` an empty date is an error, ValueError as for
+    any other date that does not parse.
+    """
+    parsed = parse_record_date(value)
+    if parsed is None:
+        raise ValueError("Missing date.")
+    return parsed.toordinal()
+
+
+def format_record_date(value: date | None) -> str:
+    if value is None:
+        return ""
+    return f"{value.day:02d}/{value.month:02d}/{value.year}"
+
+
+def iter_csv_rows(path: str, fields: tuple[str, ...]) -> Iterator[tuple]:
+    """Yield each CSV row as a tuple ordered like ``fields``."""
+    with open(path, "r", newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        indexes = [header.index(field) for field in fields]
+        if len(indexes) == 1:
+            # itemgetter with a single index returns the value, not a tuple.
+            (index,) = indexes
+            pick = lambda row: (row[index],)
+        else:
+            pick = itemgetter(*indexes)
+        for row in reader:
+            yield pick(row)
+
+
+def iter_json_records(path: str) -> Iterator[dict]:
+    """Yield the objects of the ``"data"`` array of a JSON file one at a time.
+
+    Only the current chunk and the record being decoded are kept in memory,
+    unlike ``json.load`` which builds the whole document first.
+    """
+    with open(path, "r") as file:
+        buffer = ""
+        position = -1
+        while position < 0:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            buffer += chunk
+            key = buffer.find('"data"')
+            if key >= 0:
+                position = buffer.find("[", key)
+        buffer = buffer[position + 1 :]
+        index = 0
+        while True:
+            index = _skip_separators(buffer, index).end()
+            if index < len(buffer) and buffer[index] == "]":
+                return
+            try:
+                record, index = _decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError:
+                # The record continues in the next chunk.
+                chunk = file.read(CHUNK_SIZE)
+                if not chunk:
+                    raise
+                buffer = buffer[index:] + chunk
+                index = 0
+                continue
+            yield record
@@ -0,0 +1,387 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import threading
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .booking import BookingConflictError, BookingData
+from .car import CAR_INDEX_FIELDS, CarData
+from .config import SERVICE_HOST, SERVICE_PORT
+from .customer import CustomerData
+from .history import RentalHistory
+from .logger import logger
+from .records import format_record_date, parse_record_date
+from .staff import StaffData
+
+
+class VersionConflictError(Exception):
+    """The record changed since the client read it."""
+
+    def __init__(self, message: str, current: dict | None = None):
+        super().__init__(message)
+        self.current = current
+
+
+def record_version(info: dict | None) -> str:
+    """The version of a record: a hash of its fields as stored, "" if none.
+
+    Derived from the stored data, so it survives a restart of the service and
+    is the same in every process that reads the same files or database.
+    """
+    if info is None:
+        return ""
+    fields = {key: value for key, value in info.items() if key != "version"}
+    data = json.dumps(fields, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def parse_criteria(query: dict) -> dict:
+    """Pick the car filter fields out of a query string, typed like car.json."""
+    criteria = {field: query[field] for field in CAR_INDEX_FIELDS if field in query}
+    if "seat_capacity" in criteria:
+        criteria["seat_capacity"] = int(criteria["seat_capacity"])
+    return criteria
+
+
+class RentalService:
+    """The operations of the app on the in-memory data, with record versions.
+
+    Every car and customer carries a version, see record_version, which
+    changes with each write to it. A write can pass the version its client
+    last saw; if the record changed since, it fails with VersionConflictError
+    instead of overwriting the other terminal's change. Without a version the
+    write is applied as before.
+
+    The app uses this class directly when no service URL is configured,
+    otherwise ``RentalServer`` exposes it over HTTP to ``client.RentalClient``.
+    Writes hold a lock from the version check to the last store, so calls
+    from several threads never interleave a check with another write.
+    """
+
+    def __init__(self):
+        self._write_lock = threading.RLock()
+
+    def car_count(self) -> int:
+        return CarData().car_count()
+
+    def car_page(self, offset: int, limit: int) -> list[dict]:
+        return [self._car(info) for info in CarData().load_car_page(offset, limit)]
+
+    def get_car(self, car_id: str) -> dict | None:
+        info = CarData().get_car(car_id)
+        return self._car(info) if info is not None else None
+
+    def get_cars(self, car_ids: list[str]) -> list[dict]:
+        cars = []
+        for car_id in car_ids:
+            info = CarData().get_car(car_id)
+            if info is not None:
+                cars.append(self._car(info))
+        return cars
+
+    def facet_counts(self, field: str, **criteria) -> dict:
+        return CarData().facet_counts(field, **criteria)
+
+    def available_car_ids(
+        self, criteria: dict, start_date: str, end_date: str
+    ) -> list[str]:
+        return BookingData().available_car_ids(
+            CarData().find_car_ids(**criteria), start_date, end_date
+        )
+
+    def booked_days(self, car_id: str, start_date: str, end_date: str) -> list[str]:
+        return BookingData().booked_days(car_id, start_date, end_date)
+
+    def customer_count(self) -> int:
+        return CustomerData().customer_count()
+
+    def customer_page(self, offset: int, limit: int) -> list[dict]:
+        return [
+            self._customer(info)
+            for info in CustomerData().load_customer_page(offset, limit)
+        ]
+
+    def find_customer(self, contact: str) -> dict | None:
+        info = CustomerData().find_customer(contact)
+        return self._customer(info) if info is not None else None
+
+    def search_customers(self, prefix: str, limit: int = 10) -> list[dict]:
+        return [
+            self._customer(info)
+            for info in CustomerData().search_customers(prefix, limit)
+        ]
+
+    def is_staff(self, username: str, password: str) -> bool:
+        return StaffData().is_staff(username, password)
+
+    def book(
+        self,
+        customer: dict,
+        car: dict,
+        car_version: str | None = None,
+        customer_version: str | None = None,
+    ) -> dict:
+        """Store the customer, the booking and the car in one go.
+
+        ``customer`` holds the customer fields plus ``car`` and the dates,
+        ``car`` holds ``ID``, ``start_date`` and ``end_date``.
+        """
+        with self._write_lock:
+            return self._book(customer, car, car_version, customer_version)
+
+    def _book(
+        self,
+        customer: dict,
+        car: dict,
+        car_version: str | None,
+        customer_version: str | None,
+    ) -> dict:
+        self._check_version(car["ID"], car_version, lambda: self.get_car(car["ID"]))
+        self._check_version(
+            customer["contact"],
+            customer_version,
+            lambda: self.find_customer(customer["contact"]),
+        )
+        if not BookingData().is_available(
+            car["ID"], car["start_date"], car["end_date"]
+        ):
+            raise BookingConflictError(f"{car['ID']} is already booked.")
+        # The customer goes first, a booking refers to an existing customer,
+        # by the contact as it was first stored.
+        CustomerData().update_customer_data(customer)
+        contact = CustomerData().find_customer(customer["contact"])["contact"]
+        booking = BookingData().add_booking(
+            car["ID"], contact, car["start_date"], car["end_date"]
+        )
+        CarData().update_car_data(car)
+        RentalHistory().record_booking(booking, CarData().get_car(car["ID"]))
+        return booking
+
+    def return_car(self, car_id: str, version: str | None = None) -> dict | None:
+        with self._write_lock:
+            self._check_version(car_id, version, lambda: self.get_car(car_id))
+            today = format_record_date(date.today())
+            # Frees the rest of the booking, the car can be booked again at once.
+            booking = BookingData().return_car(car_id, today)
+            # Without a started booking the car is not out: a future booking
+            # keeps its status. A car rented before bookings existed has none.
+            if booking is not None or not BookingData().has_bookings_from(
+                car_id, today
+            ):
+                CarData().return_car(car_id)
+                RentalHistory().record_return(car_id, booking)
+        return self.get_car(car_id)
+
+    def rental_summary(self, start_date: str, end_date: str) -> dict:
+        """Rental counts, average length and utilization between the dates."""
+        first, last = parse_record_date(start_date), parse_record_date(end_date)
+        if first is None or last is None or last < first:
+            raise ValueError(f"Invalid range {start_date} - {end_date}.")
+        return RentalHistory().summary(first, last)
+
+    @staticmethod
+    def _car(info: dict) -> dict:
+        info["version"] = record_version(info)
+        return info
+
+    @staticmethod
+    def _customer(info: dict) -> dict:
+        info["version"] = record_version(info)
+        return info
+
+    @staticmethod
+    def _check_version(name: str, expected: str | None, load) -> None:
+        """``load`` returns the record as a client would see it, or None."""
+        if expected is None:
+            return
+        current = load()
+        if record_version(current) != expected:
+            raise VersionConflictError(f"{name} was changed meanwhile.", current)
+
+
+class RentalServer:
+    """Minimal HTTP/1.1 JSON front end of a ``RentalService``.
+
+    The event loop only parses requests and writes responses. Every service
+    call runs in the loop's default thread pool, so a slow write (each one is
+    fsynced) or password check never holds up the other connections; the
+    service's write lock keeps version checks and writes in order. An error
+    the routes do not expect is logged and answered with a 500.
+
+    Routes::
+
+        GET  /cars?offset=&limit=                -> {"count", "cars"}
+        GET  /cars?ids=A,B                       -> {"cars"}
+        GET  /cars/available?start_date=&end_date=&<filters>  -> {"ids"}
+        GET  /cars/facets/<field>?<filters>      -> {"counts": [[value, count]]}
+        GET  /cars/<id>
+        GET  /cars/<id>/booked?start_date=&end_date=  -> {"days"}
+        POST /cars/<id>/return    {"version"}
+        GET  /customers?offset=&limit=           -> {"count", "customers"}
+        GET  /customers/search?prefix=&limit=    -> {"customers"}
+        GET  /customers/<contact>
+        POST /bookings  {"customer", "car", "car_version", "customer_version"}
+        POST /login     {"username", "password"} -> {"staff"}
+        GET  /stats?start_date=&end_date=
+    """
+
+    def __init__(
+        self,
+        service: RentalService | None = None,
+        host: str = SERVICE_HOST,
+        port: int = SERVICE_PORT,
+    ):
+        self.service = service or RentalService()
+        self.host = host
+        self.port = port
+
+    async def serve_forever(self) -> None:
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port
+        )
+        logger.warning(f"Rental service listening on {self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            # Clients keep the connection open for the next request.
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self.respond(method, target, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(
+        self, method: str, target: str, body: bytes
+    ) -> tuple[HTTPStatus, dict]:
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            data = json.loads(body) if body else {}
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.dispatch, method, parts, query, data
+            )
+        except VersionConflictError as error:
+            return HTTPStatus.CONFLICT, {
+                "error": "version",
+                "message": str(error),
+                "current": error.current,
+            }
+        except BookingConflictError as error:
+            return HTTPStatus.CONFLICT, {"error": "booking", "message": str(error)}
+        except (KeyError, ValueError) as error:
+            return HTTPStatus.BAD_REQUEST, {"error": "invalid", "message": str(error)}
+        except Exception as error:
+            logger.error(f"{method} {target} failed: {error!r}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {
+                "error": "internal",
+                "message": str(error),
+            }
+
+    def dispatch(
+        self, method: str, parts: list[str], query: dict, data: dict
+    ) -> tuple[HTTPStatus, dict]:
+        """Route a request to the service, called in a worker thread."""
+        service = self.service
+        match method, parts:
+            case "GET", ["cars"] if "ids" in query:
+                car_ids = [car_id for car_id in query["ids"].split(",") if car_id]
+                return HTTPStatus.OK, {"cars": service.get_cars(car_ids)}
+            case "GET", ["cars"]:
+                offset, limit = int(query.get("offset", 0)), int(query.get("limit", 50))
+                return HTTPStatus.OK, {
+                    "count": service.car_count(),
+                    "cars": service.car_page(offset, limit),
+                }
+            case "GET", ["cars", "available"]:
+                car_ids = service.available_car_ids(
+                    parse_criteria(query), query["start_date"], query["end_date"]
+                )
+                return HTTPStatus.OK, {"ids": car_ids}
+            case "GET", ["cars", "facets", field]:
+                counts = service.facet_counts(field, **parse_criteria(query))
+                return HTTPStatus.OK, {"counts": list(counts.items())}
+            case "GET", ["cars", car_id]:
+                return self.found(service.get_car(car_id))
+            case "GET", ["cars", car_id, "booked"]:
+                days = service.booked_days(
+                    car_id, query["start_date"], query["end_date"]
+                )
+                return HTTPStatus.OK, {"days": days}
+            case "POST", ["cars", car_id, "return"]:
+                return self.found(service.return_car(car_id, data.get("version")))
+            case "GET", ["customers"]:
+                offset, limit = int(query.get("offset", 0)), int(query.get("limit", 50))
+                return HTTPStatus.OK, {
+                    "count": service.customer_count(),
+                    "customers": service.customer_page(offset, limit),
+                }
+            case "GET", ["customers", "search"]:
+                customers = service.search_customers(
+                    query.get("prefix", ""), int(query.get("limit", 10))
+                )
+                return HTTPStatus.OK, {"customers": customers}
+            case "GET", ["customers", contact]:
+                return self.found(service.find_customer(contact))
+            case "POST", ["bookings"]:
+                booking = service.book(
+                    data["customer"],
+                    data["car"],
+                    data.get("car_version"),
+                    data.get("customer_version"),
+                )
+                return HTTPStatus.CREATED, booking
+            case "GET", ["stats"]:
+                summary = service.rental_summary(query["start_date"], query["end_date"])
+                return HTTPStatus.OK, summary
+            case "POST", ["login"]:
+                status = service.is_staff(data["username"], data["password"])
+                return HTTPStatus.OK, {"staff": status}
+        return HTTPStatus.NOT_FOUND, {"error": "not_found"}
+
+    @staticmethod
+    def found(record: dict | None) -> tuple[HTTPStatus, dict]:
+        if record is None:
+            return HTTPStatus.NOT_FOUND, {"error": "not_found"}
+        return HTTPStatus.OK, record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the rental data over HTTP.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(RentalServer(host=args.host, port=args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
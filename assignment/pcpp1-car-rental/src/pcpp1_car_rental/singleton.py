@@ -1,15 +1,94 @@
+import inspect
+import threading
+from functools import lru_cache
+from typing import Callable
+
+
+@lru_cache(maxsize=None)
+def instance_key(cls: type, args: tuple, kwargs: tuple) -> tuple:
+    """``cls`` plus its constructor arguments bound by name, defaults applied.
+
+    ``kwargs`` are the keyword arguments as sorted (name, value) pairs. The
+    result is cached, so only the first call with given arguments binds them.
+    """
+    bound = inspect.signature(cls.__init__).bind(None, *args, **dict(kwargs))
+    bound.apply_defaults()
+    arguments = []
+    for name, value in list(bound.arguments.items())[1:]:
+        if isinstance(value, dict):
+            # **kwargs of __init__ itself.
+            value = tuple(sorted(value.items()))
+        arguments.append((name, value))
+    return (cls, tuple(arguments))
+
+
 class Singleton(type):
-    _instances = {}
+    """One instance per class and constructor arguments.
+
+    ``CarData()`` always returns the same object, ``CarData("other/data")`` a
+    second one kept for that directory. Arguments are bound to ``__init__``
+    first, so ``CarData()``, ``CarData(None)`` and ``CarData(directory=None)``
+    are the same instance. The registry is shared by every class and guarded
+    by a lock, so threads asking at the same time still get a single instance.
+    """
+
+    _instances: dict[tuple, object] = {}
+    # Reentrant: constructors create other singletons, e.g. CarData a Database.
+    _lock = threading.RLock()
     _extra_msg = None
 
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            # _instances is empty or cls is not registered yet... initialize it and create an entry
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
+        key = instance_key(cls, args, tuple(sorted(kwargs.items())))
+        # No lock once created, an instance is never replaced, only dropped.
+        instance = cls._instances.get(key)
+        if instance is None:
+            with Singleton._lock:
+                instance = cls._instances.get(key)
+                if instance is None:
+                    instance = super(Singleton, cls).__call__(*args, **kwargs)
+                    cls._instances[key] = instance
         # For silent operation, set _printout to False
         # elif kwargs.pop('_printout', True):
         #     logger.debug("Base -> __call__ -> {}: Module is already instantiated...".format(cls.__name__))
         #     if cls._extra_msg:
         #         logger.debug("Base -> __call__ -> {}: {}".format(cls.__name__, cls._extra_msg))
-        return cls._instances[cls]
+        return instance
+
+
+def reset(*classes: type) -> None:
+    """Forget the instances of ``classes``, of every class when none is given.
+
+    The next call creates a fresh instance; meant for tests and benchmarks.
+    """
+    with Singleton._lock:
+        for key in list(Singleton._instances):
+            if not classes or key[0] in classes:
+                del Singleton._instances[key]
+
+
+def warm_up(
+    *classes: type, on_done: Callable[[], None] | None = None
+) -> threading.Thread:
+    """Create ``classes`` and load their data on a background thread.
+
+    ``refresh()`` is called on every instance that has one, so the screen
+    that first needs the data finds it in memory. A failure is only logged,
+    the same call on first use will raise it again.
+    """
+
+    def run():
+        for cls in classes:
+            try:
+                refresh = getattr(cls(), "refresh", None)
+                if refresh is not None:
+                    refresh()
+            except Exception:
+                from .logger import logger
+
+                logger.exception(f"Warming up {cls.__name__} failed.")
+        if on_done is not None:
+            on_done()
 
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -1,26 +1,153 @@
-
+import argparse
+import csv
+import hashlib
+import hmac
 import json
+import os
+import secrets
+from functools import lru_cache
 from pathlib import Path
 
+from .config import PBKDF2_ITERATIONS, STORAGE_BACKEND
+from .database import Database
 from .singleton import Singleton
 
 STAFF_DATA_PATH = str(Path(__file__).parents[2].joinpath("data", "staff.json"))
+STAFF_DATA_CSV_PATH = str(Path(__file__).parents[2].joinpath("data", "staff.csv"))
+HASH_ALGORITHM = "pbkdf2_sha256"
+
+
+def hash_password(
+    password: str, iterations: int | None = None, salt: str | None = None
+) -> str:
+    """Encode ``password`` as ``pbkdf2_sha256$<iterations>$<salt>$<hash>``."""
+    iterations = iterations or PBKDF2_ITERATIONS
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac(
+        "sha256", password.encode(), bytes.fromhex(salt), iterations
+    )
+    return f"{HASH_ALGORITHM}${iterations}${salt}${digest.hex()}"
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(HASH_ALGORITHM + "$")
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check ``password`` against a hash, or against a not yet migrated plaintext."""
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode(), stored.encode())
+    _, iterations, salt, _ = stored.split("$")
+    return hmac.compare_digest(
+        hash_password(password, int(iterations), salt).encode(), stored.encode()
+    )
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    # Checked for unknown usernames, so they take as long as a wrong password.
+    return hash_password("", salt="00" * 16)
 
 
 class StaffData(metaclass=Singleton):
     def __init__(self):
-        pass
+        # username -> stored password (hash, or plaintext before migration)
+        self._credentials: dict[str, str] = {}
+        self._signature = None
+        self._database = Database() if STORAGE_BACKEND == "sqlite" else None
 
-    def load_staff_data(self) -> list[dict]:
+    def load_staff_data_csv(self) -> list[dict]:
+        with open(STAFF_DATA_CSV_PATH, "r") as file:
+            return list(csv.DictReader(file))
+
+    def load_staff_data_json(self) -> list[dict]:
         data = []
         with open(STAFF_DATA_PATH, "r") as file:
             read = json.load(file)
             data = read["data"]
         return data
 
+    def load_staff_data(self) -> list[dict]:
+        if self._database is not None:
+            return self._database.load_staff()
+        return self.load_staff_data_json()
+
+    def refresh(self) -> None:
+        """Reload the credentials only when staff.json or the staff table changed.
+
+        The JSON file is checked by mtime and size, the table by the counter
+        its triggers keep, see Database.staff_version.
+        """
+        if self._database is not None:
+            signature = self._database.staff_version()
+            if signature != self._signature:
+                self._credentials = dict(self._database.load_staff_passwords())
+                self._signature = signature
+            return
+        stat = os.stat(STAFF_DATA_PATH)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return
+        self._credentials = {
+            info["name"]: info["password"] for info in self.load_staff_data_json()
+        }
+        self._signature = signature
+
     def is_staff(self, username: str, password: str) -> bool:
-        data = self.load_staff_data()
+        self.refresh()
+        stored = self._credentials.get(username)
+        if stored is None:
+            verify_password(password, _dummy_hash())
+            return False
+        return verify_password(password, stored)
+
+    def migrate_passwords(self) -> int:
+        """Replace plaintext passwords in staff.json, staff.csv and the database.
+
+        Returns the number of passwords that were hashed.
+        """
+        migrated = 0
+        data = self.load_staff_data_json()
         for info in data:
-            if info["name"] == username and info["password"] == password:
-                return True
-        return False
\ No newline at end of file
+            if not is_hashed(info["password"]):
+                info["password"] = hash_password(info["password"])
+                migrated += 1
+        temp_path = STAFF_DATA_PATH + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"data": data}, file, indent=4)
+        os.replace(temp_path, STAFF_DATA_PATH)
+
+        hashes = {info["name"]: info["password"] for info in data}
+        rows = self.load_staff_data_csv()
+        for info in rows:
+            if not is_hashed(info["password"]):
+                # Reuse the JSON hash so both files stay identical, but only
+                # if it is the same password; the CSV may hold another one.
+                stored = hashes.get(info["name"])
+                if stored is None or not verify_password(info["password"], stored):
+                    stored = hash_password(info["password"])
+                info["password"] = stored
+        temp_path = STAFF_DATA_CSV_PATH + ".tmp"
+        with open(temp_path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=["name", "password"])
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(temp_path, STAFF_DATA_CSV_PATH)
+
+        if self._database is not None:
+            for name, password in self._database.load_staff_passwords():
+                if not is_hashed(password):
+                    self._database.set_staff_password(name, hash_password(password))
+        return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Staff credential tools.")
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="hash the plaintext passwords of staff.json, staff.csv and the database",
+    )
+    args = parser.parse_args()
+    if args.migrate:
+        print(f"{StaffData().migrate_passwords()} password(s) hashed.")
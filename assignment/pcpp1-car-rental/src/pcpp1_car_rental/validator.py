@@ -0,0 +1,200 @@
+import argparse
+import re
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Collection, Iterable, Sequence
+
+# 7 to 15 digits, optionally separated by single spaces or dashes.
+CONTACT_PATTERN = re.compile(r"\+?\d(?:[ -]?\d){6,14}")
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s.]+")
+# dd/mm/yyyy as typed in the app, or yyyy-mm-dd as stored in the database.
+DATE_PATTERN = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})|(\d{4})-(\d{2})-(\d{2})")
+SEAT_CAPACITIES = range(1, 21)
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# Records are validated this many at a time, see validate_records.
+VALIDATION_CHUNK_SIZE = 10_000
+
+
+@lru_cache(maxsize=4096)
+def iso_date(value: str) -> str | None:
+    """Return ``value`` as yyyy-mm-dd, or None when it is not a valid date.
+
+    Checked against the calendar by hand rather than by catching the
+    ValueError of ``date()``; the cache makes repeated dates free.
+    """
+    match = DATE_PATTERN.fullmatch(value)
+    if match is None:
+        return None
+    day, month, year, iso_year, iso_month, iso_day = match.groups()
+    if year is None:
+        day, month, year = iso_day, iso_month, iso_year
+    day_number, month_number, year_number = int(day), int(month), int(year)
+    if not 1 <= month_number <= 12 or day_number < 1:
+        return None
+    days = DAYS_IN_MONTH[month_number - 1]
+    if month_number == 2 and (
+        year_number % 4 == 0 and (year_number % 100 != 0 or year_number % 400 == 0)
+    ):
+        days = 29
+    if day_number > days:
+        return None
+    return f"{year}-{month_number:02d}-{day_number:02d}"
+
+
+def check_contacts(values: Sequence[str]) -> list[int]:
+    match = CONTACT_PATTERN.fullmatch
+    return [index for index, value in enumerate(values) if match(value) is None]
+
+
+def check_emails(values: Sequence[str]) -> list[int]:
+    match = EMAIL_PATTERN.fullmatch
+    return [index for index, value in enumerate(values) if match(value) is None]
+
+
+def check_dates(values: Sequence[str]) -> list[int]:
+    return [index for index, value in enumerate(values) if iso_date(value) is None]
+
+
+def check_seat_capacities(values: Sequence[int | str]) -> list[int]:
+    return [
+        index
+        for index, value in enumerate(values)
+        if not str(value).isdigit() or int(value) not in SEAT_CAPACITIES
+    ]
+
+
+def check_date_ranges(starts: Sequence[str], ends: Sequence[str]) -> list[int]:
+    """Rows whose end date is before the start date, both being valid."""
+    bad = []
+    for index, (start, end) in enumerate(zip(starts, ends)):
+        first, last = iso_date(start), iso_date(end)
+        # ISO dates compare in calendar order as plain strings.
+        if first is not None and last is not None and last < first:
+            bad.append(index)
+    return bad
+
+
+FIELD_CHECKS: dict[str, Callable[[Sequence], list[int]]] = {
+    "contact": check_contacts,
+    "email": check_emails,
+    "start_date": check_dates,
+    "end_date": check_dates,
+    "seat_capacity": check_seat_capacities,
+}
+
+
+@dataclass(slots=True)
+class ValidationReport:
+    """Row indexes that failed, per field. A valid batch has no entries."""
+
+    rows: int = 0
+    errors: dict[str, list[int]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def fields(self) -> list[str]:
+        return list(self.errors)
+
+    def invalid_rows(self) -> list[int]:
+        return sorted(set().union(*self.errors.values()))
+
+    def extend(self, other: "ValidationReport") -> None:
+        """Append the report of the rows that follow this batch."""
+        for name, indexes in other.errors.items():
+            self.errors.setdefault(name, []).extend(
+                index + self.rows for index in indexes
+            )
+        self.rows += other.rows
+
+    def summary(self, limit: int = 5) -> str:
+        if self.ok:
+            return f"{self.rows} rows, all valid."
+        lines = [f"{self.rows} rows, {len(self.invalid_rows())} invalid:"]
+        for name, indexes in self.errors.items():
+            shown = ", ".join(str(index) for index in indexes[:limit])
+            more = " ..." if len(indexes) > limit else ""
+            lines.append(f"  {name}: {len(indexes)} (rows {shown}{more})")
+        return "\n".join(lines)
+
+
+def validate(
+    columns: dict[str, Sequence], optional: Collection[str] = ()
+) -> ValidationReport:
+    """Check every known column of a batch in one pass per column.
+
+    ``columns`` maps a field name to the values of all rows; fields without a
+    check are ignored. Empty values are accepted for the fields in
+    ``optional``. ``date_range`` flags rows ending before they start.
+    """
+    rows = len(next(iter(columns.values()), ()))
+    report = ValidationReport(rows)
+    for name, values in columns.items():
+        check = FIELD_CHECKS.get(name)
+        if check is None:
+            continue
+        bad = check(values)
+        if name in optional:
+            bad = [index for index in bad if values[index] != ""]
+        if bad:
+            report.errors[name] = bad
+    if "start_date" in columns and "end_date" in columns:
+        bad = check_date_ranges(columns["start_date"], columns["end_date"])
+        if bad:
+            report.errors["date_range"] = bad
+    return report
+
+
+def validate_records(
+    records: Iterable[dict],
+    fields: Sequence[str],
+    optional: Collection[str] = (),
+    chunk_size: int = VALIDATION_CHUNK_SIZE,
+) -> ValidationReport:
+    """Validate ``fields`` of a stream of records, ``chunk_size`` at a time.
+
+    Only one chunk is held in memory, so a whole import file can be checked
+    before it is loaded. Row indexes in the report count from the first record.
+    """
+    report = ValidationReport()
+    records = iter(records)
+    while chunk := list(islice(records, chunk_size)):
+        columns = {name: [record[name] for record in chunk] for name in fields}
+        report.extend(validate(columns, optional))
+    return report
+
+
+if __name__ == "__main__":
+    from .car import CAR_DATA_CSV_PATH, CAR_DATA_PATH
+    from .customer import CUSTOMER_DATA_CSV_PATH, CUSTOMER_DATA_PATH
+    from .records import iter_csv_rows, iter_json_records
+
+    parser = argparse.ArgumentParser(description="Validate the data files.")
+    parser.add_argument("--source", choices=["json", "csv"], default="json")
+    args = parser.parse_args()
+
+    customer_fields = ("contact", "email", "start_date", "end_date")
+    if args.source == "csv":
+        customers = (
+            dict(zip(customer_fields, row))
+            for row in iter_csv_rows(CUSTOMER_DATA_CSV_PATH, customer_fields)
+        )
+        cars = (
+            {"seat_capacity": seats}
+            for (seats,) in iter_csv_rows(CAR_DATA_CSV_PATH, ("seat_capacity",))
+        )
+    else:
+        customers = iter_json_records(CUSTOMER_DATA_PATH)
+        cars = iter_json_records(CAR_DATA_PATH)
+    reports = {
+        "customer": validate_records(
+            customers, customer_fields, optional=("start_date", "end_date")
+        ),
+        "car": validate_records(cars, ("seat_capacity",)),
+    }
+    for name, report in reports.items():
+        print(f"{name}: {report.summary()}")
+    sys.exit(0 if all(report.ok for report in reports.values()) else 1)
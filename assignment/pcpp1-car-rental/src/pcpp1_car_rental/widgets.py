@@ -0,0 +1,222 @@
+from tkinter import ttk
+from typing import Callable
+
+# fetch(offset, limit) -> rows, each row being the tuple of values of one line.
+RowFetcher = Callable[[int, int], list[tuple]]
+
+
+class RowWindow:
+    """The rows of a virtual list that are on screen, and a buffered cache of them.
+
+    Holds no Tk state: VirtualTreeview passes in the page size, scrolls it
+    and draws what ``rows`` returns.
+    """
+
+    def __init__(self, buffer: int = 50):
+        self.buffer = buffer
+        self.row_count = 0
+        self.fetch: RowFetcher | None = None
+        self.first = 0
+        self._cache_offset = 0
+        self._cache: list[tuple] = []
+        # The last fetch came back short, the data ends with the cache.
+        self._cache_at_end = False
+
+    def set_source(self, row_count: int, fetch: RowFetcher) -> None:
+        self.row_count = row_count
+        self.fetch = fetch
+        self.first = 0
+        self.clear()
+
+    def clear(self) -> None:
+        self._cache = []
+        self._cache_at_end = False
+
+    def move_to(self, fraction: float) -> None:
+        self.first = int(fraction * self.row_count)
+
+    def move_by(self, amount: int) -> None:
+        self.first += amount
+
+    def clamp(self, page_size: int) -> None:
+        self.first = max(0, min(self.first, self.row_count - page_size))
+
+    def size(self, page_size: int) -> int:
+        return min(page_size, self.row_count - self.first)
+
+    def missing(self, page_size: int) -> tuple[int, int] | None:
+        """(offset, limit) to fetch for the window, None when it is cached.
+
+        The window is fetched with a buffer on both sides so that small
+        scrolls are served without going back to the data layer.
+        """
+        if self.fetch is None or not self.row_count:
+            return None
+        size = self.size(page_size)
+        cache_end = self._cache_offset + len(self._cache)
+        if self._cache_offset <= self.first and (
+            self.first + size <= cache_end or self._cache_at_end
+        ):
+            return None
+        return max(0, self.first - self.buffer), size + 2 * self.buffer
+
+    def store(self, offset: int, limit: int, rows: list[tuple]) -> None:
+        self._cache = rows
+        self._cache_offset = offset
+        self._cache_at_end = len(rows) < limit
+
+    def rows(self, page_size: int) -> list[tuple]:
+        """The cached rows of the window, see ``missing`` for what to fetch first."""
+        if self.fetch is None or not self.row_count:
+            return []
+        position = self.first - self._cache_offset
+        return self._cache[position : position + self.size(page_size)]
+
+    def fractions(self, page_size: int) -> tuple[float, float]:
+        if not self.row_count:
+            return 0.0, 1.0
+        last = min(self.first + page_size, self.row_count)
+        return self.first / self.row_count, last / self.row_count
+
+
+class VirtualTreeview(ttk.Treeview):
+    """Treeview that only materializes the rows currently on screen.
+
+    The data is described by a row count and a ``fetch(offset, limit)``
+    callback instead of being inserted item by item. Scrolling asks the data
+    layer for the next window, so the cost of (re)drawing depends on the
+    ``height`` of the widget rather than on the size of the data set. The
+    attached scrollbar is driven by the row count, not by the Tk items.
+
+    Items are created with their absolute row index as ``iid``, so
+    ``focus()`` and ``item()`` keep working like on a plain Treeview. Which
+    rows those are is worked out by a RowWindow.
+
+    With a ``worker`` (see ``worker.BackgroundWorker``) ``fetch`` runs off the
+    Tk thread; the current rows stay on screen until the new window arrives.
+    """
+
+    def __init__(self, master=None, buffer: int = 50, worker=None, **kw):
+        self._yscrollcommand = kw.pop("yscrollcommand", None)
+        super().__init__(master, **kw)
+        self._window = RowWindow(buffer)
+        self._worker = worker
+        self.bind("<MouseWheel>", self._on_mousewheel)
+        self.bind("<Button-4>", lambda event: self._scroll_by(-1))
+        self.bind("<Button-5>", lambda event: self._scroll_by(1))
+        self.bind("<Up>", self._on_key_up)
+        self.bind("<Down>", self._on_key_down)
+        self.bind("<Prior>", lambda event: self._scroll_by(-self._page_size()))
+        self.bind("<Next>", lambda event: self._scroll_by(self._page_size()))
+
+    def configure(self, cnf=None, **kw):
+        # The scrollbar follows the virtual rows, keep it away from Tk.
+        if isinstance(cnf, dict) and "yscrollcommand" in cnf:
+            cnf = dict(cnf)
+            self._yscrollcommand = cnf.pop("yscrollcommand")
+        if "yscrollcommand" in kw:
+            self._yscrollcommand = kw.pop("yscrollcommand")
+            self._yscrollcommand(*self._fractions())
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def set_source(self, row_count: int, fetch: RowFetcher) -> None:
+        self._window.set_source(row_count, fetch)
+        self._render()
+
+    def refresh(self) -> None:
+        """Fetch the current window again, e.g. after the data changed."""
+        self._window.clear()
+        self._render()
+
+    def row_count(self) -> int:
+        return self._window.row_count
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self._window.move_to(float(args[1]))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self._page_size()
+            self._window.move_by(amount)
+        self._render()
+
+    def _page_size(self) -> int:
+        return int(self.cget("height")) or 10
+
+    def _scroll_by(self, amount: int) -> str:
+        self.yview("scroll", amount, "units")
+        return "break"
+
+    def _on_mousewheel(self, event) -> str:
+        # Windows reports multiples of 120, macOS reports small deltas.
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_by(-step)
+
+    def _on_key_up(self, event) -> str | None:
+        focus = self.focus()
+        first = self._window.first
+        if focus and int(focus) == first and first > 0:
+            self._scroll_by(-1)
+            self._move_focus(self._window.first)
+            return "break"
+        return None
+
+    def _on_key_down(self, event) -> str | None:
+        focus = self.focus()
+        last = self._window.first + self._page_size() - 1
+        if focus and int(focus) == last and last + 1 < self._window.row_count:
+            self._scroll_by(1)
+            self._move_focus(last + 1)
+            return "break"
+        return None
+
+    def _move_focus(self, index: int) -> None:
+        if self.exists(str(index)):
+            self.focus(str(index))
+            self.selection_set(str(index))
+
+    def _render(self) -> None:
+        window = self._window
+        page_size = self._page_size()
+        window.clamp(page_size)
+        request = window.missing(page_size)
+        if request is not None:
+            offset, limit = request
+            if self._worker is not None:
+                # The current rows stay on screen until the new ones arrive.
+                self._worker.submit(
+                    window.fetch,
+                    offset,
+                    limit,
+                    on_done=lambda rows: self._on_rows(offset, limit, rows),
+                    key=f"rows-{id(self)}",
+                )
+                if self._yscrollcommand is not None:
+                    self._yscrollcommand(*self._fractions())
+                return
+            window.store(offset, limit, window.fetch(offset, limit))
+        self._draw(window.rows(page_size))
+
+    def _on_rows(self, offset: int, limit: int, rows: list[tuple]) -> None:
+        self._window.store(offset, limit, rows)
+        # Fetches again if it was scrolled away while the rows were on their way.
+        self._render()
+
+    def _draw(self, rows: list[tuple]) -> None:
+        focus = self.focus()
+        self.delete(*self.get_children())
+        for index, values in enumerate(rows, start=self._window.first):
+            self.insert("", "end", iid=str(index), values=values)
+        if focus and self.exists(focus):
+            self.focus(focus)
+            self.selection_set(focus)
+        if self._yscrollcommand is not None:
+            self._yscrollcommand(*self._fractions())
+
+    def _fractions(self) -> tuple[float, float]:
+        return self._window.fractions(self._page_size())
@@ -0,0 +1,138 @@
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from .logger import logger
+
+# A frame at 60 Hz lasts ~16 ms, one poll delivers results for at most this long.
+FRAME_BUDGET = 0.010
+POLL_INTERVAL_MS = 15
+
+
+class Task:
+    """Handle on a call submitted to ``BackgroundWorker``."""
+
+    def __init__(
+        self,
+        future: Future,
+        on_done: Callable | None,
+        on_error: Callable | None,
+        key: str | None,
+        cancellable: bool,
+    ):
+        self.future = future
+        self.on_done = on_done
+        self.on_error = on_error
+        self.key = key
+        self.cancellable = cancellable
+        self.cancelled = False
+
+    def cancel(self) -> bool:
+        """Drop the result, the call itself is skipped if it has not started."""
+        if not self.cancellable:
+            return False
+        self.cancelled = True
+        self.future.cancel()
+        return True
+
+
+class BackgroundWorker:
+    """Run data layer calls on a thread pool and deliver results on the Tk thread.
+
+    Worker threads never touch Tk: a finished task is put on a queue that the Tk
+    thread drains from an ``after()`` loop, calling ``on_done(result)`` or
+    ``on_error(exception)`` there. Submitting with a ``key`` cancels the
+    previous task of the same key, e.g. a type-ahead search that is outdated.
+    ``on_busy(True)`` is called when work starts and ``on_busy(False)`` once
+    nothing is pending anymore.
+
+    The data classes are not thread-safe, so the default pool has a single
+    thread: calls run one at a time and in submission order.
+    """
+
+    def __init__(
+        self,
+        root,
+        max_workers: int = 1,
+        on_busy: Callable[[bool], None] | None = None,
+    ):
+        self.root = root
+        self.on_busy = on_busy
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="rental-worker"
+        )
+        self._finished = queue.SimpleQueue()
+        self._keyed: dict[str, Task] = {}
+        self._tasks: set[Task] = set()
+        self._poll_id = None
+
+    def submit(
+        self,
+        function: Callable,
+        *args,
+        on_done: Callable | None = None,
+        on_error: Callable | None = None,
+        key: str | None = None,
+        cancellable: bool = True,
+        **kwargs,
+    ) -> Task:
+        if key is not None and key in self._keyed:
+            self._keyed[key].cancel()
+        future = self._executor.submit(function, *args, **kwargs)
+        task = Task(future, on_done, on_error, key, cancellable)
+        if key is not None:
+            self._keyed[key] = task
+        self._tasks.add(task)
+        if len(self._tasks) == 1 and self.on_busy is not None:
+            self.on_busy(True)
+        future.add_done_callback(lambda future: self._finished.put(task))
+        if self._poll_id is None:
+            self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+        return task
+
+    def is_busy(self) -> bool:
+        return bool(self._tasks)
+
+    def cancel_all(self) -> None:
+        """Cancel every pending task, writes submitted as not cancellable go on."""
+        for task in list(self._tasks):
+            task.cancel()
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _poll(self) -> None:
+        deadline = time.perf_counter() + FRAME_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                task = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            self._deliver(task)
+        # Anything left over is delivered on the next tick.
+        if self._tasks:
+            self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._poll_id = None
+
+    def _deliver(self, task: Task) -> None:
+        self._tasks.discard(task)
+        if task.key is not None and self._keyed.get(task.key) is task:
+            del self._keyed[task.key]
+        if not self._tasks and self.on_busy is not None:
+            self.on_busy(False)
+        if task.cancelled:
+            return
+        error = task.future.exception()
+        if error is None:
+            if task.on_done is not None:
+                task.on_done(task.future.result())
+        elif task.on_error is not None:
+            task.on_error(error)
+        else:
+            logger.error(f"Background task failed: {error!r}")
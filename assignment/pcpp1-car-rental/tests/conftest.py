@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from pcpp1_car_rental import booking, car, customer, database, history, staff
+from pcpp1_car_rental.singleton import reset
+
+CARS = [
+    {
+        "ID": "ABC123",
+        "brand": "proton",
+        "model": "saga",
+        "engine_type": "gasoline",
+        "seat_capacity": 5,
+        "status": "available",
+        "start_date": "",
+        "end_date": "",
+    },
+    {
+        "ID": "MNB654",
+        "brand": "byd",
+        "model": "m6",
+        "engine_type": "ev",
+        "seat_capacity": 7,
+        "status": "available",
+        "start_date": "",
+        "end_date": "",
+    },
+]
+
+
+def write_data(path, records: list[dict]) -> None:
+    path.write_text(json.dumps({"data": records}))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Empty data files in ``tmp_path`` in place of data/, and fresh instances."""
+    for module, name, file_name in (
+        (car, "CAR_DATA_PATH", "car.json"),
+        (customer, "CUSTOMER_DATA_PATH", "customer.json"),
+        (booking, "BOOKING_DATA_PATH", "booking.json"),
+        (staff, "STAFF_DATA_PATH", "staff.json"),
+    ):
+        write_data(tmp_path / file_name, [])
+        monkeypatch.setattr(module, name, str(tmp_path / file_name))
+    monkeypatch.setattr(
+        history, "RENTAL_EVENTS_PATH", str(tmp_path / "rental_events.jsonl")
+    )
+    monkeypatch.setattr(
+        history, "RENTAL_STATS_PATH", str(tmp_path / "rental_stats.json")
+    )
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "car_rental.db"))
+    reset()
+    yield tmp_path
+    database.Database().close()
+    reset()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, data_dir, monkeypatch):
+    """Run the test once per storage backend, with the cars of ``CARS``."""
+    for module in (car, customer, booking, staff):
+        monkeypatch.setattr(module, "STORAGE_BACKEND", request.param)
+    write_data(data_dir / "car.json", CARS)
+    if request.param == "sqlite":
+        database.Database().import_data()
+    return request.param
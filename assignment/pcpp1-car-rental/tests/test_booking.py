@@ -0,0 +1,136 @@
+import json
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from pcpp1_car_rental.booking import BookingConflictError, BookingData, StartIndex
+from pcpp1_car_rental.records import format_record_date
+from pcpp1_car_rental.service import RentalService
+
+CUSTOMER = {
+    "full_name": "Aina Rahman",
+    "contact": "0123456789",
+    "address": "1 Jalan Example",
+    "email": "aina@example.com",
+}
+
+
+def day(offset: int) -> str:
+    """dd/mm/yyyy of today plus ``offset`` days."""
+    return format_record_date(date.today() + timedelta(days=offset))
+
+
+def book(service: RentalService, car_id: str, start: str, end: str) -> dict:
+    dates = {"start_date": start, "end_date": end}
+    return service.book({**CUSTOMER, "car": car_id, **dates}, {"ID": car_id, **dates})
+
+
+def test_return_frees_the_rest_of_the_booking(backend):
+    service = RentalService()
+    booking = book(service, "ABC123", day(-2), day(5))
+    assert not BookingData().is_available("ABC123", day(1), day(3))
+
+    car = service.return_car("ABC123")
+
+    assert car["status"] == "available"
+    assert (car["start_date"], car["end_date"]) == ("", "")
+    assert BookingData().is_available("ABC123", day(1), day(3))
+    assert BookingData().booked_days("ABC123", day(-2), day(5)) == []
+    (stored,) = BookingData().load_booking_data()
+    assert stored["id"] == booking["id"]
+    assert stored["status"] == "returned"
+    assert stored["returned_date"] == day(0)
+    book(service, "ABC123", day(0), day(3))
+
+
+def test_return_leaves_later_bookings_alone(backend):
+    service = RentalService()
+    book(service, "ABC123", day(-3), day(-1))
+    book(service, "ABC123", day(10), day(12))
+
+    service.return_car("ABC123")
+
+    assert BookingData().is_available("ABC123", day(-3), day(-1))
+    assert not BookingData().is_available("ABC123", day(11), day(11))
+    # Nothing started by today is left to close.
+    assert BookingData().return_car("ABC123", day(0)) is None
+
+
+def test_overlapping_booking_is_refused(backend):
+    service = RentalService()
+    book(service, "ABC123", day(1), day(5))
+
+    with pytest.raises(BookingConflictError):
+        BookingData().add_booking("ABC123", CUSTOMER["contact"], day(5), day(7))
+    assert BookingData().booked_days("ABC123", day(0), day(9)) == [
+        day(offset) for offset in range(1, 6)
+    ]
+    book(service, "MNB654", day(5), day(7))
+
+
+def test_refresh_reports_bad_rows_and_indexes_the_rest(data_dir):
+    stored = {"car": "ABC123", "contact": CUSTOMER["contact"]}
+    rows = [
+        {"id": "1", **stored, "start_date": day(1), "end_date": day(5)},
+        {"id": "2", **stored, "start_date": day(3), "end_date": day(4)},
+        {"id": "3", **stored, "start_date": "31/02/2025", "end_date": day(9)},
+        {"id": "5", **stored, "start_date": "", "end_date": ""},
+        {"id": "7", **stored, "start_date": day(8), "end_date": day(9)},
+    ]
+    (data_dir / "booking.json").write_text(json.dumps({"data": rows}))
+    bookings = BookingData()
+
+    assert bookings.booked_days("ABC123", day(0), day(9)) == [
+        day(offset) for offset in (1, 2, 3, 4, 5, 8, 9)
+    ]
+    assert [booking_id for booking_id, _ in bookings.rejected] == ["2", "3", "5"]
+    assert len(bookings.load_booking_data()) == 5
+    # Ids keep growing past the highest one, skipped or not.
+    assert bookings.add_booking("ABC123", "0123456789", day(6), day(7))["id"] == "8"
+    assert not bookings.is_available("ABC123", day(6), day(6))
+
+
+def test_available_car_ids_skips_cars_booked_in_the_range(backend):
+    service = RentalService()
+    book(service, "ABC123", day(-1), day(4))
+    cars = ["ABC123", "MNB654"]
+
+    assert BookingData().available_car_ids(cars, day(-5), day(-2)) == cars
+    assert BookingData().available_car_ids(cars, day(4), day(9)) == ["MNB654"]
+    assert BookingData().available_car_ids(cars, day(5), day(9)) == cars
+    service.return_car("ABC123")
+    assert BookingData().available_car_ids(cars, day(1), day(4)) == cars
+
+
+def test_start_index_finds_the_same_cars_as_a_scan():
+    rng = random.Random(4)
+    index = StartIndex()
+    bookings = []
+    for number in range(300):
+        first = rng.randrange(0, 1000)
+        last = first + rng.randrange(0, 30)
+        booking = (first, last, f"car{number % 40}", str(number))
+        index.add(*booking)
+        bookings.append(booking)
+    for booking in bookings[::3]:
+        index.remove(*booking)
+    kept = bookings[1::3] + bookings[2::3]
+
+    for _ in range(200):
+        first = rng.randrange(0, 1050)
+        last = first + rng.randrange(0, 20)
+        expected = {car for low, high, car, _ in kept if low <= last and high >= first}
+        assert index.booked_cars(first, last) == expected
+
+
+def test_return_before_the_booking_starts_keeps_the_car_rented(backend):
+    service = RentalService()
+    book(service, "ABC123", day(3), day(5))
+
+    car = service.return_car("ABC123")
+
+    assert car["status"] == "rented"
+    assert not BookingData().is_available("ABC123", day(3), day(5))
+    (stored,) = BookingData().load_booking_data()
+    assert stored.get("status", "active") == "active"
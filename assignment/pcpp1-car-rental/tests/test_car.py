@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from pcpp1_car_rental.car import CarData
+from pcpp1_car_rental.singleton import reset
+
+CAR = {
+    "ID": "ABC123",
+    "brand": "proton",
+    "model": "saga",
+    "engine_type": "gasoline",
+    "seat_capacity": 5,
+    "status": "available",
+    "start_date": "",
+    "end_date": "",
+}
+
+
+def test_updates_are_indexed_and_journaled(backend):
+    car_data = CarData()
+    assert car_data.find_car_ids(status="available") == ["ABC123", "MNB654"]
+
+    car_data.update_car_data(
+        {"ID": "ABC123", "start_date": "01/03/2025", "end_date": "03/03/2025"}
+    )
+
+    assert car_data.find_car_ids(status="available") == ["MNB654"]
+    assert car_data.find_car_ids(status="rented", brand="proton") == ["ABC123"]
+    # A fresh instance replays the journal, or reads the database.
+    reset()
+    assert CarData().get_car("ABC123")["status"] == "rented"
+
+
+def test_fleet_reloads_only_when_car_json_changes(data_dir, monkeypatch):
+    path = data_dir / "car.json"
+    path.write_text(json.dumps({"data": [CAR]}))
+    car_data = CarData()
+    assert car_data.car_count() == 1
+
+    loads = []
+    load = car_data._journal.load
+
+    def counted_load() -> list[dict]:
+        loads.append(1)
+        return load()
+
+    monkeypatch.setattr(car_data._journal, "load", counted_load)
+    assert car_data.get_car("ABC123")["brand"] == "proton"
+    assert loads == []
+
+    edited = [CAR, {**CAR, "ID": "XYZ999", "brand": "perodua"}]
+    path.write_text(json.dumps({"data": edited}))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert car_data.find_car_ids(brand="perodua") == ["XYZ999"]
+    assert loads == [1]
+
+
+def test_facet_counts_follow_the_other_filters_and_rentals(backend):
+    car_data = CarData()
+    assert car_data.facet_counts("status") == {"available": 2}
+    assert car_data.facet_counts("brand", seat_capacity=7) == {"byd": 1}
+
+    car_data.update_car_data(
+        {"ID": "MNB654", "start_date": "01/03/2025", "end_date": "03/03/2025"}
+    )
+
+    assert car_data.facet_counts("status") == {"available": 1, "rented": 1}
+    assert car_data.facet_counts("brand", status="available") == {"proton": 1}
+    car_data.return_car("MNB654")
+    assert car_data.facet_counts("engine_type", status="available") == {
+        "gasoline": 1,
+        "ev": 1,
+    }
+    with pytest.raises(KeyError):
+        car_data.facet_counts("ID")
@@ -0,0 +1,74 @@
+import sqlite3
+
+from pcpp1_car_rental import database
+from pcpp1_car_rental.customer import CustomerData
+from pcpp1_car_rental.service import RentalService
+
+CUSTOMER = {
+    "full_name": "Aina Rahman",
+    "contact": "824-384-7067",
+    "address": "1 Jalan Example",
+    "email": "aina@example.com",
+    "car": "",
+    "start_date": "",
+    "end_date": "",
+}
+
+
+def test_find_customer_ignores_contact_formatting(backend):
+    customers = CustomerData()
+    customers.update_customer_data(CUSTOMER)
+
+    for contact in ("824-384-7067", "8243847067", "824 384 7067"):
+        assert customers.find_customer(contact)["contact"] == "824-384-7067"
+    assert customers.find_customer("8243847068") is None
+
+
+def test_update_in_another_format_keeps_one_customer(backend):
+    customers = CustomerData()
+    customers.update_customer_data(CUSTOMER)
+    customers.update_customer_data({**CUSTOMER, "contact": "8243847067"})
+
+    assert customers.customer_count() == 1
+    assert customers.load_customer_data()[0]["contact"] == "824-384-7067"
+
+
+def test_bookings_in_either_format_share_the_customer(backend):
+    service = RentalService()
+    for contact, car_id, day in (
+        ("824-384-7067", "ABC123", "01/03/2025"),
+        ("8243847067", "MNB654", "02/03/2025"),
+    ):
+        dates = {"start_date": day, "end_date": day}
+        service.book(
+            {**CUSTOMER, "contact": contact, "car": car_id, **dates},
+            {"ID": car_id, **dates},
+        )
+
+    assert CustomerData().customer_count() == 1
+    bookings = service.booked_days("MNB654", "01/03/2025", "31/03/2025")
+    assert bookings == ["02/03/2025"]
+    assert CustomerData().find_customer("8243847067")["car"] == "MNB654"
+
+
+def test_contact_keys_of_an_older_database_are_filled_in(data_dir):
+    path = data_dir / "car_rental.db"
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE customer (Contact TEXT PRIMARY KEY, full_name TEXT NOT NULL, "
+        "address TEXT NOT NULL, email TEXT NOT NULL)"
+    )
+    connection.executemany(
+        "INSERT INTO customer VALUES (?, ?, ?, ?)",
+        [("824-384-7067", "First", "", ""), ("8243847067", "Second", "", "")],
+    )
+    connection.commit()
+    connection.close()
+
+    db = database.Database()
+
+    # The oldest of the two rows wins the key.
+    assert db.get_customer("8243847067")["full_name"] == "First"
+    db.upsert_customer({**CUSTOMER, "contact": "824 384 7067"})
+    assert db.get_customer("824-384-7067")["full_name"] == "Aina Rahman"
+    assert db.customer_count() == 2
@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+
+import pytest
+
+from pcpp1_car_rental import car, customer, database, staff
+
+
+@pytest.fixture
+def csv_dir(data_dir, monkeypatch):
+    """car.csv, customer.csv and staff.csv in ``data_dir``, for imports from CSV."""
+    for module, name, file_name, text in (
+        (
+            car,
+            "CAR_DATA_CSV_PATH",
+            "car.csv",
+            "ID,brand,model,engine_type,seat_capacity,status,start_date,end_date\n"
+            "ABC123,proton,saga,gasoline,5,available,,\n"
+            "MNB654,byd,m6,ev,7,rented,01/03/2025,03/03/2025\n",
+        ),
+        (
+            customer,
+            "CUSTOMER_DATA_CSV_PATH",
+            "customer.csv",
+            "full_name,contact,address,email,car,start_date,end_date\n"
+            "Aina Rahman,0123456789,1 Jalan Example,aina@example.com,,,\n",
+        ),
+        (staff, "STAFF_DATA_CSV_PATH", "staff.csv", "name,password\nadmin,secret\n"),
+    ):
+        (data_dir / file_name).write_text(text)
+        monkeypatch.setattr(module, name, str(data_dir / file_name))
+    return data_dir
+
+
+def test_csv_import_answers_from_indexed_tables(csv_dir):
+    db = database.Database()
+
+    report = db.import_data("csv")
+
+    assert (report["cars"], report["customer"], report["staff"]) == (2, 1, 1)
+    assert db.find_car_ids(status="available") == ["ABC123"]
+    assert db.get_customer("0123456789")["full_name"] == "Aina Rahman"
+    assert db.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    db.add_booking("MNB654", "0123456789", "2025-03-01", "2025-03-03")
+    assert db.has_booking_conflict("MNB654", "2025-03-03", "2025-03-05")
+    assert not db.has_booking_conflict("MNB654", "2025-03-04", "2025-03-05")
+    plan = db.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT 1 FROM rental_booking WHERE car_id = ? "
+        "AND rent_status = 'active' AND start_date <= ? AND end_date >= ?",
+        ("MNB654", "2025-03-05", "2025-03-03"),
+    ).fetchall()
+    assert "USING INDEX" in " ".join(row[-1] for row in plan)
+
+
+def test_each_thread_gets_its_own_configured_connection(tmp_path):
+    pool = database.ConnectionPool(str(tmp_path / "pool.db"), busy_timeout_ms=1234)
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(pool.connection()))
+    thread.start()
+    thread.join()
+
+    connection = pool.connection()
+    assert connection is pool.connection()
+    assert connection is not connections[0]
+    for pragma, value in (
+        ("journal_mode", "wal"),
+        ("busy_timeout", 1234),
+        ("synchronous", 1),
+        ("foreign_keys", 1),
+    ):
+        assert connection.execute(f"PRAGMA {pragma}").fetchone()[0] == value
+    pool.close()
+
+
+def test_transactions_commit_roll_back_and_nest(tmp_path):
+    pool = database.ConnectionPool(str(tmp_path / "pool.db"))
+    with pool.transaction() as cursor:
+        cursor.execute("CREATE TABLE item (name TEXT)")
+        cursor.execute("INSERT INTO item VALUES ('kept')")
+    with pytest.raises(sqlite3.IntegrityError):
+        with pool.transaction() as cursor:
+            cursor.execute("INSERT INTO item VALUES ('dropped')")
+            # Joins the outer transaction, the failure rolls back both.
+            with pool.transaction() as inner:
+                inner.execute("INSERT INTO item VALUES ('inner')")
+            raise sqlite3.IntegrityError
+
+    # Another thread reads the committed rows while this one holds a write.
+    names = []
+    with pool.transaction(immediate=True) as cursor:
+        cursor.execute("INSERT INTO item VALUES ('pending')")
+        reader = threading.Thread(
+            target=lambda: names.extend(
+                row[0] for row in pool.cursor().execute("SELECT name FROM item")
+            )
+        )
+        reader.start()
+        reader.join()
+    assert names == ["kept"]
+    pool.close()
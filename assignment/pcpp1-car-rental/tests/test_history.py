@@ -0,0 +1,139 @@
+import json
+from datetime import date, timedelta
+
+from pcpp1_car_rental.history import RentalHistory, RentalStats
+from pcpp1_car_rental.records import format_record_date
+from pcpp1_car_rental.service import RentalService
+
+
+def booked(car: str, start: str, end: str, booking_id: str = "1") -> dict:
+    return {
+        "type": "booked",
+        "booking_id": booking_id,
+        "car": car,
+        "brand": "byd",
+        "model": "m6",
+        "start_date": start,
+        "end_date": end,
+    }
+
+
+def returned(car: str, start: str, end: str, on: str, booking_id: str = "1") -> dict:
+    return {
+        "type": "returned",
+        "booking_id": booking_id,
+        "car": car,
+        "start_date": start,
+        "end_date": end,
+        "returned_date": on,
+    }
+
+
+def test_booked_days_walks_change_points_in_any_insert_order():
+    stats = RentalStats()
+    ranges = [(20, 25), (1, 5), (10, 12), (7, 8)]
+    for number, (first, last) in enumerate(ranges):
+        stats.apply(booked("A1", f"{first}/03/2025", f"{last}/03/2025", str(number)))
+
+    for low, high in ((1, 31), (4, 11), (6, 6), (13, 19), (24, 28)):
+        expected = sum(
+            max(0, min(last, high) - max(first, low) + 1) for first, last in ranges
+        )
+        first_day, last_day = date(2025, 3, low), date(2025, 3, high)
+        assert stats.booked_days("A1", first_day, last_day) == expected
+
+
+def test_early_return_drops_the_unused_days():
+    stats = RentalStats()
+    stats.apply(booked("A1", "01/03/2025", "10/03/2025"))
+    stats.apply(returned("A1", "01/03/2025", "10/03/2025", "04/03/2025"))
+
+    assert stats.booked_days("A1", date(2025, 3, 1), date(2025, 3, 31)) == 4
+    assert stats.booked_days("A1", date(2025, 3, 5), date(2025, 3, 10)) == 0
+    assert stats.rental_days == 4
+    assert stats.car_days["A1"] == 4
+    assert stats.average_days() == 4
+
+
+def test_rentals_and_average_days_follow_the_range():
+    stats = RentalStats()
+    stats.apply(booked("A1", "01/03/2025", "10/03/2025", "1"))
+    stats.apply(booked("A1", "20/03/2025", "21/03/2025", "2"))
+    stats.apply(booked("B2", "02/04/2025", "05/04/2025", "3"))
+    stats.apply(returned("B2", "02/04/2025", "05/04/2025", "02/04/2025", "3"))
+
+    march = date(2025, 3, 1), date(2025, 3, 31)
+    assert stats.rentals_started(*march) == 2
+    assert stats.average_days(*march) == 6
+    april = date(2025, 4, 1), date(2025, 4, 30)
+    assert stats.rentals_started(*april) == 1
+    assert stats.average_days(*april) == 1
+    assert stats.average_days() == 13 / 3
+
+
+def test_late_return_and_return_without_booking_change_nothing():
+    stats = RentalStats()
+    stats.apply(booked("A1", "01/03/2025", "10/03/2025"))
+    stats.apply(returned("A1", "01/03/2025", "10/03/2025", "12/03/2025"))
+    stats.apply({"type": "returned", "car": "A1"})
+
+    assert stats.booked_days("A1", date(2025, 3, 1), date(2025, 3, 31)) == 10
+    assert stats.rental_days == 10
+
+
+def test_stats_survive_a_round_trip_through_json():
+    stats = RentalStats()
+    stats.apply(booked("A1", "01/03/2025", "10/03/2025"))
+    stats.apply(returned("A1", "01/03/2025", "10/03/2025", "04/03/2025"))
+
+    loaded = RentalStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+
+    assert loaded.booked_days("A1", date(2025, 3, 1), date(2025, 3, 31)) == 4
+    loaded.apply(booked("A1", "20/03/2025", "21/03/2025", "2"))
+    assert loaded.booked_days("A1", date(2025, 3, 1), date(2025, 3, 31)) == 6
+    assert loaded.average_days() == 3
+
+
+def test_backfill_includes_earlier_returns(data_dir):
+    today = date.today()
+    start = format_record_date(today - timedelta(days=5))
+    end = format_record_date(today + timedelta(days=4))
+    booking = {
+        "id": "1",
+        "car": "ABC123",
+        "contact": "0123456789",
+        "start_date": start,
+        "end_date": end,
+        "status": "returned",
+        "returned_date": format_record_date(today),
+    }
+    (data_dir / "booking.json").write_text(json.dumps({"data": [booking]}))
+
+    summary = RentalHistory().summary(today - timedelta(days=5), today)
+
+    assert summary["rentals"] == 1
+    assert summary["average_days"] == 6
+    assert summary["utilization"] == [["ABC123", 6, 100.0]]
+
+
+def test_return_through_the_service_updates_utilization(backend):
+    today = date.today()
+    dates = {
+        "start_date": format_record_date(today - timedelta(days=2)),
+        "end_date": format_record_date(today + timedelta(days=7)),
+    }
+    service = RentalService()
+    customer = {
+        "full_name": "Aina Rahman",
+        "contact": "0123456789",
+        "address": "1 Jalan Example",
+        "email": "aina@example.com",
+    }
+    service.book({**customer, "car": "ABC123", **dates}, {"ID": "ABC123", **dates})
+    service.return_car("ABC123")
+
+    first, last = today - timedelta(days=2), today + timedelta(days=7)
+    summary = RentalHistory().summary(first, last)
+
+    assert summary["utilization"][0] == ["ABC123", 3, 30.0]
+    assert summary["average_days"] == 3
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from pcpp1_car_rental.journal import Journal
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "car.json"
+    data = [
+        {"ID": "A1", "status": "available"},
+        {"ID": "B2", "status": "available"},
+    ]
+    path.write_text(json.dumps({"data": data}))
+    return path
+
+
+def read_snapshot(path) -> dict:
+    return {record["ID"]: record for record in json.loads(path.read_text())["data"]}
+
+
+def test_load_replays_the_journal_over_the_snapshot(snapshot):
+    journal = Journal(snapshot, key="ID")
+    journal.append("A1", {"status": "rented"})
+    journal.append("C3", {"ID": "C3", "status": "available"})
+
+    records = {record["ID"]: record for record in Journal(snapshot, key="ID").load()}
+
+    assert records["A1"]["status"] == "rented"
+    assert records["B2"]["status"] == "available"
+    assert records["C3"] == {"ID": "C3", "status": "available"}
+    # The snapshot itself is left alone until a compaction.
+    assert read_snapshot(snapshot)["A1"]["status"] == "available"
+
+
+def test_load_skips_a_torn_last_line(snapshot):
+    journal = Journal(snapshot, key="ID")
+    journal.append("A1", {"status": "rented"})
+    with open(journal.journal_path, "a") as file:
+        file.write('{"key": "B2", "fields": {"sta')
+
+    records = {record["ID"]: record for record in journal.load()}
+
+    assert records["A1"]["status"] == "rented"
+    assert records["B2"]["status"] == "available"
+
+
+def test_load_replays_an_unfinished_compaction_first(snapshot):
+    journal = Journal(snapshot, key="ID")
+    # A compaction that died after moving the journal aside.
+    journal.compacting_path.write_text(
+        json.dumps({"key": "A1", "fields": {"status": "rented"}}) + "\n"
+    )
+    journal.append("A1", {"status": "available", "note": "returned"})
+
+    records = {record["ID"]: record for record in journal.load()}
+
+    assert records["A1"] == {"ID": "A1", "status": "available", "note": "returned"}
+
+
+def test_own_appends_do_not_make_the_journal_stale(snapshot):
+    journal = Journal(snapshot, key="ID")
+    assert journal.is_stale()
+    journal.load()
+    journal.append("A1", {"status": "rented"})
+    assert not journal.is_stale()
+
+    Journal(snapshot, key="ID").append("B2", {"status": "rented"})
+
+    assert journal.is_stale()
+
+
+def test_compact_folds_the_journal_into_the_snapshot(snapshot):
+    journal = Journal(snapshot, key="ID", max_entries=2)
+    records = {record["ID"]: record for record in journal.load()}
+    for status in ("rented", "available"):
+        journal.append("A1", {"status": status})
+        records["A1"]["status"] = status
+    assert journal.needs_compaction()
+
+    journal.compact(records.values)
+
+    assert not journal.journal_path.exists()
+    assert not journal.compacting_path.exists()
+    assert not journal.needs_compaction()
+    assert not journal.is_stale()
+    assert read_snapshot(snapshot) == records
+    assert {record["ID"]: record for record in journal.load()} == records
+
+
+def test_compact_in_background_keeps_later_appends(snapshot):
+    journal = Journal(snapshot, key="ID")
+    records = {record["ID"]: record for record in journal.load()}
+    journal.append("A1", {"status": "rented"})
+    records["A1"]["status"] = "rented"
+
+    journal.compact_in_background(records.values)
+    journal.wait()
+    journal.append("B2", {"status": "rented"})
+
+    records = {record["ID"]: record for record in Journal(snapshot, key="ID").load()}
+    assert records["A1"]["status"] == "rented"
+    assert records["B2"]["status"] == "rented"
+    assert read_snapshot(snapshot)["B2"]["status"] == "available"
@@ -0,0 +1,55 @@
+import logging
+import logging.handlers
+import queue
+import time
+
+from pcpp1_car_rental import logger as logger_module
+from pcpp1_car_rental.logger import (
+    BatchingFileHandler,
+    BatchingQueueListener,
+    TermEscapeCodeFormatter,
+)
+
+
+def make_record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, message, None, None)
+
+
+def test_records_are_written_in_batches_and_errors_at_once(tmp_path):
+    path = tmp_path / "test.log"
+    handler = BatchingFileHandler(path, batch_size=3, flush_interval=60)
+
+    handler.emit(make_record("one"))
+    handler.emit(make_record("two"))
+    assert path.read_text() == ""
+    handler.emit(make_record("three"))
+    assert path.read_text() == "one\ntwo\nthree\n"
+    handler.emit(make_record("four"))
+    handler.emit(make_record("broken", logging.ERROR))
+    assert path.read_text().endswith("four\nbroken\n")
+    handler.close()
+
+
+def test_listener_flushes_when_the_queue_goes_idle(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_module, "LOG_FLUSH_INTERVAL", 0.05)
+    path = tmp_path / "test.log"
+    handler = BatchingFileHandler(path, batch_size=100, flush_interval=60)
+    log_queue = queue.SimpleQueue()
+    listener = BatchingQueueListener(log_queue, handler)
+    listener.start()
+    try:
+        logging.handlers.QueueHandler(log_queue).handle(make_record("idle"))
+        deadline = time.monotonic() + 5
+        while path.read_text() == "" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert path.read_text() == "idle\n"
+    finally:
+        listener.stop()
+        handler.close()
+
+
+def test_escape_codes_are_stripped_from_the_line_only():
+    record = make_record("\x1b[31mred\x1b[0m")
+
+    assert TermEscapeCodeFormatter().format(record) == "red"
+    assert record.msg == "\x1b[31mred\x1b[0m"
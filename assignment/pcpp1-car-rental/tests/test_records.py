@@ -0,0 +1,12 @@
+from pcpp1_car_rental.records import iter_csv_rows
+
+
+def test_iter_csv_rows_yields_tuples_in_field_order(tmp_path):
+    path = tmp_path / "car.csv"
+    path.write_text("ID,brand,seat_capacity\nABC123,proton,5\nMNB654,byd,7\n")
+
+    assert list(iter_csv_rows(str(path), ("seat_capacity", "ID"))) == [
+        ("5", "ABC123"),
+        ("7", "MNB654"),
+    ]
+    assert list(iter_csv_rows(str(path), ("brand",))) == [("proton",), ("byd",)]
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from pcpp1_car_rental.service import RentalServer, RentalService, VersionConflictError
+from pcpp1_car_rental.singleton import reset
+
+
+class BlockingService:
+    """Listing the cars waits until another request looked a car up."""
+
+    def __init__(self):
+        self.looked_up = threading.Event()
+
+    def car_count(self) -> int:
+        assert self.looked_up.wait(5)
+        return 0
+
+    def car_page(self, offset: int, limit: int) -> list[dict]:
+        return []
+
+    def get_car(self, car_id: str) -> dict:
+        if car_id == "broken":
+            raise OSError("disk full")
+        self.looked_up.set()
+        return {"ID": car_id}
+
+
+def test_slow_calls_do_not_hold_up_other_requests():
+    server = RentalServer(BlockingService())
+
+    async def both():
+        return await asyncio.gather(
+            server.respond("GET", "/cars", b""),
+            server.respond("GET", "/cars/ABC123", b""),
+        )
+
+    listing, car = asyncio.run(both())
+
+    assert listing == (HTTPStatus.OK, {"count": 0, "cars": []})
+    assert car == (HTTPStatus.OK, {"ID": "ABC123"})
+
+
+def test_unexpected_errors_are_answered_with_a_500():
+    server = RentalServer(BlockingService())
+
+    status, payload = asyncio.run(server.respond("GET", "/cars/broken", b""))
+
+    assert status == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert payload == {"error": "internal", "message": "disk full"}
+
+
+def test_versions_come_from_the_stored_records(backend):
+    service = RentalService()
+    seen = service.get_car("ABC123")["version"]
+    dates = {"start_date": "01/03/2025", "end_date": "02/03/2025"}
+    customer = {
+        "full_name": "Aina Rahman",
+        "contact": "0123456789",
+        "address": "1 Jalan Example",
+        "email": "aina@example.com",
+        "car": "ABC123",
+        **dates,
+    }
+    service.book(customer, {"ID": "ABC123", **dates}, car_version=seen)
+
+    # A restarted service derives the same, newer version from the data.
+    reset()
+    restarted = RentalService()
+    current = restarted.get_car("ABC123")
+    assert current["version"] == service.get_car("ABC123")["version"] != seen
+    with pytest.raises(VersionConflictError) as conflict:
+        restarted.return_car("ABC123", seen)
+    assert conflict.value.current == current
+    restarted.return_car("ABC123", current["version"])
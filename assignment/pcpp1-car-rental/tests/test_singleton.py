@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from pcpp1_car_rental.singleton import Singleton, reset
+
+
+class Store(metaclass=Singleton):
+    created = 0
+
+    def __init__(self, directory: str | None = None, readonly: bool = False):
+        Store.created += 1
+        self.directory = directory
+        self.readonly = readonly
+
+
+@pytest.fixture(autouse=True)
+def fresh_store():
+    reset(Store)
+    yield
+    reset(Store)
+
+
+def test_arguments_are_bound_before_they_make_the_key():
+    store = Store()
+
+    assert Store(None) is store
+    assert Store(directory=None) is store
+    assert Store(None, False) is store
+    assert Store(readonly=False, directory=None) is store
+
+
+def test_other_arguments_get_another_instance():
+    other = Store("other")
+
+    assert other is not Store()
+    assert Store(directory="other") is other
+    assert Store("other", readonly=True) is not other
+
+
+def test_invalid_arguments_raise_like_the_constructor():
+    with pytest.raises(TypeError):
+        Store(unknown=1)
+
+
+def test_threads_asking_together_share_one_instance():
+    Store.created = 0
+    barrier = threading.Barrier(8)
+    instances = []
+
+    def create():
+        barrier.wait()
+        instances.append(Store("shared"))
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Store.created == 1
+    assert all(instance is instances[0] for instance in instances)
+
+
+def test_reset_forgets_the_instances():
+    store = Store()
+    reset(Store)
+
+    assert Store() is not store
@@ -0,0 +1,62 @@
+import csv
+import json
+import sqlite3
+
+from pcpp1_car_rental import database, staff
+from pcpp1_car_rental.staff import StaffData, is_hashed, verify_password
+
+
+def write_staff(data_dir, monkeypatch, json_rows: list[dict], csv_rows: list[dict]):
+    (data_dir / "staff.json").write_text(json.dumps({"data": json_rows}))
+    csv_path = data_dir / "staff.csv"
+    with open(csv_path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["name", "password"])
+        writer.writeheader()
+        writer.writerows(csv_rows)
+    monkeypatch.setattr(staff, "STAFF_DATA_CSV_PATH", str(csv_path))
+    monkeypatch.setattr(staff, "PBKDF2_ITERATIONS", 1_000)
+    return csv_path
+
+
+def test_migration_reuses_the_json_hash_only_for_the_same_password(
+    data_dir, monkeypatch
+):
+    csv_path = write_staff(
+        data_dir,
+        monkeypatch,
+        [{"name": "admin", "password": "secret"}, {"name": "ali", "password": "a1"}],
+        [{"name": "admin", "password": "secret"}, {"name": "ali", "password": "b2"}],
+    )
+
+    assert StaffData().migrate_passwords() == 2
+
+    hashes = {info["name"]: info["password"] for info in StaffData().load_staff_data()}
+    with open(csv_path) as file:
+        rows = {row["name"]: row["password"] for row in csv.DictReader(file)}
+    assert rows["admin"] == hashes["admin"]
+    assert is_hashed(rows["ali"]) and rows["ali"] != hashes["ali"]
+    assert verify_password("b2", rows["ali"])
+    assert verify_password("a1", hashes["ali"])
+
+
+def test_sqlite_logins_use_the_cached_credentials(data_dir, monkeypatch):
+    write_staff(data_dir, monkeypatch, [{"name": "admin", "password": "secret"}], [])
+    monkeypatch.setattr(staff, "STORAGE_BACKEND", "sqlite")
+    db = database.Database()
+    db.import_data()
+    staff_data = StaffData()
+    assert staff_data.is_staff("admin", "secret")
+
+    queries = []
+    db.connection.set_trace_callback(queries.append)
+    assert staff_data.is_staff("admin", "secret")
+    assert not staff_data.is_staff("nobody", "secret")
+    assert queries == ["SELECT version FROM staff_version"] * 2
+
+    # Another connection changing the table is picked up on the next login.
+    other = sqlite3.connect(database.DB_FILE)
+    with other:
+        other.execute("UPDATE staff SET password = 'changed' WHERE name = 'admin'")
+    other.close()
+    assert staff_data.is_staff("admin", "changed")
+    assert not staff_data.is_staff("admin", "secret")
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+from pcpp1_car_rental import database
+from pcpp1_car_rental.profiling import StartupProfiler
+
+
+def test_importing_the_app_loads_no_data():
+    code = (
+        "import pcpp1_car_rental.main\n"
+        "from pcpp1_car_rental.singleton import Singleton\n"
+        "print(sorted({key[0].__name__ for key in Singleton._instances}))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env
+    )
+
+    assert result.returncode == 0, result.stderr
+    # Only the log formatter, created by logger.py itself.
+    assert result.stdout.strip() == "['TermEscapeCodeFormatter']"
+
+
+def test_database_is_opened_on_first_use(data_dir):
+    db = database.Database()
+    assert not os.path.exists(database.DB_FILE)
+
+    assert db.car_count() == 0
+    assert os.path.exists(database.DB_FILE)
+
+
+def test_profiler_reports_each_phase_in_order():
+    profiler = StartupProfiler()
+    profiler.add("import", 0.0125)
+    with profiler.phase("first paint"):
+        pass
+
+    lines = profiler.report().splitlines()
+
+    assert lines[0].split() == ["phase", "ms"]
+    assert lines[1].split() == ["import", "12.5"]
+    assert lines[2].split()[:2] == ["first", "paint"]
@@ -0,0 +1,161 @@
+import json
+
+from pcpp1_car_rental import database
+from pcpp1_car_rental.validator import iso_date, validate, validate_records
+
+CAR = {
+    "ID": "ABC123",
+    "brand": "proton",
+    "model": "saga",
+    "engine_type": "gasoline",
+    "seat_capacity": 5,
+    "status": "available",
+    "start_date": "",
+    "end_date": "",
+}
+CUSTOMER = {
+    "full_name": "Aina Rahman",
+    "contact": "0123456789",
+    "address": "1 Jalan Example",
+    "email": "aina@example.com",
+    "car": "",
+    "start_date": "",
+    "end_date": "",
+}
+
+
+def write_data(path, records: list[dict]) -> None:
+    path.write_text(json.dumps({"data": records}))
+
+
+def test_iso_date_rejects_impossible_dates():
+    assert iso_date("29/02/2024") == "2024-02-29"
+    assert iso_date("2025-03-01") == "2025-03-01"
+    # Single-digit days and months, as strptime's %d/%m/%Y accepts them.
+    assert iso_date("1/3/2025") == "2025-03-01"
+    for value in ("29/02/2025", "31/04/2025", "00/01/2025", "2025-3-1", ""):
+        assert iso_date(value) is None
+
+
+def test_validate_reports_the_failing_rows_per_field():
+    report = validate(
+        {
+            "contact": ["0123456789", "12", "012-345 6789"],
+            "email": ["a@b.com", "a@b.com", "not an email"],
+            "seat_capacity": [5, 0, "7"],
+            "start_date": ["01/03/2025", "", "05/03/2025"],
+            "end_date": ["02/03/2025", "", "04/03/2025"],
+        },
+        optional=("start_date", "end_date"),
+    )
+
+    assert not report.ok
+    assert report.errors == {
+        "contact": [1],
+        "email": [2],
+        "seat_capacity": [1],
+        "date_range": [2],
+    }
+    assert report.invalid_rows() == [1, 2]
+
+
+def test_validate_records_counts_rows_across_chunks():
+    records = [{"contact": "0123456789"}] * 5
+    records[1] = records[4] = {"contact": "bad"}
+
+    report = validate_records(records, ("contact",), chunk_size=2)
+
+    assert report.rows == 5
+    assert report.errors == {"contact": [1, 4]}
+
+
+def test_import_data_skips_invalid_rows(data_dir):
+    write_data(
+        data_dir / "car.json",
+        [CAR, {**CAR, "ID": "MNB654"}, {**CAR, "ID": "BAD1", "seat_capacity": 0}],
+    )
+    write_data(
+        data_dir / "customer.json",
+        [CUSTOMER, {**CUSTOMER, "contact": "0198765432", "email": "nobody"}],
+    )
+    booking = {
+        "id": "1",
+        "car": "ABC123",
+        "contact": "0123456789",
+        "start_date": "01/03/2025",
+        "end_date": "03/03/2025",
+    }
+    write_data(
+        data_dir / "booking.json",
+        [
+            booking,
+            {**booking, "id": "2", "end_date": "28/02/2025"},
+            {**booking, "id": "3", "car": "BAD1"},
+            {**booking, "id": "4", "contact": "0198765432"},
+        ],
+    )
+
+    report = database.Database().import_data()
+
+    assert (report["cars"], report["customer"], report["rental_booking"]) == (2, 1, 1)
+    assert report["rejected"] == {"cars": 1, "customer": 1, "rental_booking": 3}
+    assert report["rejected_rows"] == [
+        ["cars", 2, ["seat_capacity"]],
+        ["customer", 1, ["email"]],
+        ["rental_booking", 1, ["date_range"]],
+        ["rental_booking", 2, ["car"]],
+        ["rental_booking", 3, ["contact"]],
+    ]
+    assert [row["id"] for row in database.Database().load_bookings()] == ["1"]
+
+
+def test_sync_after_import_finds_every_row_unchanged(data_dir):
+    write_data(data_dir / "car.json", [CAR, {**CAR, "ID": "MNB654"}])
+    write_data(data_dir / "customer.json", [CUSTOMER])
+    db = database.Database()
+
+    report = db.import_data()
+
+    assert (report["cars"], report["customer"]) == (2, 1)
+    for table, rows in (("cars", 2), ("customer", 1)):
+        counts = db.populate_table(table)
+        assert (counts["inserted"], counts["updated"]) == (0, 0)
+        assert counts["unchanged"] == rows
+    # Everything is stored already, the second import adds nothing.
+    again = db.import_data()
+    assert (again["cars"], again["customer"], again["rental_booking"]) == (0, 0, 0)
+
+
+def test_booking_sync_skips_invalid_rows_and_matches_contact_keys(data_dir):
+    write_data(data_dir / "car.json", [CAR])
+    write_data(data_dir / "customer.json", [{**CUSTOMER, "contact": "012-345 6789"}])
+    db = database.Database()
+    db.import_data()
+    booking = {
+        "id": "1",
+        "car": "ABC123",
+        "contact": "0123456789",
+        "start_date": "01/03/2025",
+        "end_date": "03/03/2025",
+    }
+    write_data(
+        data_dir / "booking.json",
+        [
+            booking,
+            {**booking, "id": "2", "start_date": ""},
+            {**booking, "id": "3", "car": "XYZ999"},
+            {**booking, "id": "4", "contact": "0198765432"},
+        ],
+    )
+
+    counts = db.populate_table("rental_booking")
+
+    assert (counts["inserted"], counts["rejected"]) == (1, 3)
+    assert counts["rejected_rows"] == [
+        ["rental_booking", 1, ["start_date"]],
+        ["rental_booking", 2, ["car"]],
+        ["rental_booking", 3, ["contact"]],
+    ]
+    # Stored under the customer's Contact as first written.
+    (stored,) = db.load_bookings()
+    assert stored["contact"] == "012-345 6789"
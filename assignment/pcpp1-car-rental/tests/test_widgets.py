@@ -0,0 +1,80 @@
+from pcpp1_car_rental.widgets import RowWindow
+
+ROWS = [(index, f"car {index}") for index in range(1_000)]
+
+
+class Source:
+    """Serves ``rows`` and remembers each (offset, limit) it was asked for."""
+
+    def __init__(self, rows: list[tuple] = ROWS):
+        self.rows = rows
+        self.fetches: list[tuple[int, int]] = []
+
+    def __call__(self, offset: int, limit: int) -> list[tuple]:
+        self.fetches.append((offset, limit))
+        return self.rows[offset : offset + limit]
+
+
+def show(window: RowWindow, page_size: int) -> list[tuple]:
+    """What VirtualTreeview._render does without a worker."""
+    window.clamp(page_size)
+    request = window.missing(page_size)
+    if request is not None:
+        window.store(*request, window.fetch(*request))
+    return window.rows(page_size)
+
+
+def test_small_scrolls_are_served_from_the_buffer():
+    fetch = Source()
+    window = RowWindow(buffer=5)
+    window.set_source(len(ROWS), fetch)
+
+    assert show(window, 10) == ROWS[:10]
+    window.move_by(3)
+    assert show(window, 10) == ROWS[3:13]
+    assert fetch.fetches == [(0, 20)]
+
+    window.move_to(0.5)
+    assert show(window, 10) == ROWS[500:510]
+    assert fetch.fetches == [(0, 20), (495, 20)]
+    assert window.fractions(10) == (0.5, 0.51)
+
+
+def test_window_stays_inside_the_rows():
+    fetch = Source()
+    window = RowWindow(buffer=5)
+    window.set_source(len(ROWS), fetch)
+
+    window.move_by(5_000)
+    assert show(window, 10) == ROWS[-10:]
+    window.move_by(-5_000)
+    assert show(window, 10) == ROWS[:10]
+
+    window.set_source(3, fetch)
+    assert show(window, 10) == ROWS[:3]
+    assert window.fractions(10) == (0.0, 1.0)
+
+
+def test_a_short_fetch_ends_the_data():
+    # The count is stale, only 12 rows are left.
+    fetch = Source(ROWS[:12])
+    window = RowWindow(buffer=5)
+    window.set_source(100, fetch)
+    window.move_by(8)
+
+    assert show(window, 10) == ROWS[8:12]
+    assert window.missing(10) is None
+    assert fetch.fetches == [(3, 20)]
+
+
+def test_rows_of_an_old_window_are_fetched_again():
+    fetch = Source()
+    window = RowWindow(buffer=5)
+    window.set_source(len(ROWS), fetch)
+    request = window.missing(10)
+
+    # Scrolled away while the first fetch was running.
+    window.move_to(0.9)
+    window.store(*request, fetch(*request))
+
+    assert window.missing(10) == (895, 20)
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from pcpp1_car_rental.worker import BackgroundWorker
+
+
+class FakeRoot:
+    """Stands in for Tk: ``after`` callbacks run when the test calls ``pump``."""
+
+    def __init__(self):
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        self.pending[self._next_id] = callback
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def pump(self, worker: BackgroundWorker, timeout: float = 5) -> None:
+        """Run the poll loop until nothing is pending anymore."""
+        deadline = time.monotonic() + timeout
+        while worker.is_busy():
+            assert time.monotonic() < deadline
+            for after_id, callback in list(self.pending.items()):
+                del self.pending[after_id]
+                callback()
+            time.sleep(0.001)
+
+
+def test_a_keyed_submit_drops_the_earlier_result():
+    root = FakeRoot()
+    busy = []
+    worker = BackgroundWorker(root, on_busy=busy.append)
+    release = threading.Event()
+    results = []
+    try:
+        worker.submit(release.wait, 5, on_done=results.append, key="search")
+        worker.submit(lambda: "second", on_done=results.append, key="search")
+        release.set()
+        root.pump(worker)
+    finally:
+        worker.shutdown()
+
+    assert results == ["second"]
+    assert busy == [True, False]
+
+
+def test_cancel_all_keeps_writes_and_errors_reach_on_error():
+    root = FakeRoot()
+    worker = BackgroundWorker(root)
+    release = threading.Event()
+    results, errors = [], []
+    try:
+        worker.submit(release.wait, 5, on_done=results.append)
+        worker.submit(lambda: "saved", on_done=results.append, cancellable=False)
+        worker.submit(lambda: "loaded", on_done=results.append)
+        worker.cancel_all()
+        worker.submit(lambda: 1 / 0, on_error=errors.append)
+        release.set()
+        root.pump(worker)
+    finally:
+        worker.shutdown()
+
+    assert results == ["saved"]
+    assert [type(error) for error in errors] == [ZeroDivisionError]